@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+透明图片转PDF基准测试
+
+对比三种处理透明PNG的方式：
+- legacy: 旧实现，铺白底后写入临时JPEG（quality=90），再交给img2pdf
+- png:    铺白底后在内存中编码为PNG，无损嵌入（Flate + PNG预测器）
+- jpeg:   铺白底后在内存中编码为JPEG（显式选择的体积优化选项）
+- png-mp: 同 png，但使用默认的多进程预处理
+
+输出每种方式的耗时、除输出文件外的磁盘写入量和输出PDF大小。
+磁盘写入量来自 /proc/self/io 的 wchar，仅在Linux上可用。
+
+用法: python benchmarks/bench_alpha_flatten.py [图片数量] [宽] [高]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import img2pdf
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.image_converter import ImageConverter
+
+
+def _written_bytes():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _make_screenshots(directory, count, width, height):
+    paths = []
+    for i in range(count):
+        img = Image.new('RGBA', (width, height), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(img)
+        for row in range(0, height, 24):
+            draw.rectangle([20, row, width - 20 - (row * 7 + i * 13) % (width // 2), row + 14],
+                           fill=(30, 30, 30, 255))
+        draw.ellipse([width // 3, height // 3, width // 2, height // 2], fill=(220, 40, 40, 160))
+        path = os.path.join(directory, f"shot_{i:04d}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+
+def _legacy_convert(image_paths, output_path):
+    temp_files = []
+    valid_images = []
+    try:
+        for path in image_paths:
+            with Image.open(path) as img:
+                bg = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode != 'RGBA':
+                    img = img.convert('RGBA')
+                bg.paste(img, mask=img.split()[3])
+                fd, temp_path = tempfile.mkstemp(suffix=".jpg")
+                os.close(fd)
+                bg.save(temp_path, "JPEG", quality=90)
+                temp_files.append(temp_path)
+                valid_images.append(temp_path)
+        with open(output_path, "wb") as f:
+            f.write(img2pdf.convert(valid_images, rotation=img2pdf.Rotation.ifvalid))
+    finally:
+        for temp_path in temp_files:
+            os.remove(temp_path)
+
+
+def _run(name, func, output_path):
+    before = _written_bytes()
+    start = time.perf_counter()
+    func(output_path)
+    elapsed = time.perf_counter() - start
+    after = _written_bytes()
+    output_size = os.path.getsize(output_path)
+    extra_writes = None if before is None else after - before - output_size
+    writes_text = 'n/a' if extra_writes is None else f"{extra_writes / 1024:.0f} KiB"
+    print(f"{name:<8} {elapsed:8.2f}s  extra disk writes: {writes_text:>12}  output: {output_size / 1024:.0f} KiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 1920
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1080
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _make_screenshots(temp_dir, count, width, height)
+        print(f"{count} RGBA screenshots, {width}x{height}")
+        _run('legacy', lambda out: _legacy_convert(paths, out), os.path.join(temp_dir, 'legacy.pdf'))
+        _run('png', lambda out: ImageConverter.convert(paths, out, max_workers=1),
+             os.path.join(temp_dir, 'png.pdf'))
+        _run('jpeg', lambda out: ImageConverter.convert(paths, out, max_workers=1, alpha_encoding="jpeg"),
+             os.path.join(temp_dir, 'jpeg.pdf'))
+        _run('png-mp', lambda out: ImageConverter.convert(paths, out),
+             os.path.join(temp_dir, 'png-mp.pdf'))
+
+
+if __name__ == '__main__':
+    main()
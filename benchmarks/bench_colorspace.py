@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+渲染色彩空间基准测试
+
+对一份纯文字PDF按不同色彩空间调用 PdfConverter.to_images：
+- rgb:          默认的RGB渲染，PNG输出
+- gray:         灰度渲染，8位灰度PNG
+- bilevel-png:  灰度渲染后按阈值转为1位黑白，1位PNG
+- bilevel-tiff: 同上，TIFF使用CCITT G4压缩
+
+输出每种方式的总耗时和输出文件总大小。每次运行前清空光栅缓存，
+保证各方式都重新渲染。
+
+用法: python benchmarks/bench_colorspace.py [页数] [DPI]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_converter import PdfConverter
+from src.core.raster_cache import configure_raster_cache
+
+
+def _make_text_pdf(path, count):
+    doc = fitz.open()
+    for i in range(count):
+        page = doc.new_page()
+        for row in range(45):
+            page.insert_text((40, 40 + row * 17), f"Page {i + 1} line {row} " + "lorem ipsum dolor " * 5,
+                             fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def _run(name, pdf, output_dir, dpi, **kwargs):
+    configure_raster_cache()
+    start = time.perf_counter()
+    outputs = PdfConverter.to_images(pdf, output_dir, dpi=dpi, max_workers=1, **kwargs)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in outputs)
+    print(f"{name:<13} {elapsed:8.2f}s  {elapsed / len(outputs) * 1000:7.1f} ms/page  "
+          f"output: {size / 1024 / 1024:8.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf = os.path.join(temp_dir, 'text.pdf')
+        _make_text_pdf(pdf, count)
+        print(f"{count} text pages, {dpi} DPI")
+        _run('rgb', pdf, os.path.join(temp_dir, 'rgb'), dpi)
+        _run('gray', pdf, os.path.join(temp_dir, 'gray'), dpi, colorspace='gray')
+        _run('bilevel-png', pdf, os.path.join(temp_dir, 'bilevel-png'), dpi, colorspace='bilevel')
+        _run('bilevel-tiff', pdf, os.path.join(temp_dir, 'bilevel-tiff'), dpi, image_format='tiff',
+             colorspace='bilevel')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+合并去重基准测试
+
+生成一批同一模板的PDF（相同的嵌入字体、徽标图片和ICC配置，不同的文字），
+分别用 PdfMerger.merge 普通合并和 deduplicate=True 合并，输出耗时、
+输出文件大小和去重统计。
+
+用法: python benchmarks/bench_merge_dedup.py [文件数] [每个文件的页数]
+"""
+import os
+import io
+import sys
+import time
+import tempfile
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image, ImageCms
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_merger import PdfMerger
+
+
+def _make_logo():
+    # 带ICC配置的照片类徽标，每个文件都嵌入一份
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, (300, 400, 3), dtype=np.uint8)
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=90, icc_profile=icc_profile)
+    return buffer.getvalue()
+
+
+def _make_corpus(directory, count, pages):
+    logo = _make_logo()
+    fonts = [fitz.Font(name).buffer for name in ('tiro', 'cour')]
+    paths = []
+    for i in range(count):
+        doc = fitz.open()
+        for p in range(pages):
+            page = doc.new_page()
+            for index, font in enumerate(fonts):
+                page.insert_font(fontname=f'F{index}', fontbuffer=font)
+            page.insert_image(fitz.Rect(40, 40, 240, 190), stream=logo)
+            page.insert_text((40, 240), f"Invoice No. {i:05d}", fontname='F0', fontsize=18)
+            for row in range(20):
+                page.insert_text((40, 270 + row * 14), f"Item {row}: {(i * 31 + row * 7) % 997} units",
+                                 fontname='F1', fontsize=10)
+        path = os.path.join(directory, f'invoice_{i:05d}.pdf')
+        doc.save(path, deflate=True)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def _run(name, paths, output, **kwargs):
+    stats = {}
+    start = time.perf_counter()
+    PdfMerger.merge(paths, output, stats=stats, **kwargs)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(output)
+    print(f"{name:<8} {elapsed:8.2f}s  output: {size / 1024 / 1024:8.2f} MiB  {stats}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _make_corpus(temp_dir, count, pages)
+        input_size = sum(os.path.getsize(path) for path in paths)
+        print(f"{count} files x {pages} pages, input: {input_size / 1024 / 1024:.2f} MiB")
+        _run('plain', paths, os.path.join(temp_dir, 'plain.pdf'))
+        _run('dedup', paths, os.path.join(temp_dir, 'dedup.pdf'), deduplicate=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+流式合并基准测试
+
+生成大量单页小PDF，分别用 PdfMerger.merge 的普通模式和流式模式 (streaming=True)
+合并，输出耗时和进程峰值内存。每种模式在单独的子进程中运行，峰值内存互不影响。
+
+用法: python benchmarks/bench_merge_streaming.py [文件数] [窗口大小]
+"""
+import os
+import sys
+import time
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_merger import PdfMerger
+
+
+def _make_inputs(directory, count):
+    template = fitz.open()
+    page = template.new_page()
+    for row in range(40):
+        page.insert_text((40, 40 + row * 18), f"Line {row} " + "lorem ipsum dolor sit amet " * 3, fontsize=9)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'input_{i:05d}.pdf')
+        template.save(path, deflate=True)
+        paths.append(path)
+    template.close()
+    return paths
+
+
+def _merge(items, output, kwargs):
+    start = time.perf_counter()
+    PdfMerger.merge(items, output, **kwargs)
+    elapsed = time.perf_counter() - start
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(name, items, output, **kwargs):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        elapsed, peak = executor.submit(_merge, items, output, kwargs).result()
+    size = os.path.getsize(output)
+    print(f"{name:<10} {elapsed:8.2f}s  peak RSS: {peak:8.1f} MiB  output: {size / 1024 / 1024:8.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _make_inputs(temp_dir, count)
+        items = [(path, f"Input {i + 1}") for i, path in enumerate(paths)]
+        print(f"{count} inputs, window {window}")
+        _run('in-memory', items, os.path.join(temp_dir, 'memory.pdf'))
+        _run('streaming', items, os.path.join(temp_dir, 'streaming.pdf'), streaming=True, window_size=window)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+页面图片编码基准测试
+
+对比 PdfConverter.to_images 保存JPEG的两种方式：
+- ppm:    旧实现，pix.tobytes("ppm") -> PIL 从 BytesIO 解析 -> convert('RGB') -> 编码
+- direct: 直接在 pixmap 的像素缓冲区上创建PIL图片后编码（_encode_pixmap）
+
+每种方式对同一批已渲染的页面编码，输出每页平均耗时和Python层分配的峰值内存
+（tracemalloc，只统计Python对象，例如PPM字节串；PIL内部的像素缓冲区不计入）。
+同时给出 direct 方式下 WebP/TIFF/PNG 的每页耗时供参考。
+
+用法: python benchmarks/bench_pixmap_encode.py [页数] [DPI]
+"""
+import io
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_converter import _encode_pixmap
+
+
+def _render_pages(count, dpi):
+    doc = fitz.open()
+    for i in range(count):
+        page = doc.new_page()
+        for row in range(40):
+            page.insert_text((40, 40 + row * 19), f"Page {i + 1} line {row} " + "lorem ipsum " * 6, fontsize=10)
+        page.draw_rect(fitz.Rect(300, 500, 550, 800), color=(0, 0, 0), fill=(0.2, 0.4, 0.8))
+    zoom = dpi / 72
+    pixmaps = [page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)) for page in doc]
+    doc.close()
+    return pixmaps
+
+
+def _ppm_jpeg(pix, output_path):
+    img_data = pix.tobytes("ppm")
+    img = Image.open(io.BytesIO(img_data))
+    img = img.convert('RGB')
+    img.save(output_path, "JPEG", quality=95)
+
+
+def _direct(image_format):
+    def encode(pix, output_path):
+        with open(output_path, 'wb') as f:
+            f.write(_encode_pixmap(pix, image_format))
+    return encode
+
+
+def _run(name, pixmaps, encode, directory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, pix in enumerate(pixmaps):
+        encode(pix, os.path.join(directory, f"{name}_{i}.{name.split('-')[0]}"))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} {elapsed / len(pixmaps) * 1000:8.1f} ms/page  peak Python allocations: {peak / 1024 / 1024:8.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    pixmaps = _render_pages(count, dpi)
+    print(f"{count} pages at {dpi} DPI ({pixmaps[0].width}x{pixmaps[0].height})")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _run('jpeg-ppm', pixmaps, _ppm_jpeg, temp_dir)
+        _run('jpeg-direct', pixmaps, _direct('jpeg'), temp_dir)
+        _run('webp', pixmaps, _direct('webp'), temp_dir)
+        _run('tiff', pixmaps, _direct('tiff'), temp_dir)
+        _run('png', pixmaps, _direct('png'), temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+拆分大纲基准测试
+
+生成一个多页、书签很多的PDF（每章一个顶级书签和一个二级书签），模拟按单页拆分时
+为每个输出文件选取大纲项：原来的做法是每个输出文件都重新排序并扫描全部大纲项
+(O(页数 x 书签数))，现在大纲树只解析一次，建立 _OutlineIndex 后按页码区间二分查找。
+另外输出为每个单页输出文件写入大纲 (PdfSplitter._add_outlines) 的总耗时。
+
+用法: python benchmarks/bench_split_outlines.py [页数] [书签数]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader, PdfWriter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_splitter import PdfSplitter, _OutlineIndex
+
+
+def _make_book(path, pages, bookmarks):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=300, height=400)
+        page.insert_text((20, 40), f"Page {i + 1}")
+    chapters = max(1, bookmarks // 2)
+    step = max(1, pages // chapters)
+    toc = []
+    for chapter in range(chapters):
+        first = min(chapter * step, pages - 1)
+        toc.append([1, f"Chapter {chapter + 1}", first + 1])
+        toc.append([2, f"Section {chapter + 1}.1", min(first + step // 2, pages - 1) + 1])
+    doc.set_toc(toc[:bookmarks])
+    doc.save(path)
+    doc.close()
+
+
+def _full_scan(outlines, start_page, end_page):
+    # 原来的做法：每个输出文件都排序并扫描全部大纲项
+    return [item for item in sorted(outlines, key=lambda x: (x[1], x[2])) if start_page <= item[1] < end_page]
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    bookmarks = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'book.pdf')
+        _make_book(path, pages, bookmarks)
+        reader = PdfReader(path)
+
+        start = time.perf_counter()
+        entries = PdfSplitter._get_outline_entries(reader)
+        index = _OutlineIndex(entries)
+        print(f"{pages} pages, {len(index)} bookmarks, parse + index: {time.perf_counter() - start:.2f}s")
+        outlines = [(title, page_num, level) for title, page_num, level, _ in entries]
+
+        start = time.perf_counter()
+        selected = sum(len(_full_scan(outlines, i, i + 1)) for i in range(pages))
+        print(f"full scan  {time.perf_counter() - start:8.2f}s  selected: {selected}")
+
+        start = time.perf_counter()
+        selected = sum(len(index.query(i, i + 1)) for i in range(pages))
+        print(f"index      {time.perf_counter() - start:8.2f}s  selected: {selected}")
+
+        start = time.perf_counter()
+        for i in range(pages):
+            PdfSplitter._add_outlines(PdfWriter(), index, i, i + 1)
+        print(f"add_outlines for {pages} single-page outputs: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
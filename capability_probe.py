@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+运行环境能力探测模块
+
+一次性并发探测各转换引擎（Playwright Chromium、WeasyPrint、wkhtmltopdf、
+EasyOCR模型、pdf2docx）是否可用，测量各自的预热耗时，并把结果缓存到
+用户目录，供批处理调度器直接读取而无需再次付出探测成本。
+"""
+
+import os
+import sys
+import time
+import platform
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, wait
+from typing import Callable, Dict, Iterable, Optional, Any
+
+from executable_detector import detect_executable
+from src.core.atomic_io import user_data_dir, file_lock, atomic_write_json, read_json
+
+# 报告格式版本，结构变化时递增以使旧缓存失效
+REPORT_VERSION = 1
+
+# 缓存默认有效期（秒）
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+def default_report_file() -> str:
+    """
+    获取能力报告缓存文件路径
+
+    Returns:
+        缓存文件路径
+    """
+    return os.path.join(user_data_dir(), 'capabilities.json')
+
+
+def _probe_playwright_chromium() -> Dict[str, Any]:
+    """启动并关闭一次无头Chromium"""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            version = browser.version
+        finally:
+            browser.close()
+    return {'version': version}
+
+
+def _probe_weasyprint() -> Dict[str, Any]:
+    """渲染一个最小的HTML文档"""
+    import weasyprint
+
+    weasyprint.HTML(string='<p>probe</p>').write_pdf()
+    return {'version': getattr(weasyprint, '__version__', None)}
+
+
+def _probe_wkhtmltopdf() -> Dict[str, Any]:
+    """通过可执行文件检测器定位wkhtmltopdf并读取版本"""
+    path = detect_executable('wkhtmltopdf')
+    if not path:
+        raise FileNotFoundError('No wkhtmltopdf executable found')
+    result = subprocess.run(
+        [path, '--version'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=10
+    )
+    return {'version': result.stdout.strip() or None, 'path': path}
+
+
+def _probe_easyocr() -> Dict[str, Any]:
+    """在不下载模型的前提下初始化EasyOCR读取器"""
+    import easyocr
+
+    easyocr.Reader(['ch_sim'], gpu=False, download_enabled=False, verbose=False)
+    return {'version': getattr(easyocr, '__version__', None)}
+
+
+def _probe_pdf2docx() -> Dict[str, Any]:
+    """把一个单页PDF转换为Word文档"""
+    import fitz  # PyMuPDF
+    import pdf2docx
+    from pdf2docx import Converter
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = os.path.join(temp_dir, 'probe.pdf')
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), 'probe')
+        doc.save(pdf_path)
+        doc.close()
+
+        cv = Converter(pdf_path)
+        try:
+            cv.convert(os.path.join(temp_dir, 'probe.docx'))
+        finally:
+            cv.close()
+    return {'version': getattr(pdf2docx, '__version__', None)}
+
+
+# 引擎名称 -> 探测函数；探测函数成功时返回附加信息，失败时抛出异常
+PROBES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'playwright_chromium': _probe_playwright_chromium,
+    'weasyprint': _probe_weasyprint,
+    'wkhtmltopdf': _probe_wkhtmltopdf,
+    'easyocr': _probe_easyocr,
+    'pdf2docx': _probe_pdf2docx,
+}
+
+
+def _run_probe(probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    执行单个探测并计时
+
+    Returns:
+        引擎结果字典: available, latency(秒), error, 以及探测函数返回的附加信息
+    """
+    start = time.perf_counter()
+    try:
+        details = probe() or {}
+        result = {'available': True, 'error': None}
+        result.update(details)
+    except Exception as e:
+        result = {'available': False, 'error': f"{type(e).__name__}: {e}"}
+    result['latency'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _start_probe(probe: Callable[[], Dict[str, Any]]) -> Future:
+    """
+    在守护线程中执行探测
+
+    超时的探测无法中断，守护线程保证它不会阻止解释器退出
+    （ThreadPoolExecutor 的线程在退出时会被等待）。
+    """
+    future: Future = Future()
+    threading.Thread(target=lambda: future.set_result(_run_probe(probe)), daemon=True).start()
+    return future
+
+
+def _environment_key() -> Dict[str, str]:
+    """缓存失效判断依据：解释器路径和平台"""
+    return {
+        'python': sys.executable,
+        'platform': platform.platform(),
+    }
+
+
+def probe_capabilities(engines: Optional[Iterable[str]] = None, timeout: float = 120) -> Dict[str, Any]:
+    """
+    并发探测引擎可用性（不读写缓存）
+
+    Args:
+        engines: 需要探测的引擎名称，None表示全部
+        timeout: 所有探测的总超时时间（秒），超时的引擎标记为不可用
+
+    Returns:
+        能力报告字典
+    """
+    names = list(engines) if engines is not None else list(PROBES)
+    unknown = [name for name in names if name not in PROBES]
+    if unknown:
+        raise ValueError(f"未知的引擎: {', '.join(unknown)}")
+
+    results = {}
+    futures = {name: _start_probe(PROBES[name]) for name in names}
+    # 不等待超时的探测线程结束
+    wait(futures.values(), timeout=timeout)
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            results[name] = {
+                'available': False,
+                'error': f"探测超时（>{timeout}秒）",
+                'latency': None,
+            }
+
+    report = {
+        'version': REPORT_VERSION,
+        'generated_at': time.time(),
+        'environment': _environment_key(),
+        'engines': results,
+    }
+    return report
+
+
+def _is_fresh(report: Any, max_age: float) -> bool:
+    """判断缓存报告是否仍然有效"""
+    if not isinstance(report, dict) or report.get('version') != REPORT_VERSION:
+        return False
+    if report.get('environment') != _environment_key():
+        return False
+    generated_at = report.get('generated_at')
+    if not isinstance(generated_at, (int, float)):
+        return False
+    return time.time() - generated_at <= max_age
+
+
+def get_capability_report(force: bool = False, max_age: float = DEFAULT_MAX_AGE,
+                          report_file: Optional[str] = None, timeout: float = 120) -> Dict[str, Any]:
+    """
+    获取能力报告，优先使用缓存
+
+    多个进程同时调用时，只有持有文件锁的进程执行探测，其余进程等待后直接读取
+    它写入的结果。
+
+    Args:
+        force: 是否忽略缓存强制重新探测
+        max_age: 缓存有效期（秒）
+        report_file: 缓存文件路径，默认为用户目录下的 .pdf_tool/capabilities.json
+        timeout: 探测总超时时间（秒）
+
+    Returns:
+        能力报告字典
+    """
+    report_file = report_file or default_report_file()
+
+    if not force:
+        cached = read_json(report_file)
+        if _is_fresh(cached, max_age):
+            return cached
+
+    with file_lock(report_file, timeout=timeout + 30):
+        if not force:
+            # 等锁期间其他进程可能已经完成探测
+            cached = read_json(report_file)
+            if _is_fresh(cached, max_age):
+                return cached
+
+        report = probe_capabilities(timeout=timeout)
+        try:
+            atomic_write_json(report_file, report)
+        except OSError:
+            # 缓存写入失败不影响探测结果
+            pass
+    return report
+
+
+def available_engines(max_age: float = DEFAULT_MAX_AGE) -> Dict[str, bool]:
+    """
+    获取各引擎是否可用（使用缓存报告）
+
+    Returns:
+        引擎名称 -> 是否可用
+    """
+    report = get_capability_report(max_age=max_age)
+    return {name: bool(info.get('available')) for name, info in report['engines'].items()}
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    将能力报告格式化为便于阅读的文本
+
+    Args:
+        report: 能力报告字典
+
+    Returns:
+        格式化后的文本
+    """
+    lines = [
+        f"环境检查报告（生成于 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['generated_at']))}）",
+    ]
+    for name, info in report['engines'].items():
+        latency = info.get('latency')
+        latency_text = f"{latency:.2f}s" if isinstance(latency, (int, float)) else '-'
+        if info.get('available'):
+            version = info.get('version') or ''
+            lines.append(f"✅ {name:<20} {latency_text:>8}  {version}".rstrip())
+        else:
+            lines.append(f"❌ {name:<20} {latency_text:>8}  {info.get('error')}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    print(format_report(get_capability_report(force='--refresh' in sys.argv)))
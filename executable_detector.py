@@ -8,23 +8,43 @@
 import os
 import sys
 import subprocess
-import json
 import platform
+import threading
 from typing import Optional, Dict, List
 
+from src.core.atomic_io import user_data_dir, file_lock, atomic_write_json, read_json
+
+# 旧版本保存在当前工作目录下的配置文件名
+LEGACY_CONFIG_FILE = 'executable_paths.json'
+
+
+def default_config_file() -> str:
+    """
+    获取默认配置文件路径（用户级目录，而不是当前工作目录）
+    
+    Returns:
+        配置文件路径
+    """
+    return os.path.join(user_data_dir(), 'executable_paths.json')
+
+
 class ExecutableDetector:
     """
     可执行文件自动检测器
+    
+    配置文件的写入是原子的（临时文件 + os.replace），并在读-改-写期间持有
+    建议性文件锁，因此多个进程同时检测时不会互相截断或覆盖彼此的结果。
     """
     
-    def __init__(self, config_file: str = 'executable_paths.json'):
+    def __init__(self, config_file: Optional[str] = None):
         """
         初始化检测器
         
         Args:
-            config_file: 配置文件路径，用于存储检测到的可执行文件路径
+            config_file: 配置文件路径，用于存储检测到的可执行文件路径，
+                         默认为用户目录下的 .pdf_tool/executable_paths.json
         """
-        self.config_file = config_file
+        self.config_file = config_file or default_config_file()
         self.config = self._load_config()
         
     def _load_config(self) -> Dict[str, str]:
@@ -34,25 +54,54 @@ class ExecutableDetector:
         Returns:
             配置字典，包含已检测到的可执行文件路径
         """
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        config = read_json(self.config_file)
+        if config is None and self.config_file == default_config_file():
+            # 兼容旧版本：用户目录下还没有配置时，读取当前目录中的旧配置
+            config = read_json(LEGACY_CONFIG_FILE)
+        return config if isinstance(config, dict) else {}
     
-    def _save_config(self) -> None:
+    def _save_config(self, updates: Optional[Dict[str, Optional[str]]] = None) -> None:
         """
         保存配置文件
+        
+        在文件锁保护下重新读取磁盘上的配置，合并本次修改后原子写回，
+        避免覆盖其他进程同时写入的条目。
+        
+        Args:
+            updates: 本次修改的条目，值为None表示删除；为None时写入全部内存配置
         """
+        if updates is None:
+            updates = dict(self.config)
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-        except IOError:
-            # 保存失败不影响程序运行，只记录日志
+            with file_lock(self.config_file):
+                merged = read_json(self.config_file)
+                if not isinstance(merged, dict):
+                    merged = {}
+                for name, path in updates.items():
+                    if path is None:
+                        merged.pop(name, None)
+                    else:
+                        merged[name] = path
+                atomic_write_json(self.config_file, merged)
+            self.config = merged
+        except (OSError, TimeoutError):
+            # 保存失败不影响程序运行
             pass
     
+    def _store_path(self, executable_name: str, path: Optional[str]) -> None:
+        """
+        更新内存配置并持久化单个条目
+        
+        Args:
+            executable_name: 可执行文件名称
+            path: 可执行文件路径，为None表示删除
+        """
+        if path is None:
+            self.config.pop(executable_name, None)
+        else:
+            self.config[executable_name] = path
+        self._save_config({executable_name: path})
+    
     def _get_platform_paths(self) -> List[str]:
         """
         获取当前平台的常见可执行文件路径
@@ -188,8 +237,7 @@ class ExecutableDetector:
                         if isinstance(stdout, bytes):
                             stdout = stdout.decode('utf-8')
                         path = stdout.strip().split('\n')[0]
-                        self.config[executable_name] = path
-                        self._save_config()
+                        self._store_path(executable_name, path)
                         return path
                 else:
                     # Unix-like系统使用which命令
@@ -205,8 +253,7 @@ class ExecutableDetector:
                         if isinstance(stdout, bytes):
                             stdout = stdout.decode('utf-8')
                         path = stdout.strip()
-                        self.config[executable_name] = path
-                        self._save_config()
+                        self._store_path(executable_name, path)
                         return path
         except (subprocess.TimeoutExpired, FileNotFoundError, PermissionError):
             pass
@@ -216,8 +263,7 @@ class ExecutableDetector:
             executable_path = os.path.join(path, full_executable_name)
             if os.path.exists(executable_path):
                 if self._check_executable_version(executable_path, version_flags):
-                    self.config[executable_name] = executable_path
-                    self._save_config()
+                    self._store_path(executable_name, executable_path)
                     return executable_path
         
         # 未找到可执行文件
@@ -247,8 +293,7 @@ class ExecutableDetector:
             设置成功返回True，否则返回False
         """
         if os.path.exists(path):
-            self.config[executable_name] = path
-            self._save_config()
+            self._store_path(executable_name, path)
             return True
         return False
     
@@ -260,8 +305,7 @@ class ExecutableDetector:
             executable_name: 可执行文件名称
         """
         if executable_name in self.config:
-            del self.config[executable_name]
-            self._save_config()
+            self._store_path(executable_name, None)
     
     def get_all_paths(self) -> Dict[str, str]:
         """
@@ -272,8 +316,29 @@ class ExecutableDetector:
         """
         return self.config.copy()
 
-# 全局检测器实例
-global_detector = ExecutableDetector()
+# 全局检测器实例（首次使用时才创建，导入模块时不做任何文件I/O）
+_global_detector: Optional[ExecutableDetector] = None
+_global_detector_lock = threading.Lock()
+
+def get_global_detector() -> ExecutableDetector:
+    """
+    获取全局检测器实例（惰性创建）
+    
+    Returns:
+        全局ExecutableDetector实例
+    """
+    global _global_detector
+    if _global_detector is None:
+        with _global_detector_lock:
+            if _global_detector is None:
+                _global_detector = ExecutableDetector()
+    return _global_detector
+
+def __getattr__(name: str):
+    # 兼容旧代码中的 executable_detector.global_detector 访问方式
+    if name == 'global_detector':
+        return get_global_detector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 辅助函数
 def detect_executable(executable_name: str, version_flags: List[str] = ['--version'], force: bool = False) -> Optional[str]:
@@ -288,7 +353,7 @@ def detect_executable(executable_name: str, version_flags: List[str] = ['--versi
     Returns:
         检测到的可执行文件路径，如果未找到则返回None
     """
-    return global_detector.detect(executable_name, version_flags, force)
+    return get_global_detector().detect(executable_name, version_flags, force)
 
 def get_executable_path(executable_name: str) -> Optional[str]:
     """
@@ -300,7 +365,7 @@ def get_executable_path(executable_name: str) -> Optional[str]:
     Returns:
         存储的可执行文件路径，如果未存储则返回None
     """
-    return global_detector.get_path(executable_name)
+    return get_global_detector().get_path(executable_name)
 
 def set_executable_path(executable_name: str, path: str) -> bool:
     """
@@ -313,7 +378,7 @@ def set_executable_path(executable_name: str, path: str) -> bool:
     Returns:
         设置成功返回True，否则返回False
     """
-    return global_detector.set_path(executable_name, path)
+    return get_global_detector().set_path(executable_name, path)
 
 def clear_executable_path(executable_name: str) -> None:
     """
@@ -322,7 +387,7 @@ def clear_executable_path(executable_name: str) -> None:
     Args:
         executable_name: 可执行文件名称
     """
-    global_detector.clear_path(executable_name)
+    get_global_detector().clear_path(executable_name)
 
 def get_all_executable_paths() -> Dict[str, str]:
     """
@@ -331,7 +396,7 @@ def get_all_executable_paths() -> Dict[str, str]:
     Returns:
         所有存储的可执行文件路径字典
     """
-    return global_detector.get_all_paths()
+    return get_global_detector().get_all_paths()
 
 if __name__ == '__main__':
     """
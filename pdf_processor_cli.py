@@ -7,12 +7,13 @@ PDF处理器 - 命令行界面
 2. JPG转PDF
 3. PDF合并
 4. 电子书制作
+5. 环境检查（doctor）
 """
 import sys
 import os
+import json
 import argparse
 from typing import List, Optional, Tuple
-from PIL import Image
 from PyPDF2 import PdfReader, PdfWriter
 import pikepdf
 from reportlab.lib.pagesizes import A4, landscape
@@ -20,6 +21,8 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 import pdfkit
 from executable_detector import detect_executable
+from capability_probe import get_capability_report, format_report
+from src.core.image_metadata import ImageMetadataIndex
 
 class PDFProcessor:
     """PDF处理核心类"""
@@ -129,6 +132,16 @@ class PDFProcessor:
             top_margin = top_margin / 25.4
             bottom_margin = bottom_margin / 25.4
             
+            # 获取页面尺寸
+            page_width, page_height = A4 if orientation == '纵向' else landscape(A4)
+            
+            # 计算可用绘制区域
+            draw_width = page_width - (left_margin + right_margin) * inch
+            draw_height = page_height - (top_margin + bottom_margin) * inch
+            
+            # 先只读取图片文件头（有索引缓存时直接使用缓存），一次性算好每页的布局
+            metadata_index = ImageMetadataIndex()
+            placements = []
             total_files = len(input_files)
             for i, img_path in enumerate(input_files, 1):
                 print(f"处理图片 ({i}/{total_files}): {os.path.basename(img_path)}")
@@ -141,16 +154,11 @@ class PDFProcessor:
                     print(f"❌ 错误: 不是JPG文件 - {img_path}")
                     continue
                 
-                # 打开图片获取尺寸
-                with Image.open(img_path) as img:
-                    img_width, img_height = img.size
-                
-                # 获取页面尺寸
-                page_width, page_height = A4 if orientation == '纵向' else landscape(A4)
-                
-                # 计算可用绘制区域
-                draw_width = page_width - (left_margin + right_margin) * inch
-                draw_height = page_height - (top_margin + bottom_margin) * inch
+                info, error = metadata_index.lookup(img_path)
+                if error is not None:
+                    print(f"❌ 错误: 无法读取图片 - {img_path}: {error}")
+                    continue
+                img_width, img_height = info['width'], info['height']
                 
                 # 计算图片缩放比例，保持纵横比
                 scale = min(draw_width / img_width, draw_height / img_height)
@@ -159,8 +167,12 @@ class PDFProcessor:
                 x = left_margin * inch + (draw_width - img_width * scale) / 2
                 y = bottom_margin * inch + (draw_height - img_height * scale) / 2
                 
-                # 绘制图片
-                c.drawImage(img_path, x, y, width=img_width*scale, height=img_height*scale)
+                placements.append((img_path, x, y, img_width * scale, img_height * scale))
+            metadata_index.save()
+            
+            # 绘制图片
+            for img_path, x, y, width, height in placements:
+                c.drawImage(img_path, x, y, width=width, height=height)
                 c.showPage()
             
             # 保存PDF文件
@@ -311,6 +323,12 @@ def main() -> None:
     ebook_parser.add_argument("output_pdf", help="输出PDF文件路径")
     ebook_parser.add_argument("-t", "--titles", nargs="*", help="章节标题列表")
     
+    # 环境检查命令
+    doctor_parser = subparsers.add_parser("doctor", help="检查各转换引擎是否可用")
+    doctor_parser.add_argument("--refresh", action="store_true", help="忽略缓存，重新探测")
+    doctor_parser.add_argument("--max-age", type=float, default=24 * 3600, help="缓存有效期，单位：秒")
+    doctor_parser.add_argument("--json", action="store_true", help="以JSON格式输出报告")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -330,6 +348,13 @@ def main() -> None:
     
     elif args.command == "ebook":
         processor.create_ebook(args.input_files, args.output_pdf, args.titles)
+    
+    elif args.command == "doctor":
+        report = get_capability_report(force=args.refresh, max_age=args.max_age)
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print(format_report(report))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+"""
+原子文件读写与进程间文件锁工具
+
+多个工作进程同时读写同一个配置/缓存文件时，直接 open(..., 'w') 会先截断文件，
+其他进程可能读到空文件或半截内容。本模块提供：
+
+1. 用户级数据目录（默认 ~/.pdf_tool，可用 PDF_TOOL_HOME 环境变量覆盖）
+2. 基于同目录临时文件 + os.replace 的原子写入
+3. 基于旁路 .lock 文件的建议锁（POSIX 使用 fcntl，Windows 使用 msvcrt）
+"""
+import os
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def user_data_dir() -> str:
+    """
+    获取用户级数据目录（不会创建目录）
+
+    Returns:
+        数据目录路径，优先使用环境变量 PDF_TOOL_HOME
+    """
+    override = os.environ.get('PDF_TOOL_HOME')
+    if override:
+        return override
+    return os.path.join(os.path.expanduser('~'), '.pdf_tool')
+
+
+def _ensure_dir(directory: str) -> None:
+    """确保目录存在（先用isdir判断，避免不必要的makedirs调用）"""
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 30.0) -> Iterator[None]:
+    """
+    对 path 加建议性排他锁（锁文件为 path + '.lock'）
+
+    Args:
+        path: 需要保护的文件路径
+        timeout: 等待锁的最长时间（秒），超时抛出 TimeoutError
+    """
+    lock_path = path + '.lock'
+    _ensure_dir(os.path.dirname(lock_path))
+
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if os.name == 'nt':
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """
+    原子地写入文件：先写同目录临时文件并 fsync，再用 os.replace 替换目标文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    _ensure_dir(directory)
+
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """
+    原子地写入JSON文件
+
+    Args:
+        path: 目标文件路径
+        data: 可JSON序列化的数据
+    """
+    atomic_write_bytes(path, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """
+    读取JSON文件，文件不存在或内容损坏时返回默认值
+
+    Args:
+        path: 文件路径
+        default: 读取失败时的返回值
+
+    Returns:
+        解析后的数据或默认值
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
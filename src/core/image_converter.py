@@ -1,97 +1,578 @@
 import logging
 import img2pdf
-from PIL import Image
+from PIL import Image, ExifTags
+import io
+import json
 import os
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from src.core.image_pdf_writer import ImagePdfWriter, get_image_dpi, get_exif_orientation, MULTI_FRAME_FORMATS
+from src.core.image_metadata import ImageMetadataIndex
+from src.core.atomic_io import file_lock, atomic_write_json, read_json
 
 logger = logging.getLogger(__name__)
 
+# 预处理阶段同时在处理中的图片（按解码后大小估算）的默认内存上限
+DEFAULT_MAX_INFLIGHT_MB = 1024
+
+# 透明图片铺白底后的编码方式: "png" 无损（Flate + PNG预测器嵌入），"jpeg" 体积更小但有损
+ALPHA_ENCODINGS = ("png", "jpeg")
+
+# 常用纸张尺寸（毫米，纵向）
+PAGE_SIZES = {
+    "A3": (297, 420),
+    "A4": (210, 297),
+    "A5": (148, 210),
+    "Letter": (215.9, 279.4),
+    "Legal": (215.9, 355.6),
+}
+
+ORIENTATIONS = ("auto", "portrait", "landscape")
+
+# 单张模式在输出目录中记录已转换图片（修改时间、大小、参数、输出文件名）的状态文件
+SINGLE_STATE_FILE = ".image2pdf_state.json"
+SINGLE_STATE_VERSION = 1
+
+
+def _layout_spec(page_size=None, orientation=None, margin=0):
+    """
+    Turn user-facing layout options into a picklable spec for _build_layout_fun.
+    
+    Args:
+        page_size: None/"fit" (page follows the image), a key of PAGE_SIZES, or (width, height) in mm
+        orientation: None/"auto" (follow the image), "portrait" or "landscape"
+        margin: Margin on every side, in mm
+        
+    Returns:
+        tuple: (page size in pt or None, border in pt or None, auto orient)
+    """
+    if orientation is None:
+        orientation = "auto"
+    if orientation not in ORIENTATIONS:
+        raise ValueError(f"不支持的页面方向: {orientation}")
+    
+    border = None
+    if margin:
+        border = (img2pdf.mm_to_pt(margin), img2pdf.mm_to_pt(margin))
+    
+    if page_size is None or page_size == "fit":
+        return None, border, False
+    
+    if isinstance(page_size, str):
+        if page_size not in PAGE_SIZES:
+            raise ValueError(f"不支持的页面大小: {page_size}")
+        page_size = PAGE_SIZES[page_size]
+    width, height = (img2pdf.mm_to_pt(v) for v in page_size)
+    
+    if orientation == "portrait":
+        width, height = min(width, height), max(width, height)
+    elif orientation == "landscape":
+        width, height = max(width, height), min(width, height)
+    return (width, height), border, orientation == "auto"
+
+
+def _build_layout_fun(spec):
+    """Build an img2pdf layout function from a _layout_spec result."""
+    pagesize, border, auto_orient = spec
+    return img2pdf.get_layout_fun(pagesize=pagesize, border=border,
+                                  fit=img2pdf.FitMode.into if pagesize else None,
+                                  auto_orient=auto_orient)
+
+
+def _needs_flattening(img):
+    return img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _resample_scale(size, dpi, layout, target_dpi):
+    """
+    Scale factor that brings an image of the given pixel size and DPI down to target_dpi
+    at its size on the page, or None if it is already at or below that resolution.
+    """
+    if not target_dpi:
+        return None
+    _, _, img_width_pt, _ = _build_layout_fun(layout)(size[0], size[1], tuple(dpi))
+    effective_dpi = size[0] * 72.0 / img_width_pt
+    if effective_dpi <= target_dpi:
+        return None
+    return target_dpi / effective_dpi
+
+
+def _needs_preparation(info, options):
+    """Whether _prepare_image would re-encode the image, decided from header metadata."""
+    if info['frames'] > 1:
+        return False
+    if info['has_alpha']:
+        return True
+    return _resample_scale((info['width'], info['height']), info['dpi'],
+                           options['layout'], options.get('target_dpi')) is not None
+
+
+def _prepare_image(path, options):
+    """
+    Validate one image, downsample it to the target DPI and flatten its alpha channel onto
+    white, as needed. Runs in a worker process, so it only takes and returns picklable values.
+    Re-encoded images are kept in memory; nothing is written to disk.
+    
+    Args:
+        path: Image file path
+        options: dict with alpha_encoding, jpeg_quality, layout (a _layout_spec result) and target_dpi
+        
+    Returns:
+        str or bytes: the original path, or the re-encoded image
+    """
+    with Image.open(path) as img:
+        # 多帧TIFF/GIF由写入器逐帧读取（透明帧无损铺白底），不在这里整体处理
+        if img.format in MULTI_FRAME_FORMATS and getattr(img, 'n_frames', 1) > 1:
+            return path
+        scale = _resample_scale(img.size, get_image_dpi(img), options['layout'], options.get('target_dpi'))
+        flatten = _needs_flattening(img)
+        if scale is None and not flatten:
+            return path
+        
+        source_format = img.format
+        dpi = get_image_dpi(img)
+        # 只保留EXIF方向，页面旋转仍由写入器根据它设置
+        exif = Image.Exif()
+        orientation = get_exif_orientation(img)
+        if orientation is not None:
+            exif[ExifTags.Base.Orientation.value] = orientation
+        
+        if scale is not None:
+            size = (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale)))
+            if source_format == 'JPEG':
+                # 让libjpeg直接按1/2、1/4、1/8比例解码，减少解码和缩放的开销
+                img.draft(img.mode, size)
+            if img.mode == '1':
+                img = img.convert('L')
+            elif img.mode == 'P':
+                img = img.convert('RGBA' if flatten else 'RGB')
+            elif img.mode not in ('L', 'LA', 'RGB', 'RGBA', 'CMYK'):
+                img = img.convert('RGB')
+            img = img.resize(size, Image.LANCZOS)
+            # 保持图片在页面上的物理尺寸不变
+            dpi = (dpi[0] * scale, dpi[1] * scale)
+        
+        if flatten:
+            bg = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            bg.paste(img, mask=img.split()[3])
+            img = bg
+        
+        # 透明图片按 alpha_encoding 编码；仅缩放的图片保持原来的有损/无损属性
+        if flatten:
+            use_jpeg = options['alpha_encoding'] == "jpeg"
+        else:
+            use_jpeg = source_format == 'JPEG'
+        
+        buffer = io.BytesIO()
+        if use_jpeg:
+            img.save(buffer, "JPEG", quality=options['jpeg_quality'], dpi=dpi, exif=exif)
+        else:
+            if img.mode == 'CMYK':
+                img = img.convert('RGB')
+            img.save(buffer, "PNG", dpi=dpi, exif=exif)
+        return buffer.getvalue()
+
+
+def _estimate_decoded_bytes(info):
+    """
+    Estimate peak memory needed to prepare an image, from its header metadata.
+    """
+    # RGBA source + RGB background
+    return info['width'] * info['height'] * 7
+
+
+def _iter_prepared(image_paths, options, infos, max_workers=None, max_inflight_bytes=None,
+                   task=_prepare_image, task_args=None):
+    """
+    Prepare images, in parallel when worthwhile, yielding results in input order.
+    
+    Args:
+        infos: (info, error) per image from ImageMetadataIndex.lookup_all; images with an
+               error are reported without being opened again
+        task: Function called as task(path, options, *extra) in the workers (default _prepare_image)
+        task_args: Optional list of extra argument tuples, one per image
+    
+    Yields:
+        tuple: (path, result, error) where result is the task return value
+               and error is an error message (result is None in that case)
+    """
+    if task_args is None:
+        task_args = [()] * len(image_paths)
+    
+    def immediate(index):
+        """Result known without running the task, or None."""
+        info, error = infos[index]
+        if error is not None:
+            return None, error
+        # 不需要铺白底或缩放的图片直接交给写入器，不必启动工作进程
+        if task is _prepare_image and not _needs_preparation(info, options):
+            return image_paths[index], None
+        return None
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    
+    if max_workers <= 1 or len(image_paths) <= 1:
+        for index, (path, extra) in enumerate(zip(image_paths, task_args)):
+            known = immediate(index)
+            if known is not None:
+                yield (path,) + known
+                continue
+            try:
+                yield path, task(path, options, *extra), None
+            except Exception as e:
+                yield path, None, str(e)
+        return
+    
+    if max_inflight_bytes is None:
+        max_inflight_bytes = DEFAULT_MAX_INFLIGHT_MB * 1024 * 1024
+    
+    executor = None
+    try:
+        pending = {}  # index -> (future, estimated bytes, immediate result)
+        inflight_bytes = 0
+        next_submit = 0
+        next_yield = 0
+        total = len(image_paths)
+        
+        while next_yield < total:
+            # Submit as much as the worker count and memory budget allow;
+            # one image is always allowed so a giant image cannot stall the pipeline.
+            while next_submit < total and len(pending) < max_workers * 2:
+                known = immediate(next_submit)
+                if known is not None:
+                    pending[next_submit] = (None, 0, known)
+                    next_submit += 1
+                    continue
+                estimate = _estimate_decoded_bytes(infos[next_submit][0])
+                if pending and inflight_bytes + estimate > max_inflight_bytes:
+                    break
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=max_workers)
+                future = executor.submit(task, image_paths[next_submit], options, *task_args[next_submit])
+                pending[next_submit] = (future, estimate, None)
+                inflight_bytes += estimate
+                next_submit += 1
+            
+            future, estimate, known = pending[next_yield]
+            if future is not None and not future.done():
+                # Results are yielded in order and only yielding frees budget, so block on
+                # the head image alone (later images finishing first would otherwise busy-spin)
+                wait([future])
+                continue
+            
+            del pending[next_yield]
+            inflight_bytes -= estimate
+            path = image_paths[next_yield]
+            next_yield += 1
+            
+            if future is None:
+                yield (path,) + known
+                continue
+            try:
+                yield path, future.result(), None
+            except Exception as e:
+                yield path, None, str(e)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _convert_single(path, options, output_file):
+    """
+    Convert one image to its own PDF (single mode). Runs in a worker process.
+    The PDF is written to a temporary file next to output_file and moved into place on success.
+    
+    Returns:
+        str: output_file
+    """
+    image = _prepare_image(path, options)
+    fd, temp_output = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_file)), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = ImagePdfWriter(f, _build_layout_fun(options['layout']))
+            writer.add_image(image)
+            writer.close()
+        os.replace(temp_output, output_file)
+    except BaseException:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
+        raise
+    return output_file
+
+
+def _options_key(options):
+    """Stable string identifying conversion options, so changing them invalidates the state file."""
+    return json.dumps(options, sort_keys=True)
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+
+def _load_single_state(state_path):
+    state = read_json(state_path)
+    if not isinstance(state, dict) or state.get('version') != SINGLE_STATE_VERSION \
+            or not isinstance(state.get('images'), dict):
+        return {}
+    return state['images']
+
+
+def _assign_single_outputs(sources, state_images):
+    """
+    Choose a PDF file name for each source image (absolute paths, no duplicates).
+    
+    Names recorded in the state file are kept so reruns overwrite the same files; other
+    images get "<name>.pdf", or "<name> (2).pdf", "<name> (3).pdf"... when that name is
+    already taken by another image of this run or by a previously converted image.
+    
+    Returns:
+        dict: source path -> output file name
+    """
+    current = set(sources)
+    used = {os.path.normcase(entry.get('output', '')) for source, entry in state_images.items()
+            if source not in current}
+    names = {}
+    
+    for source in sources:
+        previous = state_images.get(source, {}).get('output')
+        if previous and os.path.normcase(previous) not in used:
+            names[source] = previous
+            used.add(os.path.normcase(previous))
+    
+    for source in sources:
+        if source in names:
+            continue
+        base_name = os.path.splitext(os.path.basename(source))[0]
+        name = f"{base_name}.pdf"
+        counter = 2
+        while os.path.normcase(name) in used:
+            name = f"{base_name} ({counter}).pdf"
+            counter += 1
+        names[source] = name
+        used.add(os.path.normcase(name))
+    return names
+
 
 class ImageConverter:
     @staticmethod
-    def convert(image_paths, output_path, page_size=None, orientation=None, progress_callback=None, convert_mode="merge"):
+    def convert(image_paths, output_path, page_size=None, orientation=None, progress_callback=None, convert_mode="merge",
+                max_workers=None, max_inflight_mb=DEFAULT_MAX_INFLIGHT_MB, alpha_encoding="png", jpeg_quality=90,
+                margin=0, target_dpi=None, only_changed=False, metadata_index=None, stats=None):
         """
         Convert images to PDF.
         
         Args:
-            image_paths: List of image file paths
+            image_paths: List of image file paths; every frame of a multi-frame TIFF/GIF becomes a page
             output_path: Output PDF file path or directory (for single mode)
-            page_size: Page size (not used currently)
-            orientation: Page orientation (not used currently)
+            page_size: None or "fit" (page matches the image), "A4", "Letter" etc. (see PAGE_SIZES),
+                       or (width, height) in mm; images are scaled to fit inside the margins
+            orientation: None or "auto" (follow each image), "portrait" or "landscape"
             progress_callback: Progress callback function
             convert_mode: Conversion mode: "merge" (all images to one PDF) or "single" (each image to separate PDF)
+            max_workers: Number of worker processes for validation/resampling/flattening (None = CPU count, 1 = serial)
+            max_inflight_mb: Upper bound (estimated decoded size, MB) of images being preprocessed at once
+            alpha_encoding: How transparent images are re-encoded after flattening onto white:
+                            "png" (lossless, default) or "jpeg" (smaller, lossy)
+            jpeg_quality: JPEG quality used when images are re-encoded as JPEG
+            margin: Page margin on every side, in mm
+            target_dpi: If set, images whose effective resolution on the page is higher are
+                        downsampled to this DPI (JPEG stays JPEG, other formats become PNG;
+                        frames of multi-frame TIFF/GIF files are embedded at their own resolution)
+            only_changed: Single mode only: skip images whose file, options and output PDF are
+                          unchanged since the last run (tracked in SINGLE_STATE_FILE in the output directory)
+            metadata_index: ImageMetadataIndex used for the header-only metadata pass
+                            (None = the shared index in the user data directory)
+            stats: Optional dict that receives run statistics. Merge mode: pages, deduplicated_streams
+                   and deduplicated_bytes (identical images are embedded once and shared by their pages).
+                   Single mode: converted and skipped
         """
         if not image_paths:
             raise ValueError("没有提供图片文件")
-
-        valid_images = []
-        temp_files = []
+        if alpha_encoding not in ALPHA_ENCODINGS:
+            raise ValueError(f"不支持的透明图片编码方式: {alpha_encoding}")
+        
+        layout = _layout_spec(page_size, orientation, margin)
+        layout_fun = _build_layout_fun(layout)
+        options = {
+            'alpha_encoding': alpha_encoding,
+            'jpeg_quality': jpeg_quality,
+            'layout': layout,
+            'target_dpi': target_dpi,
+        }
+        
+        if metadata_index is None:
+            metadata_index = ImageMetadataIndex()
+        
+        if convert_mode == "single":
+            return ImageConverter._convert_single_mode(image_paths, output_path, options, progress_callback,
+                                                       max_workers, max_inflight_mb, only_changed, metadata_index,
+                                                       stats)
+        
+        # 只读文件头的元数据（有索引缓存时连文件头都不读），据此预先决定哪些图片需要预处理
+        infos = metadata_index.lookup_all(image_paths)
+        metadata_index.save()
+        
         failed_images = []
-
+        converted_count = 0
+        
+        # 合并模式下每张图片处理完成后立即写入输出文件，内存占用不随图片数量增长；
+        # 先写入同目录临时文件，成功后再替换目标文件
+        fd, temp_output = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".part")
+        out_file = os.fdopen(fd, "wb")
+        writer = ImagePdfWriter(out_file, layout_fun)
+        
         total_images = len(image_paths)
+        prepared = _iter_prepared(image_paths, options, infos, max_workers, max_inflight_mb * 1024 * 1024)
         try:
-            for i, path in enumerate(image_paths):
-                if not os.path.exists(path):
-                    logger.warning(f"图片文件不存在，已跳过: {path}")
-                    failed_images.append((os.path.basename(path), "文件不存在"))
-                    continue
+            for i, (path, image, error) in enumerate(prepared):
+                if error is None:
+                    try:
+                        converted_count += writer.add_image(image)
+                    except Exception as e:
+                        if writer.broken:
+                            raise
+                        error = str(e)
                 
-                try:
-                    with Image.open(path) as img:
-                        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                            bg = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode != 'RGBA':
-                                img = img.convert('RGBA')
-                            bg.paste(img, mask=img.split()[3])
-                            
-                            fd, temp_path = tempfile.mkstemp(suffix=".jpg")
-                            os.close(fd)
-                            bg.save(temp_path, "JPEG", quality=90)
-                            temp_files.append(temp_path)
-                            valid_images.append(temp_path)
-                        else:
-                            valid_images.append(path)
-                except Exception as e:
-                    logger.error(f"处理图片失败 {path}: {e}")
-                    failed_images.append((os.path.basename(path), str(e)))
+                if error is not None:
+                    ImageConverter._log_failure(path, error)
+                    failed_images.append((os.path.basename(path), error))
                     continue
                 
                 if progress_callback and total_images > 0:
                     progress = int(((i + 1) / total_images) * 90)
                     progress_callback(progress)
-
-            if not valid_images:
-                error_msg = "没有有效的图片可以转换"
-                if failed_images:
-                    error_msg += "\n失败的文件:\n"
-                    for filename, error in failed_images:
-                        error_msg += f"- {filename}: {error}\n"
-                raise ValueError(error_msg)
-
-            if convert_mode == "merge":
-                with open(output_path, "wb") as f:
-                    f.write(img2pdf.convert(valid_images, rotation=img2pdf.Rotation.ifvalid))
-            else:
-                base_output_dir = output_path
-                for i, img_path in enumerate(valid_images):
-                    base_name = os.path.splitext(os.path.basename(img_path))[0]
-                    single_output_path = os.path.join(base_output_dir, f"{base_name}.pdf")
-                    
-                    with open(single_output_path, "wb") as f:
-                        f.write(img2pdf.convert([img_path], rotation=img2pdf.Rotation.ifvalid))
             
-            if progress_callback:
-                progress_callback(100)
-                
+            if not converted_count:
+                raise ValueError(ImageConverter._no_valid_images_message(failed_images))
+            
+            writer.close()
+            out_file.close()
+            os.replace(temp_output, output_path)
+            temp_output = None
         finally:
-            for temp_path in temp_files:
-                try:
-                    os.remove(temp_path)
-                except Exception as e:
-                    logger.warning(f"清理临时文件失败 {temp_path}: {e}")
+            prepared.close()
+            out_file.close()
+            if temp_output is not None and os.path.exists(temp_output):
+                os.remove(temp_output)
+        
+        if writer.deduplicated_streams:
+            logger.info(f"重复图片已共用，节省 {writer.deduplicated_bytes} 字节（{writer.deduplicated_streams} 个数据流）")
+        if stats is not None:
+            stats.update(pages=converted_count, deduplicated_streams=writer.deduplicated_streams,
+                         deduplicated_bytes=writer.deduplicated_bytes)
+        
+        if progress_callback:
+            progress_callback(100)
         
         # 如果有失败的文件，记录日志
         if failed_images:
             logger.warning(f"有 {len(failed_images)} 个图片处理失败")
         
         return True
+    
+    @staticmethod
+    def _convert_single_mode(image_paths, output_dir, options, progress_callback, max_workers,
+                             max_inflight_mb, only_changed, metadata_index, stats):
+        """
+        Convert each image to its own PDF in output_dir, concurrently in a process pool.
+        
+        Output names are collision-safe and kept stable across runs via the state file;
+        with only_changed, images already converted with the same options are skipped.
+        """
+        state_path = os.path.join(output_dir, SINGLE_STATE_FILE)
+        state_images = _load_single_state(state_path)
+        options_key = _options_key(options)
+        
+        # 同一文件出现多次时只转换一次
+        sources = list(dict.fromkeys(os.path.abspath(path) for path in image_paths))
+        output_names = _assign_single_outputs(sources, state_images)
+        
+        failed_images = []
+        updates = {}
+        to_convert = []
+        skipped_count = 0
+        for source in sources:
+            output_file = os.path.join(output_dir, output_names[source])
+            entry = state_images.get(source)
+            if only_changed and entry is not None and os.path.exists(source) and os.path.exists(output_file):
+                if entry.get('options') == options_key and \
+                        {k: entry.get(k) for k in ('mtime_ns', 'size')} == _file_signature(source):
+                    skipped_count += 1
+                    continue
+            to_convert.append(source)
+        
+        infos = dict(zip(to_convert, metadata_index.lookup_all(to_convert)))
+        metadata_index.save()
+        
+        total_images = len(sources)
+        done = skipped_count
+        if progress_callback and done:
+            progress_callback(int(done / total_images * 90))
+        
+        converted = _iter_prepared(to_convert, options, [infos[source] for source in to_convert],
+                                   max_workers, max_inflight_mb * 1024 * 1024,
+                                   task=_convert_single,
+                                   task_args=[(os.path.join(output_dir, output_names[source]),)
+                                              for source in to_convert])
+        try:
+            for source, _, error in converted:
+                done += 1
+                if error is None:
+                    try:
+                        entry = _file_signature(source)
+                    except OSError as e:
+                        error = str(e)
+                    else:
+                        entry.update(options=options_key, output=output_names[source])
+                        updates[source] = entry
+                
+                if error is not None:
+                    ImageConverter._log_failure(source, error)
+                    failed_images.append((os.path.basename(source), error))
+                    continue
+                
+                if progress_callback:
+                    progress_callback(int(done / total_images * 90))
+        finally:
+            converted.close()
+            if updates:
+                # 重新读取后合并，避免覆盖同时在该目录运行的其他转换记录的条目
+                with file_lock(state_path):
+                    state_images = _load_single_state(state_path)
+                    state_images.update(updates)
+                    atomic_write_json(state_path, {'version': SINGLE_STATE_VERSION, 'images': state_images})
+        
+        if not updates and not skipped_count:
+            raise ValueError(ImageConverter._no_valid_images_message(failed_images))
+        if stats is not None:
+            stats.update(converted=len(updates), skipped=skipped_count)
+        
+        if progress_callback:
+            progress_callback(100)
+        
+        if skipped_count:
+            logger.info(f"{skipped_count} 个图片自上次转换后未变化，已跳过")
+        if failed_images:
+            logger.warning(f"有 {len(failed_images)} 个图片处理失败")
+        
+        return True
+    
+    @staticmethod
+    def _log_failure(path, error):
+        if error == "文件不存在":
+            logger.warning(f"图片文件不存在，已跳过: {path}")
+        else:
+            logger.error(f"处理图片失败 {path}: {error}")
+    
+    @staticmethod
+    def _no_valid_images_message(failed_images):
+        error_msg = "没有有效的图片可以转换"
+        if failed_images:
+            error_msg += "\n失败的文件:\n"
+            for filename, error in failed_images:
+                error_msg += f"- {filename}: {error}\n"
+        return error_msg
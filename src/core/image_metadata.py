@@ -0,0 +1,144 @@
+"""
+Header-only image metadata with a persistent index.
+
+PIL opens images lazily: size, mode, DPI and EXIF data come from the file header,
+pixels are only decoded on load(). read_image_info() collects everything layout and
+preprocessing decisions need without decoding, and ImageMetadataIndex caches the
+results on disk keyed by path + mtime + size, so repeated runs over the same image
+library do not even parse the headers again.
+"""
+import logging
+import os
+
+from PIL import Image
+
+from src.core.atomic_io import user_data_dir, file_lock, atomic_write_json, read_json
+from src.core.image_pdf_writer import get_image_dpi, get_exif_orientation, MULTI_FRAME_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# 索引格式版本，字段变化时递增以使旧索引失效
+INDEX_VERSION = 2
+
+# 索引最多保留的条目数，超出时丢弃最久未使用的条目（只在写入索引时更新使用顺序，
+# 只命中缓存、没有新条目的运行不重写索引文件）
+MAX_INDEX_ENTRIES = 20000
+
+
+def default_index_file():
+    """Path of the shared metadata index (~/.pdf_tool/image_index.json)."""
+    return os.path.join(user_data_dir(), 'image_index.json')
+
+
+def read_image_info(path):
+    """
+    Read image metadata from the file header only.
+
+    Args:
+        path: Image file path
+
+    Returns:
+        dict: width, height, mode, format, dpi ([x, y]), orientation (EXIF value or None),
+              has_alpha (needs flattening onto white) and frames (pages it becomes: the frame
+              count for multi-frame TIFF/GIF, otherwise 1)
+    """
+    with Image.open(path) as img:
+        return {
+            'width': img.size[0],
+            'height': img.size[1],
+            'mode': img.mode,
+            'format': img.format,
+            'dpi': list(get_image_dpi(img)),
+            'orientation': get_exif_orientation(img),
+            'has_alpha': img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info),
+            'frames': getattr(img, 'n_frames', 1) if img.format in MULTI_FRAME_FORMATS else 1,
+        }
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ImageMetadataIndex:
+    """
+    Persistent cache of read_image_info() results.
+
+    Entries are keyed by absolute path and are only reused while the file's mtime and
+    size are unchanged. Images that cannot be opened are cached as errors too, so a
+    broken file is not re-parsed on every run either.
+    """
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file or default_index_file()
+        data = read_json(self.index_file)
+        if isinstance(data, dict) and data.get('version') == INDEX_VERSION and isinstance(data.get('images'), dict):
+            self._entries = data['images']
+        else:
+            self._entries = {}
+        self._updates = {}
+        self._hits = set()
+
+    def lookup(self, path):
+        """
+        Get metadata for one image.
+
+        Returns:
+            tuple: (info, error); info is None if the file is missing or is not a readable image
+        """
+        key = os.path.abspath(path)
+        try:
+            mtime_ns, size = _signature(key)
+        except OSError:
+            return None, "文件不存在"
+
+        entry = self._updates.get(key) or self._entries.get(key)
+        if entry is not None and entry.get('mtime_ns') == mtime_ns and entry.get('size') == size:
+            if key not in self._updates:
+                self._hits.add(key)
+            return entry.get('info'), entry.get('error')
+
+        info, error = None, None
+        try:
+            info = read_image_info(key)
+        except Exception as e:
+            error = str(e)
+        self._updates[key] = {'mtime_ns': mtime_ns, 'size': size, 'info': info, 'error': error}
+        return info, error
+
+    def lookup_all(self, paths):
+        """Get (info, error) for each path, in order."""
+        return [self.lookup(path) for path in paths]
+
+    def save(self):
+        """
+        Write new entries to the index file.
+
+        The file is re-read under a lock and merged, so concurrent runs do not drop
+        each other's entries. Failures are logged and otherwise ignored: the index is
+        only a cache.
+        """
+        if not self._updates:
+            return
+        try:
+            with file_lock(self.index_file):
+                data = read_json(self.index_file)
+                entries = {}
+                if isinstance(data, dict) and data.get('version') == INDEX_VERSION \
+                        and isinstance(data.get('images'), dict):
+                    entries = data['images']
+                # 本次命中和新写入的条目移到末尾，淘汰时按最近使用顺序
+                for key in self._hits:
+                    if key in entries:
+                        entries[key] = entries.pop(key)
+                for key, entry in self._updates.items():
+                    entries.pop(key, None)
+                    entries[key] = entry
+                if len(entries) > MAX_INDEX_ENTRIES:
+                    entries = dict(list(entries.items())[-MAX_INDEX_ENTRIES:])
+                atomic_write_json(self.index_file, {'version': INDEX_VERSION, 'images': entries})
+            self._entries = entries
+            self._updates = {}
+            self._hits = set()
+        except (OSError, TimeoutError) as e:
+            logger.warning(f"无法保存图片元数据索引 {self.index_file}: {e}")
@@ -0,0 +1,630 @@
+"""
+流式图片PDF写入模块 - 逐页把图片写入PDF文件，内存占用不随页数增长
+
+img2pdf.convert 会先在内存中构造完整的PDF再一次性返回，大批量图片合并时
+需要与输出文件同等大小的内存。ImagePdfWriter 在添加每张图片时立即把图片
+XObject、内容流和页面对象写入输出文件，只在内存中保留对象偏移量和页面
+编号，最后写入页面树、目录和交叉引用表。
+
+图片尽量原样嵌入：JPEG 直接使用 DCTDecode，非隔行且无透明度的 PNG 直接
+复制 IDAT 数据（FlateDecode + PNG预测器），CCITT G4 压缩的TIFF帧直接复用压缩
+数据（CCITTFaxDecode），其余图片解码后以 Flate 无损压缩。多帧TIFF/GIF逐帧读取，
+每帧一页。内容完全相同的图片只写入一次，由多个页面共用。
+页面布局与 img2pdf 相同（默认按图片DPI计算页面大小，可传入 img2pdf 的
+layout_fun），EXIF 方向通过页面 /Rotate 实现。
+"""
+import io
+import os
+import hashlib
+import struct
+import zlib
+import logging
+
+import img2pdf
+from PIL import Image, ExifTags, ImageSequence
+
+logger = logging.getLogger(__name__)
+
+# 与 img2pdf 一致：图片未声明DPI时使用的默认值
+DEFAULT_DPI = 96
+
+# PDF页面尺寸上限（200英寸），超出时使用 /UserUnit 缩放
+MAX_PAGE_SIZE = 14400.0
+
+_EXIF_ROTATIONS = {1: 0, 6: 90, 3: 180, 8: 270}
+
+# 按帧展开为多页的图片格式（MPO等格式的附加帧是预览图，不展开）
+MULTI_FRAME_FORMATS = ('TIFF', 'GIF')
+
+
+def _fmt(value, digits=4):
+    """格式化PDF数字，去掉多余的0"""
+    if isinstance(value, int):
+        return str(value)
+    text = f"{value:.{digits}f}".rstrip('0').rstrip('.')
+    return text if text not in ('', '-0') else '0'
+
+
+def _read_source(image):
+    """
+    读取图片的原始字节
+
+    Args:
+        image: 图片路径、bytes 或文件对象
+    """
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    if hasattr(image, 'read'):
+        return image.read()
+    with open(image, 'rb') as f:
+        return f.read()
+
+
+def get_image_dpi(img):
+    """获取图片DPI，规则与 img2pdf 相同"""
+    dpi = img.info.get('dpi')
+    if dpi is None:
+        aspect = img.info.get('aspect')
+        if img.format == 'PNG' and aspect and aspect[0] and aspect[1]:
+            if aspect[0] > aspect[1]:
+                dpi = (DEFAULT_DPI * aspect[0] / aspect[1], DEFAULT_DPI)
+            else:
+                dpi = (DEFAULT_DPI, DEFAULT_DPI * aspect[1] / aspect[0])
+        else:
+            dpi = (DEFAULT_DPI, DEFAULT_DPI)
+    dpi = (int(round(dpi[0])), int(round(dpi[1])))
+    if dpi[0] <= 0 or dpi[1] <= 0:
+        dpi = (DEFAULT_DPI, DEFAULT_DPI)
+    if dpi == (1, 1) and img.format == 'TIFF':
+        dpi = (DEFAULT_DPI, DEFAULT_DPI)
+    return dpi
+
+
+def get_exif_orientation(img):
+    """
+    只根据文件头读取EXIF方向，不解码像素
+
+    PNG的 getexif() 在文件头中没有eXIf块时会解码整张图片去查找尾部的元数据，
+    这里只使用文件头中已有的EXIF数据。
+    """
+    try:
+        if img.format == 'PNG':
+            raw = img.info.get('exif')
+            if not raw:
+                return None
+            exif = Image.Exif()
+            exif.load(raw)
+        else:
+            exif = img.getexif()
+        return exif.get(ExifTags.Base.Orientation.value)
+    except Exception:
+        return None
+
+
+def _get_rotation(img):
+    """根据EXIF方向获取页面旋转角度（镜像方向被忽略）"""
+    orientation = get_exif_orientation(img)
+    if orientation is None:
+        return 0
+    if orientation not in _EXIF_ROTATIONS:
+        logger.warning(f"忽略不支持的EXIF方向: {orientation}")
+        return 0
+    return _EXIF_ROTATIONS[orientation]
+
+
+def _png_chunks(data):
+    """遍历PNG数据块，返回 (类型, 内容) 序列"""
+    pos = 8
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        yield chunk_type, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _png_passthrough(data):
+    """
+    尝试直接复用PNG的IDAT压缩数据
+
+    Returns:
+        dict 或 None: 可直接嵌入时返回图片参数，否则返回None
+    """
+    header = None
+    idat = []
+    palette = None
+    for chunk_type, content in _png_chunks(data):
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', content)
+        elif chunk_type == b'PLTE':
+            palette = content
+        elif chunk_type == b'tRNS':
+            return None
+        elif chunk_type == b'IDAT':
+            idat.append(content)
+        elif chunk_type == b'IEND':
+            break
+    if header is None or not idat:
+        return None
+
+    width, height, depth, color_type, _, _, interlace = header
+    if interlace != 0:
+        return None
+    if color_type == 0:
+        colorspace, colors = '/DeviceGray', 1
+    elif color_type == 2:
+        colorspace, colors = '/DeviceRGB', 3
+    elif color_type == 3 and palette:
+        hex_palette = palette.hex().upper()
+        colorspace, colors = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{hex_palette}>]", 1
+    else:
+        return None
+
+    return {
+        'width': width,
+        'height': height,
+        'colorspace': colorspace,
+        'bpc': depth,
+        'filter': '/FlateDecode',
+        'decode_parms': f"<< /Predictor 15 /Colors {colors} /Columns {width} /BitsPerComponent {depth} >>",
+        'data': b''.join(idat),
+        'indexed': color_type == 3,
+    }
+
+
+def _flatten(img):
+    """把带透明度的图片铺到白色背景上"""
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    bg = Image.new('RGB', img.size, (255, 255, 255))
+    bg.paste(img, mask=img.split()[3])
+    return bg
+
+
+def _decode_to_flate(img):
+    """解码图片并以 Flate 无损压缩像素数据"""
+    if img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = _flatten(img)
+    elif img.mode not in ('1', 'L', 'RGB', 'CMYK'):
+        img = img.convert('L' if img.mode in ('I', 'I;16', 'I;16B', 'I;16L', 'F') else 'RGB')
+
+    colorspace = {
+        '1': '/DeviceGray', 'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK',
+    }[img.mode]
+    return {
+        'width': img.size[0],
+        'height': img.size[1],
+        'colorspace': colorspace,
+        'bpc': 1 if img.mode == '1' else 8,
+        'filter': '/FlateDecode',
+        'data': zlib.compress(img.tobytes()),
+    }
+
+
+def _ccitt_passthrough(img, read_range):
+    """
+    直接复用TIFF帧的CCITT G4压缩数据（CCITTFaxDecode），不解码再压缩
+
+    TIFF的每个条带都是独立编码的，不能拼接成一个数据流；多条带的帧把每个条带
+    作为一张图片，由写入器组合成一个表单XObject。只处理默认填充顺序、
+    PhotometricInterpretation为0/1的帧，其余返回None。
+    """
+    if img.format != 'TIFF' or img.mode != '1' or img.info.get('compression') != 'group4':
+        return None
+    tags = img.tag_v2
+    offsets = tags.get(273)
+    counts = tags.get(279)
+    photometric = tags.get(262)
+    if not offsets or not counts or len(offsets) != len(counts):
+        return None
+    if photometric not in (0, 1) or tags.get(266, 1) != 1 or tags.get(293, 0):
+        return None
+
+    width, height = img.size
+    rows_per_strip = min(tags.get(278, height), height)
+    if len(offsets) != -(-height // rows_per_strip):
+        return None
+
+    # TIFF的G4编码中0位总是按"白色"游程编码；BlackIsZero(1)时0表示黑色，需要反转
+    black_is_1 = 'true' if photometric == 1 else 'false'
+    strips = []
+    for i, (offset, length) in enumerate(zip(offsets, counts)):
+        rows = min(rows_per_strip, height - i * rows_per_strip)
+        strip = {
+            'width': width,
+            'height': rows,
+            'colorspace': '/DeviceGray',
+            'bpc': 1,
+            'filter': '/CCITTFaxDecode',
+            'decode_parms': f"<< /K -1 /Columns {width} /Rows {rows} /BlackIs1 {black_is_1} >>",
+        }
+        strip.update(read_range(offset, length))
+        strips.append(strip)
+
+    if len(strips) == 1:
+        return strips[0]
+    return {
+        'width': width,
+        'height': height,
+        'colorspace': '/DeviceGray',
+        'strips': strips,
+    }
+
+
+def _load_frame(img, source_path, raw):
+    """
+    为已打开图片的当前帧生成可嵌入PDF的图片参数
+
+    Args:
+        img: 已打开（并已定位到目标帧）的PIL图片
+        source_path: 图片文件路径（从文件读取时）
+        raw: 图片原始字节（从内存读取时）
+    """
+    def read_range(offset, length):
+        if source_path:
+            return {'source_path': source_path, 'source_offset': offset, 'length': length}
+        return {'data': raw[offset:offset + length]}
+
+    dpi = get_image_dpi(img)
+    rotation = _get_rotation(img)
+    icc_profile = img.info.get('icc_profile')
+
+    xobject = None
+    if img.format == 'JPEG' and img.mode in ('L', 'RGB', 'CMYK'):
+        colorspace = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}[img.mode]
+        xobject = {
+            'width': img.size[0],
+            'height': img.size[1],
+            'colorspace': colorspace,
+            'bpc': 8,
+            'filter': '/DCTDecode',
+        }
+        if img.mode == 'CMYK' and 'adobe' in img.info:
+            xobject['decode'] = '[1 0 1 0 1 0 1 0]'
+        if source_path:
+            # JPEG 从文件分块复制，不整体读入内存
+            xobject['source_path'] = source_path
+            xobject['length'] = os.path.getsize(source_path)
+        else:
+            xobject['data'] = raw
+    elif img.format == 'PNG':
+        xobject = _png_passthrough(raw if raw is not None else _read_source(source_path))
+    elif img.format == 'TIFF':
+        xobject = _ccitt_passthrough(img, read_range)
+
+    if xobject is None:
+        xobject = _decode_to_flate(img)
+        icc_profile = None if xobject['colorspace'] != '/DeviceRGB' else icc_profile
+
+    if icc_profile and not xobject.get('indexed'):
+        xobject['icc_profile'] = icc_profile
+    xobject['dpi'] = dpi
+    xobject['rotation'] = rotation
+    return xobject
+
+
+def load_image(image):
+    """
+    读取图片并生成可嵌入PDF的图片参数（多帧图片只取第一帧）
+
+    Args:
+        image: 图片路径、bytes 或文件对象
+
+    Returns:
+        dict: width, height, colorspace, bpc, filter, data, dpi, rotation 等
+    """
+    source_path = image if isinstance(image, (str, os.PathLike)) else None
+    raw = None if source_path else _read_source(image)
+
+    with Image.open(source_path or io.BytesIO(raw)) as img:
+        return _load_frame(img, source_path, raw)
+
+
+def iter_image_frames(image):
+    """
+    逐帧生成图片参数；多帧TIFF/GIF每帧一页，每次只解码当前帧
+
+    Args:
+        image: 图片路径、bytes 或文件对象
+
+    Yields:
+        dict: 与 load_image 返回值相同的图片参数
+    """
+    source_path = image if isinstance(image, (str, os.PathLike)) else None
+    raw = None if source_path else _read_source(image)
+
+    with Image.open(source_path or io.BytesIO(raw)) as img:
+        if img.format not in MULTI_FRAME_FORMATS:
+            yield _load_frame(img, source_path, raw)
+            return
+        for frame in ImageSequence.Iterator(img):
+            yield _load_frame(frame, source_path, raw)
+
+
+class ImagePdfWriter:
+    """
+    流式图片PDF写入器
+
+    用法:
+        with open(path, 'wb') as f:
+            with ImagePdfWriter(f) as writer:
+                writer.add_image('a.jpg')
+                writer.add_image(png_bytes)
+    """
+
+    def __init__(self, fileobj, layout_fun=None, dedupe=True):
+        """
+        Args:
+            fileobj: 以二进制写方式打开的文件对象（无需支持seek）
+            layout_fun: img2pdf 布局函数 (imgwidthpx, imgheightpx, ndpi) ->
+                        (pagewidth, pageheight, imgwidthpdf, imgheightpdf)，默认按图片DPI计算
+            dedupe: 是否按内容哈希去重，内容完全相同的图片（及ICC配置文件）只写入一次，
+                    由多个页面共用
+        """
+        self._f = fileobj
+        self._layout_fun = layout_fun or img2pdf.default_layout_fun
+        self._offsets = [0]  # 下标为对象编号，0号对象为空闲链表头
+        self._position = 0
+        # 写入对象中途失败时回退到对象开始处（文件不支持seek时，之后的写入都会报错）
+        try:
+            self._origin = fileobj.tell() if fileobj.seekable() else None
+        except (AttributeError, OSError):
+            self._origin = None
+        self._broken = False
+        self._page_ids = []
+        self._closed = False
+        self._dedupe = dedupe
+        self._stream_ids = {}  # 内容哈希 -> 对象编号
+        self.deduplicated_streams = 0
+        self.deduplicated_bytes = 0
+
+        self._write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+        self._catalog_id = self._alloc()
+        self._pages_id = self._alloc()
+
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+
+    @property
+    def broken(self):
+        """对象写入中途失败且无法回退（文件不支持seek），输出文件已不可用"""
+        return self._broken
+
+    def _write(self, data):
+        if self._broken:
+            raise IOError("之前的对象写入中断，输出文件已损坏，无法继续写入")
+        self._f.write(data)
+        self._position += len(data)
+
+    def _rollback(self, obj_id, start):
+        """对象写入中途失败：把文件截回对象开始处，该对象写为 null，之后的偏移量保持正确"""
+        if self._origin is None:
+            self._broken = True
+            return
+        try:
+            self._f.seek(self._origin + start)
+            self._f.truncate()
+            self._position = start
+            self._write_object(obj_id, "null")
+        except Exception:
+            self._broken = True
+
+    def _alloc(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_object(self, obj_id, body):
+        self._offsets[obj_id] = self._position
+        self._write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+
+    def _write_stream(self, obj_id, entries, data=None, source_path=None, length=None, source_offset=0):
+        """写入流对象；source_path 给出时从文件的 source_offset 处分块复制 length 字节"""
+        if length is None:
+            length = len(data)
+        start = self._position
+        self._offsets[obj_id] = start
+        try:
+            self._write(f"{obj_id} 0 obj\n<< {entries} /Length {length} >>\nstream\n".encode('latin-1'))
+            if source_path is not None:
+                with open(source_path, 'rb') as src:
+                    src.seek(source_offset)
+                    remaining = length
+                    while remaining:
+                        chunk = src.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            raise ValueError(f"图片文件被截断: {source_path}")
+                        self._write(chunk)
+                        remaining -= len(chunk)
+            else:
+                self._write(data)
+            self._write(b"\nendstream\nendobj\n")
+        except Exception:
+            self._rollback(obj_id, start)
+            raise
+
+    def _write_shared_stream(self, entries, data=None, source_path=None, length=None, source_offset=0):
+        """
+        分配编号并写入流对象；开启去重时，字典项和内容都相同的流只写一次
+
+        Returns:
+            int: 对象编号（重复内容返回之前写入的对象编号）
+        """
+        if self._dedupe:
+            digest = hashlib.sha256(entries.encode('latin-1') + b'\0')
+            if source_path is not None:
+                with open(source_path, 'rb') as src:
+                    src.seek(source_offset)
+                    remaining = length
+                    while remaining:
+                        chunk = src.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            raise ValueError(f"图片文件被截断: {source_path}")
+                        digest.update(chunk)
+                        remaining -= len(chunk)
+            else:
+                digest.update(data)
+            key = digest.digest()
+            if key in self._stream_ids:
+                self.deduplicated_streams += 1
+                self.deduplicated_bytes += length if length is not None else len(data)
+                return self._stream_ids[key]
+
+        obj_id = self._alloc()
+        self._write_stream(obj_id, entries, data, source_path, length, source_offset)
+        if self._dedupe:
+            self._stream_ids[key] = obj_id
+        return obj_id
+
+    def write_xobject(self, xobject):
+        """
+        写入图片XObject
+
+        Args:
+            xobject: load_image 返回的图片参数
+
+        Returns:
+            int: 对象编号
+        """
+        if xobject.get('strips'):
+            return self._write_strips(xobject)
+
+        colorspace = xobject['colorspace']
+        if xobject.get('icc_profile'):
+            components = {'/DeviceGray': 1, '/DeviceRGB': 3, '/DeviceCMYK': 4}[colorspace]
+            icc_id = self._write_shared_stream(
+                f"/N {components} /Alternate {colorspace} /Filter /FlateDecode",
+                zlib.compress(xobject['icc_profile'])
+            )
+            colorspace = f"[/ICCBased {icc_id} 0 R]"
+
+        entries = (
+            f"/Type /XObject /Subtype /Image /Width {xobject['width']} /Height {xobject['height']} "
+            f"/ColorSpace {colorspace} /BitsPerComponent {xobject['bpc']} /Filter {xobject['filter']}"
+        )
+        if xobject.get('decode_parms'):
+            entries += f" /DecodeParms {xobject['decode_parms']}"
+        if xobject.get('decode'):
+            entries += f" /Decode {xobject['decode']}"
+
+        return self._write_shared_stream(entries, xobject.get('data'), xobject.get('source_path'),
+                                         xobject.get('length'), xobject.get('source_offset', 0))
+
+    def _write_strips(self, xobject):
+        """
+        把按条带拆分的图片写成表单XObject：每个条带是一张图片，在单位正方形中
+        从上到下排列，因此页面可以像使用普通图片一样使用它
+        """
+        height = xobject['height']
+        names = []
+        lines = []
+        top = 0
+        for i, strip in enumerate(xobject['strips']):
+            strip_id = self.write_xobject(strip)
+            names.append(f"/S{i} {strip_id} 0 R")
+            rows = strip['height']
+            y = (height - top - rows) / height
+            lines.append(f"q 1 0 0 {_fmt(rows / height, 8)} 0 {_fmt(y, 8)} cm /S{i} Do Q")
+            top += rows
+
+        return self._write_shared_stream(
+            f"/Type /XObject /Subtype /Form /BBox [0 0 1 1] /Resources << /XObject << {' '.join(names)} >> >>",
+            '\n'.join(lines).encode('latin-1')
+        )
+
+    def write_page(self, xobject_id, width_px, height_px, dpi, rotation=0):
+        """
+        写入一个显示指定图片XObject的页面
+
+        Args:
+            xobject_id: 图片XObject对象编号
+            width_px: 图片宽度（像素）
+            height_px: 图片高度（像素）
+            dpi: 图片DPI (水平, 垂直)
+            rotation: 页面旋转角度
+        """
+        page_width, page_height, img_width, img_height = self._layout_fun(width_px, height_px, dpi)
+
+        user_unit = None
+        if page_width > MAX_PAGE_SIZE or page_height > MAX_PAGE_SIZE:
+            user_unit = 10
+            while page_width / user_unit > MAX_PAGE_SIZE or page_height / user_unit > MAX_PAGE_SIZE:
+                user_unit *= 10
+            page_width /= user_unit
+            page_height /= user_unit
+            img_width /= user_unit
+            img_height /= user_unit
+
+        # 图片在页面中居中
+        x = (page_width - img_width) / 2.0
+        y = (page_height - img_height) / 2.0
+        content = (
+            f"q\n{_fmt(img_width)} 0 0 {_fmt(img_height)} {_fmt(x)} {_fmt(y)} cm\n/Im0 Do\nQ"
+        ).encode('latin-1')
+        content_id = self._alloc()
+        self._write_stream(content_id, "", content)
+
+        page = (
+            f"<< /Type /Page /Parent {self._pages_id} 0 R "
+            f"/MediaBox [0 0 {_fmt(page_width)} {_fmt(page_height)}] "
+            f"/Resources << /XObject << /Im0 {xobject_id} 0 R >> >> "
+            f"/Contents {content_id} 0 R"
+        )
+        if rotation:
+            page += f" /Rotate {rotation}"
+        if user_unit:
+            page += f" /UserUnit {user_unit}"
+        page += " >>"
+
+        page_id = self._alloc()
+        self._write_object(page_id, page)
+        self._page_ids.append(page_id)
+
+    def add_image(self, image):
+        """
+        添加一张图片，多帧TIFF/GIF的每一帧各占一页
+
+        Args:
+            image: 图片路径、bytes 或文件对象
+
+        Returns:
+            int: 添加的页数
+        """
+        start = len(self._page_ids)
+        try:
+            # 每帧解析完成后才写入，帧之间不保留像素数据
+            for xobject in iter_image_frames(image):
+                xobject_id = self.write_xobject(xobject)
+                self.write_page(xobject_id, xobject['width'], xobject['height'], xobject['dpi'], xobject['rotation'])
+        except Exception:
+            # 丢弃这张图片已写入的页面；已写入的对象不被页面树引用，不影响输出文件
+            del self._page_ids[start:]
+            raise
+        return len(self._page_ids) - start
+
+    def close(self):
+        """写入页面树、文档目录和交叉引用表"""
+        if self._closed:
+            return
+        self._closed = True
+
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(
+            self._pages_id,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>"
+        )
+        self._write_object(self._catalog_id, f"<< /Type /Catalog /Pages {self._pages_id} 0 R >>")
+
+        xref_offset = self._position
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets[1:])
+        lines.append(
+            f"trailer\n<< /Size {len(self._offsets)} /Root {self._catalog_id} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        )
+        self._write(''.join(lines).encode('latin-1'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
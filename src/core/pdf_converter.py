@@ -6,23 +6,490 @@ import logging
 from pdf2docx import Converter
 import fitz  # PyMuPDF
 from PIL import Image
+import numpy as np
 import io
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.core.raster_cache import RasterCache, COLORSPACES, get_raster_cache, document_fingerprint
+from src.core.tiled_tiff_writer import TiledTiffWriter
+from src.core.png_stream_writer import PngStreamWriter, MAX_DIMENSION as PNG_MAX_DIMENSION
 
 logger = logging.getLogger(__name__)
 
+# 各输出格式的默认编码参数（传给 PIL 的 save）；PNG 无参数时使用 PyMuPDF 自带的编码器
+DEFAULT_ENCODE_OPTIONS = {
+    'png': {},
+    'jpeg': {'quality': 95},
+    'webp': {'quality': 90, 'method': 4},
+    'tiff': {'compression': 'tiff_deflate'},
+}
+
+PIL_FORMATS = {'png': 'PNG', 'jpeg': 'JPEG', 'webp': 'WEBP', 'tiff': 'TIFF'}
+
+# 可选的渲染色彩空间：bilevel 按灰度渲染后按阈值转为1位黑白
+COLORSPACE_CHOICES = ('rgb', 'gray', 'cmyk', 'bilevel')
+
+# 黑白转换的默认阈值（灰度值不小于阈值的像素为白色）
+DEFAULT_THRESHOLD = 128
+
+# 1位黑白图片各格式的默认编码参数（覆盖 DEFAULT_ENCODE_OPTIONS），TIFF使用CCITT G4压缩
+BILEVEL_ENCODE_OPTIONS = {'tiff': {'compression': 'group4'}}
+
+# 长图各格式的最大宽高（JPEG规范上限为65535），超出高度时分为多段输出
+LONG_IMAGE_MAX_DIMENSION = {'png': PNG_MAX_DIMENSION, 'jpeg': 65535}
+
+# JPEG长图每段在内存中拼好后编码，每段画布的字节数上限（宽度 x 高度 x 通道数），
+# 超出时按该上限缩小段高度
+LONG_IMAGE_JPEG_SEGMENT_BYTES = 256 * 1024 * 1024
+
+# 并行渲染图片时每段最多的页数：每段的编码结果一次返回，在途的段数有上限，
+# 限制段大小才能让已渲染但未被取走的数据量与总页数无关
+IMAGE_SHARD_PAGES = 4
+
+# 每个渲染进程中打开的PDF文档和光栅缓存（由进程池初始化函数设置）
+_worker_doc = None
+_worker_cache = None
+
+
+def _init_render_worker(input_path, cache_config=None):
+    """
+    进程池初始化：每个工作进程只打开一次PDF文档
+    
+    工作进程的缓存只使用与主进程相同的磁盘层：各进程渲染的页面互不重复，
+    内存层只会白白占用内存。
+    """
+    global _worker_doc, _worker_cache
+    _worker_doc = fitz.open(input_path)
+    if cache_config:
+        _worker_cache = RasterCache(**dict(cache_config, max_memory_bytes=0))
+
+
+def parse_page_selection(pages, total_pages):
+    """
+    解析页面选择
+    
+    Args:
+        pages: None表示全部页面；页码列表（从1开始）；或字符串，例如 "1-5, 8, 10-12"
+        total_pages: PDF总页数
+    
+    Returns:
+        list: 页码列表（从1开始），保持给定的顺序
+    """
+    if pages is None:
+        return list(range(1, total_pages + 1))
+    
+    if isinstance(pages, str):
+        selection = []
+        for part in (p.strip() for p in pages.split(',')):
+            if not part:
+                continue
+            if '-' in part:
+                start, end = map(int, part.split('-'))
+                if start > end:
+                    raise ValueError(f"起始页码不能大于结束页码，输入的范围 '{part}' 无效")
+                selection.extend(range(start, end + 1))
+            else:
+                selection.append(int(part))
+    else:
+        selection = [int(page) for page in pages]
+    
+    for page_no in selection:
+        if page_no < 1:
+            raise ValueError(f"页码必须大于0，输入的页码 '{page_no}' 无效")
+        if page_no > total_pages:
+            raise ValueError(f"页码超出范围：PDF只有{total_pages}页，输入的页码 '{page_no}' 无效")
+    return selection
+
+
+def _page_shards(page_numbers, workers, shards_per_worker=4, max_pages=None):
+    """
+    把页码列表按顺序切分为若干段，段数约为进程数的若干倍，以便均衡负载
+    
+    Args:
+        max_pages: 每段最多的页数，None表示不限制
+    
+    Returns:
+        list: [[页码, ...], ...]
+    """
+    shard_size = max(1, -(-len(page_numbers) // (workers * shards_per_worker)))
+    if max_pages is not None:
+        shard_size = min(shard_size, max_pages)
+    return [page_numbers[i:i + shard_size] for i in range(0, len(page_numbers), shard_size)]
+
+
+def _normalize_format(image_format):
+    """统一图片格式名称（jpg -> jpeg, tif -> tiff）"""
+    image_format = image_format.lower()
+    return {'jpg': 'jpeg', 'tif': 'tiff'}.get(image_format, image_format)
+
+
+def _encode_options(image_format, encode_options=None, colorspace='rgb'):
+    """合并默认编码参数和调用方传入的参数"""
+    image_format = _normalize_format(image_format)
+    if image_format not in DEFAULT_ENCODE_OPTIONS:
+        raise ValueError(f"不支持的图片格式: {image_format}")
+    options = dict(DEFAULT_ENCODE_OPTIONS[image_format])
+    if colorspace == 'bilevel':
+        options.update(BILEVEL_ENCODE_OPTIONS.get(image_format, {}))
+    if encode_options:
+        options.update(encode_options)
+    return options
+
+
+def _check_render_options(image_format, colorspace, alpha):
+    """检查色彩空间、透明通道与输出格式是否兼容"""
+    if colorspace not in COLORSPACE_CHOICES:
+        raise ValueError(f"不支持的色彩空间: {colorspace}")
+    if colorspace == 'cmyk' and _normalize_format(image_format) in ('png', 'webp'):
+        raise ValueError(f"{image_format.upper()} 格式不支持CMYK色彩空间")
+    if colorspace == 'bilevel' and alpha:
+        raise ValueError("1位黑白图片不支持透明通道")
+    if colorspace == 'cmyk' and alpha:
+        # PIL没有带透明通道的CMYK模式
+        raise ValueError("CMYK色彩空间不支持透明通道")
+
+
+def _to_bilevel(samples, width, height, threshold=DEFAULT_THRESHOLD):
+    """
+    把8位灰度像素按阈值转为1位黑白图片（NumPy向量化比较和按位打包）
+    
+    Args:
+        samples: 灰度像素数据（每行 width 个字节，无填充）
+        threshold: 灰度值不小于阈值的像素为白色
+    
+    Returns:
+        PIL.Image: '1' 模式的图片
+    """
+    gray = np.frombuffer(samples, dtype=np.uint8).reshape(height, width)
+    # packbits 按行补齐到整字节，与PIL '1' 模式的行格式相同（1表示白色）
+    bits = np.packbits(gray >= threshold, axis=1)
+    return Image.frombuffer('1', (width, height), bits, 'raw', '1', 0, 1)
+
+
+def _pixmap_to_pil(pix):
+    """
+    直接在渲染结果的像素缓冲区上创建PIL图片（不复制像素数据）
+    
+    返回的图片与 pix 共用内存，使用期间必须保持 pix 存活。PyMuPDF 的透明通道像素是
+    预乘的，带透明通道时按 RGBa/La 读入并转为非预乘的 RGBA/LA（会复制像素数据）。
+    """
+    if pix.colorspace is None or pix.colorspace.n == 1:
+        if pix.alpha:
+            return Image.frombuffer('La', (pix.width, pix.height), pix.samples_mv, 'raw', 'La', pix.stride,
+                                    1).convert('LA')
+        mode = 'L'
+    elif pix.colorspace.n == 4:
+        if pix.alpha:
+            raise ValueError("CMYK色彩空间不支持透明通道")
+        mode = 'CMYK'
+    else:
+        if pix.alpha:
+            return Image.frombuffer('RGBA', (pix.width, pix.height), pix.samples_mv, 'raw', 'RGBa', pix.stride, 1)
+        mode = 'RGB'
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+
+
+def _encode_pixmap(pix, image_format, encode_options=None):
+    """
+    按格式编码渲染结果，不经过PPM等中间格式
+    
+    Args:
+        pix: PyMuPDF渲染结果
+        image_format: 图片格式 (png, jpg/jpeg, webp, tif/tiff)
+        encode_options: 编码参数，会覆盖 DEFAULT_ENCODE_OPTIONS 中对应格式的默认值
+    
+    Returns:
+        bytes: 编码后的图片数据
+    """
+    image_format = _normalize_format(image_format)
+    options = _encode_options(image_format, encode_options)
+    if image_format == 'png' and not options:
+        # PNG 使用 PyMuPDF 自带的编码器
+        return pix.tobytes("png")
+    
+    return _encode_image(_pixmap_to_pil(pix), image_format, options)
+
+
+def _encode_image(img, image_format, options):
+    """用PIL按格式编码图片（options 为合并后的编码参数）"""
+    image_format = _normalize_format(image_format)
+    if image_format == 'jpeg' and img.mode in ('LA', 'RGBA'):
+        img = img.convert(img.mode[:-1])
+    elif image_format in ('jpeg', 'webp') and img.mode == '1':
+        img = img.convert('L')
+    buffer = io.BytesIO()
+    img.save(buffer, PIL_FORMATS[image_format], **options)
+    return buffer.getvalue()
+
+
+def _encode_raster(raster, image_format, encode_options=None, colorspace='rgb', threshold=DEFAULT_THRESHOLD):
+    """
+    编码光栅缓存中的页面像素
+    
+    Args:
+        raster: 页面像素（bilevel 时为灰度像素）
+        colorspace: 输出色彩空间，bilevel 表示先转为1位黑白
+        threshold: 黑白转换的阈值
+    """
+    if colorspace == 'bilevel':
+        img = _to_bilevel(raster.samples, raster.width, raster.height, threshold)
+        return _encode_image(img, image_format, _encode_options(image_format, encode_options, colorspace))
+    if raster.pixmap is not None:
+        return _encode_pixmap(raster.pixmap, image_format, encode_options)
+    # 缓存命中：直接在缓存的像素数据上编码，不再转换为 Pixmap
+    return _encode_image(raster.to_pil(), image_format, _encode_options(image_format, encode_options))
+
+
+def _render_colorspace(colorspace):
+    """实际渲染使用的色彩空间（bilevel 按灰度渲染）"""
+    return 'gray' if colorspace == 'bilevel' else colorspace
+
+
+def _render_pages(page_numbers, image_format, dpi, encode_options=None, doc=None, colorspace='rgb', alpha=False,
+                  threshold=DEFAULT_THRESHOLD):
+    """
+    渲染并编码指定页面（通过光栅缓存，已渲染过的页面不再重新渲染）
+    
+    Args:
+        page_numbers: 页码列表（从1开始）
+        doc: 已打开的PDF文档，None表示使用工作进程中打开的文档
+        colorspace: 色彩空间 (rgb, gray, cmyk, bilevel)
+        alpha: 是否保留透明背景
+        threshold: bilevel 的黑白阈值
+        
+    Returns:
+        list: [(页码, 图片数据), ...]
+    """
+    if doc is None:
+        doc = _worker_doc
+        cache = _worker_cache or get_raster_cache()
+    else:
+        cache = get_raster_cache()
+    fingerprint = document_fingerprint(doc)
+    
+    results = []
+    for page_no in page_numbers:
+        # 导出的页面只用一次，不写入内存层（不挤掉查看器缓存的页面），编码时也不复制像素数据
+        raster = cache.render(doc[page_no - 1], dpi, _render_colorspace(colorspace), alpha, fingerprint,
+                              memory=False)
+        results.append((page_no, _encode_raster(raster, image_format, encode_options, colorspace, threshold)))
+    return results
+        
+        
+def _generate_images(input_path, page_numbers, image_format, dpi, encode_options, max_workers, cancel_event,
+                     colorspace='rgb', alpha=False, threshold=DEFAULT_THRESHOLD):
+    """PdfConverter.iter_images 的生成器实现（参数已检查）"""
+    if max_workers <= 1:
+        # 单进程：逐页渲染
+        with fitz.open(input_path) as doc:
+            for page_no in page_numbers:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield _render_pages([page_no], image_format, dpi, encode_options, doc, colorspace, alpha,
+                                    threshold)[0]
+        return
+    
+    shards = _page_shards(page_numbers, max_workers, max_pages=IMAGE_SHARD_PAGES)
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                                   initargs=(input_path, get_raster_cache().config()))
+    pending = deque()
+    next_shard = 0
+    try:
+        while pending or next_shard < len(shards):
+            # 最多同时提交 2 倍进程数的段（每段不超过 IMAGE_SHARD_PAGES 页），
+            # 已渲染但未被取走的图片不超过 2 * 进程数 * IMAGE_SHARD_PAGES 张
+            while next_shard < len(shards) and len(pending) < max_workers * 2:
+                pending.append(executor.submit(_render_pages, shards[next_shard], image_format, dpi,
+                                               encode_options, None, colorspace, alpha, threshold))
+                next_shard += 1
+            for page_no, data in pending.popleft().result():
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield page_no, data
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _page_pixel_rect(page, dpi):
+    """页面按指定DPI渲染后的像素范围（与 get_pixmap 的取整方式一致）"""
+    zoom = dpi / 72
+    return (page.rect * fitz.Matrix(zoom, zoom)).irect
+
+
+def _iter_page_tiles(page, dpi, tile_size, colorspace='rgb', alpha=False):
+    """
+    按从左到右、从上到下的顺序逐块渲染页面
+    
+    页面只解析一次（显示列表），每块用裁剪矩形单独渲染，同一时间只有一块在内存中。
+    
+    Yields:
+        tuple: (行, 列, Pixmap)，行列从0开始；右边和下边的块可能小于 tile_size
+    """
+    zoom = dpi / 72
+    mat = fitz.Matrix(zoom, zoom)
+    bounds = _page_pixel_rect(page, dpi)
+    cs = COLORSPACES[_render_colorspace(colorspace)]
+    display_list = page.get_displaylist()
+    for row, y in enumerate(range(bounds.y0, bounds.y1, tile_size)):
+        for col, x in enumerate(range(bounds.x0, bounds.x1, tile_size)):
+            clip = fitz.Rect(x, y, min(x + tile_size, bounds.x1), min(y + tile_size, bounds.y1)) / zoom
+            yield row, col, display_list.get_pixmap(matrix=mat, colorspace=cs, alpha=alpha, clip=clip)
+
+
+def _tile_image(pix, colorspace, threshold=DEFAULT_THRESHOLD):
+    """把渲染出的块转为PIL图片（bilevel 时转为1位黑白）"""
+    if colorspace == 'bilevel':
+        return _to_bilevel(pix.samples_mv, pix.width, pix.height, threshold)
+    return _pixmap_to_pil(pix)
+
+
+def _pad_tile(img, tile_size):
+    """把边缘的小块补齐为 tile_size x tile_size（TIFF的块大小固定），返回像素数据"""
+    if img.size == (tile_size, tile_size):
+        return img.tobytes()
+    padded = Image.new(img.mode, (tile_size, tile_size))
+    padded.paste(img, (0, 0))
+    return padded.tobytes()
+
+
+def _write_tiled_tiff(page, output_path, dpi, tile_size, colorspace='rgb', alpha=False, threshold=DEFAULT_THRESHOLD,
+                      cancel_event=None, tile_done=None):
+    """
+    把页面逐块渲染并写入分块TIFF
+    
+    Returns:
+        bool: 是否完成（被取消时删除未写完的文件并返回False）
+    """
+    bounds = _page_pixel_rect(page, dpi)
+    completed = False
+    try:
+        with open(output_path, 'wb') as f:
+            writer = TiledTiffWriter(f, bounds.width, bounds.height, colorspace, alpha, tile_size, dpi)
+            for _, _, pix in _iter_page_tiles(page, dpi, tile_size, colorspace, alpha):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                writer.write_tile(_pad_tile(_tile_image(pix, colorspace, threshold), tile_size))
+                if tile_done:
+                    tile_done()
+            else:
+                writer.close()
+                completed = True
+    finally:
+        if not completed and os.path.exists(output_path):
+            os.remove(output_path)
+    return completed
+
+
+def _long_image_segments(heights, spacing, max_height):
+    """
+    把页面依次排入若干段，每段高度不超过 max_height
+    
+    优先在页面之间分段，单页高于 max_height 时才在页内分段；页间距只加在同一段的两页之间。
+    
+    Args:
+        heights: 各页高度（像素）
+        spacing: 页间距（像素）
+        max_height: 每段的最大高度
+    
+    Returns:
+        list: 每段为 [(页面序号, 起始行, 结束行), ...]，序号为None表示页间距
+    """
+    segments = [[]]
+    used = 0
+    for index, height in enumerate(heights):
+        gap = spacing if used else 0
+        if used and used + gap + height > max_height:
+            segments.append([])
+            used = gap = 0
+        if gap:
+            segments[-1].append((None, 0, gap))
+            used += gap
+        y = 0
+        while y < height:
+            if used == max_height:
+                segments.append([])
+                used = 0
+            rows = min(height - y, max_height - used)
+            segments[-1].append((index, y, y + rows))
+            used += rows
+            y += rows
+    return segments
+
+
+def _fit_width(pix, width):
+    """返回宽度恰好为 width 的像素行（取整误差导致宽度差一两个像素时裁剪或用白色补齐）"""
+    if pix.width == width:
+        return pix.samples_mv
+    img = _pixmap_to_pil(pix)
+    canvas = Image.new(img.mode, (width, pix.height), 'white')
+    canvas.paste(img, (0, 0))
+    return canvas.tobytes()
+
+
+def _parse_word_pages(cv, page_indexes, settings, page_done=None):
+    """
+    用pdf2docx解析指定页面（与 Converter.parse 相同，但每解析完一页就回调一次）
+    
+    Args:
+        cv: pdf2docx Converter
+        page_indexes: 页面索引列表（从0开始）
+        settings: 转换参数
+        page_done: 回调函数，参数为已解析的页数
+    """
+    cv.load_pages(pages=page_indexes)
+    cv.parse_document(**settings)
+    
+    todo = [page for page in cv.pages if not page.skip_parsing]
+    for done, page in enumerate(todo, start=1):
+        try:
+            page.parse(**settings)
+        except Exception as e:
+            if settings.get('raw_exceptions') or settings['debug'] or not settings['ignore_page_error']:
+                raise
+            logger.error(f"第{page.id + 1}页解析失败，已忽略: {e}")
+        if page_done:
+            page_done(done)
+
+
+def _parse_word_chunk(input_path, page_indexes, settings):
+    """
+    在工作进程中解析一段页面
+    
+    Returns:
+        dict: Converter.store() 的解析结果，可在主进程中用 Converter.restore() 恢复
+    """
+    cv = Converter(input_path)
+    try:
+        _parse_word_pages(cv, page_indexes, settings)
+        return cv.store()
+    finally:
+        cv.close()
+
 
 class PdfConverter:
     """PDF转换器 - 支持转换为Word和图片"""
     
     @staticmethod
-    def to_word(input_path, output_path, progress_callback=None):
+    def to_word(input_path, output_path, progress_callback=None, pages=None, multi_processing=False, cpu_count=None,
+                chunk_pages=None):
         """
         将PDF转换为Word文档
         
+        默认在当前进程中逐页解析并按页汇报进度。长文档可以用 chunk_pages 分段：
+        各段在多个进程中并行解析，解析结果汇总后一次生成同一个Word文档。
+        
         Args:
             input_path: PDF文件路径
             output_path: 输出Word文件路径
             progress_callback: 进度回调函数
+            pages: 页面选择，None表示全部；页码列表（从1开始）或字符串如 "1-5, 8, 10-12"
+            multi_processing: 使用pdf2docx自带的多进程模式（只支持连续的页面范围，不汇报中间进度）
+            cpu_count: 进程数，None表示CPU核数（用于 multi_processing 和 chunk_pages）
+            chunk_pages: 每段的页数，设置后按段并行解析
             
         Returns:
             bool: 转换是否成功
@@ -30,13 +497,43 @@ class PdfConverter:
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"PDF文件不存在: {input_path}")
         
+        with fitz.open(input_path) as doc:
+            page_numbers = parse_page_selection(pages, len(doc))
+        if not page_numbers:
+            raise ValueError("没有选择要转换的页面")
+        page_indexes = [page_no - 1 for page_no in page_numbers]
+        if multi_processing and page_indexes != list(range(page_indexes[0], page_indexes[-1] + 1)):
+            raise ValueError("pdf2docx多进程模式只支持连续的页面范围")
+        
         try:
             logger.info(f"开始转换PDF到Word: {input_path}")
             
-            # 使用pdf2docx进行转换
-            cv = Converter(input_path)
-            cv.convert(output_path, start=0, end=None)
-            cv.close()
+            if multi_processing:
+                # 使用pdf2docx自带的多进程模式
+                cv = Converter(input_path)
+                try:
+                    cv.convert(output_path, start=page_indexes[0], end=page_indexes[-1] + 1,
+                               multi_processing=True, cpu_count=cpu_count or 0)
+                finally:
+                    cv.close()
+            elif chunk_pages:
+                PdfConverter._to_word_chunked(input_path, output_path, page_indexes, chunk_pages, cpu_count,
+                                              progress_callback)
+            else:
+                cv = Converter(input_path)
+                try:
+                    settings = cv.default_settings
+                    total = len(page_indexes)
+                    
+                    def page_done(done):
+                        # 解析占90%，生成文档占剩余部分
+                        if progress_callback:
+                            progress_callback(int(done / total * 90))
+                    
+                    _parse_word_pages(cv, page_indexes, settings, page_done)
+                    cv.make_docx(output_path, **settings)
+                finally:
+                    cv.close()
             
             if progress_callback:
                 progress_callback(100)
@@ -49,22 +546,125 @@ class PdfConverter:
             raise Exception(f"转换失败: {str(e)}")
     
     @staticmethod
-    def to_images(input_path, output_dir, image_format='png', dpi=200, progress_callback=None):
+    def _to_word_chunked(input_path, output_path, page_indexes, chunk_pages, cpu_count, progress_callback):
+        """分段并行解析页面，汇总解析结果后生成一个Word文档"""
+        chunks = [page_indexes[i:i + chunk_pages] for i in range(0, len(page_indexes), chunk_pages)]
+        workers = min(cpu_count or os.cpu_count() or 1, len(chunks))
+        
+        cv = Converter(input_path)
+        try:
+            settings = cv.default_settings
+            done = 0
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_parse_word_chunk, input_path, chunk, settings): len(chunk)
+                           for chunk in chunks}
+                try:
+                    for future in as_completed(futures):
+                        # 解析结果按页面编号恢复，与完成顺序无关
+                        cv.restore(future.result())
+                        done += futures[future]
+                        if progress_callback:
+                            progress_callback(int(done / len(page_indexes) * 90))
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            cv.make_docx(output_path, **settings)
+        finally:
+            cv.close()
+    
+    @staticmethod
+    def iter_images(input_path, pages=None, image_format='png', dpi=200, encode_options=None, max_workers=None,
+                    cancel_event=None, colorspace='rgb', alpha=False, threshold=DEFAULT_THRESHOLD):
+        """
+        按需渲染页面，逐页生成 (页码, 图片数据)
+        
+        生成器是惰性的：只有被迭代时才渲染，正在渲染的页面数量有上限（与总页数无关）。提前停止迭代
+        （break、close() 或设置 cancel_event）会取消尚未开始的渲染任务。
+        并行渲染时页面按连续段分给多个进程，每个工作进程打开自己的PDF文档
+        （PyMuPDF文档不能跨线程/进程共享），结果仍按 pages 的顺序生成。
+        
+        黑白文字文档用 gray 或 bilevel 渲染可以大幅减少渲染、编码的耗时和输出大小：
+        gray 每像素1字节（RGB为3字节）；bilevel 在灰度结果上用NumPy按阈值向量化转为1位
+        黑白，PNG输出为1位PNG，TIFF默认使用CCITT G4压缩。
+        
+        Args:
+            input_path: PDF文件路径
+            pages: 页面选择，None表示全部；页码列表（从1开始）或字符串如 "1-5, 8, 10-12"
+            image_format: 图片格式 (png, jpg, jpeg, webp, tif, tiff)
+            dpi: 图片分辨率
+            encode_options: 编码参数，覆盖该格式的默认值，例如 {'quality': 85}（JPEG/WebP）、
+                            {'lossless': True}（WebP）、{'compression': 'tiff_lzw'}（TIFF）、
+                            {'compress_level': 9}（PNG，改用PIL编码）
+            max_workers: 渲染进程数，None表示CPU核数，1表示在当前进程中逐页渲染
+            cancel_event: 可选的 threading.Event，被设置后停止生成
+            colorspace: 色彩空间 (rgb, gray, cmyk, bilevel)；PNG和WebP不支持cmyk
+            alpha: 是否保留透明背景（PNG/TIFF/WebP有效，bilevel和cmyk不支持）
+            threshold: bilevel 的黑白阈值（0-255），灰度值不小于阈值的像素为白色
+        
+        Returns:
+            generator: 生成 (页码, 编码后的图片数据 bytes)
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"PDF文件不存在: {input_path}")
+        # 参数在调用时立即检查，而不是在第一次迭代时
+        _encode_options(image_format, encode_options)
+        _check_render_options(image_format, colorspace, alpha)
+        with fitz.open(input_path) as doc:
+            page_numbers = parse_page_selection(pages, len(doc))
+        
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(page_numbers))
+        return _generate_images(input_path, page_numbers, image_format, dpi, encode_options, max_workers,
+                                cancel_event, colorspace, alpha, threshold)
+    
+    @staticmethod
+    def to_images(input_path, output_dir, image_format='png', dpi=200, progress_callback=None, max_workers=None,
+                  encode_options=None, pages=None, cancel_event=None, tile_size=None, colorspace='rgb', alpha=False,
+                  threshold=DEFAULT_THRESHOLD):
         """
         将PDF转换为图片（使用PyMuPDF，无需Poppler）
         
+        基于 iter_images 逐页写入文件，输出文件名与页码一一对应，与并行方式无关。
+        
+        设置 tile_size 后改为分块渲染，用于A0图纸等超大页面的高DPI输出：每次只渲染
+        tile_size x tile_size 像素的一块，内存占用与页面大小无关。TIFF格式输出为分块TIFF
+        （每页一个文件，Deflate压缩，忽略 encode_options），其他格式每块输出一个文件，
+        文件名为 {文件名}_page_{页码}_tile_{行}_{列}.{格式}（行列从1开始）。分块渲染在
+        当前进程中进行，不使用渲染进程池和光栅缓存。
+        
         Args:
             input_path: PDF文件路径
             output_dir: 输出图片目录
-            image_format: 图片格式 (png, jpg, jpeg)
+            image_format: 图片格式 (png, jpg, jpeg, webp, tif, tiff)
             dpi: 图片分辨率
             progress_callback: 进度回调函数
+            max_workers: 渲染进程数，None表示CPU核数，1表示在当前进程中逐页渲染
+            encode_options: 编码参数，见 iter_images
+            pages: 页面选择，None表示全部；页码列表（从1开始）或字符串如 "1-5, 8, 10-12"
+            cancel_event: 可选的 threading.Event，被设置后停止转换并返回已生成的文件
+            tile_size: 分块边长（像素，16的倍数），None表示整页渲染
+            colorspace: 色彩空间 (rgb, gray, cmyk, bilevel)，见 iter_images
+            alpha: 是否保留透明背景
+            threshold: bilevel 的黑白阈值
             
         Returns:
-            list: 生成的图片文件路径列表
+            list: 生成的图片文件路径列表（按页面选择的顺序）
         """
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"PDF文件不存在: {input_path}")
+        if tile_size is not None and (tile_size <= 0 or tile_size % 16):
+            raise ValueError(f"分块大小必须是16的正整数倍: {tile_size}")
+        
+        with fitz.open(input_path) as doc:
+            page_numbers = parse_page_selection(pages, len(doc))
+        if tile_size:
+            _encode_options(image_format, encode_options)
+            _check_render_options(image_format, colorspace, alpha)
+        else:
+            images = PdfConverter.iter_images(input_path, page_numbers, image_format, dpi, encode_options,
+                                              max_workers, cancel_event, colorspace, alpha, threshold)
         
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -72,47 +672,29 @@ class PdfConverter:
         try:
             logger.info(f"开始转换PDF到图片: {input_path}")
             
-            # 使用PyMuPDF打开PDF
-            doc = fitz.open(input_path)
-            total_pages = len(doc)
+            if tile_size:
+                output_files = PdfConverter._to_tiles(input_path, output_dir, page_numbers, image_format, dpi,
+                                                      tile_size, encode_options, progress_callback, cancel_event,
+                                                      colorspace, alpha, threshold)
+                logger.info(f"PDF分块转图片成功，共{len(output_files)}个文件")
+                return output_files
             
-            output_files = []
             base_name = os.path.splitext(os.path.basename(input_path))[0]
+            total = len(page_numbers)
             
-            # 计算缩放比例（72 DPI是PDF默认分辨率）
-            zoom = dpi / 72
-            mat = fitz.Matrix(zoom, zoom)
-            
-            for page_num in range(total_pages):
-                # 获取页面
-                page = doc[page_num]
-                
-                # 将页面渲染为图片
-                pix = page.get_pixmap(matrix=mat)
-                
-                # 生成输出文件名
-                output_filename = f"{base_name}_page_{page_num + 1}.{image_format.lower()}"
-                output_path = os.path.join(output_dir, output_filename)
-                
-                # 保存图片
-                if image_format.lower() in ['jpg', 'jpeg']:
-                    # 转换为PIL Image再保存为JPEG
-                    img_data = pix.tobytes("ppm")
-                    img = Image.open(io.BytesIO(img_data))
-                    img = img.convert('RGB')
-                    img.save(output_path, "JPEG", quality=95)
-                else:
-                    # 直接保存为PNG
-                    pix.save(output_path)
-                
-                output_files.append(output_path)
-                
-                # 更新进度
-                if progress_callback:
-                    progress = int(((page_num + 1) / total_pages) * 100)
-                    progress_callback(progress)
-            
-            doc.close()
+            output_files = []
+            with closing(images):
+                for page_no, data in images:
+                    # 生成输出文件名
+                    output_filename = f"{base_name}_page_{page_no}.{image_format.lower()}"
+                    output_path = os.path.join(output_dir, output_filename)
+                    with open(output_path, 'wb') as f:
+                        f.write(data)
+                    output_files.append(output_path)
+                    
+                    # 更新进度
+                    if progress_callback:
+                        progress_callback(int(len(output_files) / total * 100))
             
             logger.info(f"PDF转图片成功，共{len(output_files)}页")
             return output_files
@@ -120,3 +702,176 @@ class PdfConverter:
         except Exception as e:
             logger.error(f"PDF转图片失败: {e}")
             raise Exception(f"转换失败: {str(e)}")
+
+    @staticmethod
+    def _to_tiles(input_path, output_dir, page_numbers, image_format, dpi, tile_size, encode_options,
+                  progress_callback, cancel_event, colorspace='rgb', alpha=False, threshold=DEFAULT_THRESHOLD):
+        """分块渲染页面：TIFF写为分块TIFF，其他格式每块一个文件"""
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        extension = image_format.lower()
+        output_files = []
+        
+        with fitz.open(input_path) as doc:
+            rects = [_page_pixel_rect(doc[page_no - 1], dpi) for page_no in page_numbers]
+            total = sum(-(-rect.width // tile_size) * -(-rect.height // tile_size) for rect in rects)
+            done = 0
+            
+            def tile_done():
+                nonlocal done
+                done += 1
+                if progress_callback:
+                    progress_callback(int(done / total * 100))
+            
+            for page_no in page_numbers:
+                page = doc[page_no - 1]
+                if _normalize_format(image_format) == 'tiff':
+                    output_path = os.path.join(output_dir, f"{base_name}_page_{page_no}.{extension}")
+                    if not _write_tiled_tiff(page, output_path, dpi, tile_size, colorspace, alpha, threshold,
+                                             cancel_event, tile_done):
+                        break
+                    output_files.append(output_path)
+                    continue
+                
+                for row, col, pix in _iter_page_tiles(page, dpi, tile_size, colorspace, alpha):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return output_files
+                    output_path = os.path.join(output_dir,
+                                               f"{base_name}_page_{page_no}_tile_{row + 1}_{col + 1}.{extension}")
+                    with open(output_path, 'wb') as f:
+                        if colorspace == 'bilevel':
+                            f.write(_encode_image(_tile_image(pix, colorspace, threshold), image_format,
+                                                  _encode_options(image_format, encode_options, colorspace)))
+                        else:
+                            f.write(_encode_pixmap(pix, image_format, encode_options))
+                    output_files.append(output_path)
+                    tile_done()
+        return output_files
+
+    @staticmethod
+    def to_long_image(input_path, output_path, dpi=150, width=None, spacing=0, pages=None, image_format=None,
+                      colorspace='rgb', encode_options=None, max_height=None, progress_callback=None,
+                      cancel_event=None):
+        """
+        把多页PDF拼接为一张长图（适合在手机上浏览）
+        
+        所有页面缩放到相同宽度后自上而下排列。页面逐页渲染：PNG的像素行直接送入流式
+        编码器写入文件，内存中只有当前页；JPEG编码器不支持逐行写入，每段在内存中拼好
+        后编码，段高度另受 LONG_IMAGE_JPEG_SEGMENT_BYTES 限制，画布最多占用该字节数
+        （默认256MB，即 宽度 x 段高度 x 通道数 不超过该值）。总高度超过格式上限（JPEG为
+        65535像素）、max_height 或上述内存上限时分为多段输出，优先在页面之间分段，
+        文件名为 {文件名}_part_{序号}.{格式}。
+        
+        Args:
+            input_path: PDF文件路径
+            output_path: 输出图片路径
+            dpi: 分辨率，决定默认宽度（最宽页面按该DPI渲染的宽度）
+            width: 长图宽度（像素），None表示按 dpi 计算
+            spacing: 页间距（像素，白色）
+            pages: 页面选择，None表示全部；页码列表（从1开始）或字符串如 "1-5, 8, 10-12"
+            image_format: 图片格式 (png, jpg, jpeg)，None表示按输出文件扩展名判断
+            colorspace: 色彩空间 (rgb, gray)
+            encode_options: 编码参数，JPEG见 iter_images，PNG支持 {'compress_level': 0-9}
+            max_height: 每段的最大高度（像素），None表示格式上限
+            progress_callback: 进度回调函数
+            cancel_event: 可选的 threading.Event，被设置后停止并删除已生成的文件
+            
+        Returns:
+            list: 生成的图片文件路径列表（不分段时只有 output_path）
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"PDF文件不存在: {input_path}")
+        image_format = _normalize_format(image_format or os.path.splitext(output_path)[1].lstrip('.'))
+        if image_format not in LONG_IMAGE_MAX_DIMENSION:
+            raise ValueError(f"长图不支持的图片格式: {image_format}")
+        if colorspace not in ('rgb', 'gray'):
+            raise ValueError(f"长图不支持的色彩空间: {colorspace}")
+        options = _encode_options(image_format, encode_options)
+        limit = LONG_IMAGE_MAX_DIMENSION[image_format]
+        max_height = min(max_height or limit, limit)
+        
+        with fitz.open(input_path) as doc:
+            page_numbers = parse_page_selection(pages, len(doc))
+            if width is None:
+                width = max(_page_pixel_rect(doc[page_no - 1], dpi).width for page_no in page_numbers)
+            if width > limit:
+                raise ValueError(f"长图宽度 {width} 超出{image_format.upper()}格式上限 {limit}")
+            if image_format == 'jpeg':
+                channels = 1 if colorspace == 'gray' else 3
+                max_height = min(max_height, max(1, LONG_IMAGE_JPEG_SEGMENT_BYTES // (width * channels)))
+            # 每页按各自的缩放比例渲染为相同宽度
+            page_dpis = [width / doc[page_no - 1].rect.width * 72 for page_no in page_numbers]
+            heights = [_page_pixel_rect(doc[page_no - 1], page_dpi).height
+                       for page_no, page_dpi in zip(page_numbers, page_dpis)]
+        segments = _long_image_segments(heights, spacing, max_height)
+        
+        base, extension = os.path.splitext(output_path)
+        if len(segments) == 1:
+            paths = [output_path]
+        else:
+            paths = [f"{base}_part_{i}{extension}" for i in range(1, len(segments) + 1)]
+            logger.info(f"长图高度超过 {max_height} 像素，分为{len(segments)}段输出")
+        
+        try:
+            logger.info(f"开始转换PDF到长图: {input_path}")
+            
+            mode = 'L' if colorspace == 'gray' else 'RGB'
+            stride = width * len(mode)
+            rendered_index, rendered_rows = None, None
+            with fitz.open(input_path) as doc:
+                for path, segment in zip(paths, segments):
+                    segment_height = sum(y1 - y0 for _, y0, y1 in segment)
+                    with open(path, 'wb') as f:
+                        if image_format == 'png':
+                            writer = PngStreamWriter(f, width, segment_height, mode, dpi,
+                                                     options.get('compress_level', 6))
+                        else:
+                            canvas = Image.new(mode, (width, segment_height), 'white')
+                        top = 0
+                        for index, y0, y1 in segment:
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise InterruptedError
+                            if index is None:
+                                rows = b'\xff' * (stride * (y1 - y0))
+                            else:
+                                # 一页可能跨两段，渲染结果保留到该页写完
+                                if rendered_index != index:
+                                    zoom = page_dpis[index] / 72
+                                    pix = doc[page_numbers[index] - 1].get_pixmap(
+                                        matrix=fitz.Matrix(zoom, zoom), colorspace=COLORSPACES[colorspace])
+                                    rendered_index, rendered_rows = index, _fit_width(pix, width)
+                                rows = rendered_rows[y0 * stride:y1 * stride]
+                            
+                            if image_format == 'png':
+                                writer.write_rows(rows)
+                            else:
+                                strip = Image.frombuffer(mode, (width, y1 - y0), rows, 'raw', mode, 0, 1)
+                                canvas.paste(strip, (0, top))
+                            top += y1 - y0
+                            
+                            if index is not None and y1 == heights[index] and progress_callback:
+                                progress_callback(int((index + 1) / len(page_numbers) * 100))
+                        
+                        if image_format == 'png':
+                            writer.close()
+                        else:
+                            canvas.save(f, PIL_FORMATS[image_format], dpi=(dpi, dpi), **options)
+                            canvas = None
+            
+            logger.info(f"PDF转长图成功，共{len(paths)}个文件")
+            return paths
+        
+        except InterruptedError:
+            PdfConverter._remove_files(paths)
+            logger.info("PDF转长图已取消")
+            return []
+        except Exception as e:
+            PdfConverter._remove_files(paths)
+            logger.error(f"PDF转长图失败: {e}")
+            raise Exception(f"转换失败: {str(e)}")
+    
+    @staticmethod
+    def _remove_files(paths):
+        """删除未完成的输出文件"""
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
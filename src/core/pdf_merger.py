@@ -1,54 +1,521 @@
+import hashlib
+import io
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pypdf import PdfWriter, PdfReader
+from pypdf.generic import ArrayObject, ByteStringObject, DictionaryObject, IndirectObject, StreamObject
 import os
+import tempfile
+import time
+
+from src.core.streaming_pdf_writer import StreamingPdfWriter, serialize, serialize_object
 
 logger = logging.getLogger(__name__)
 
+# 流式合并时每个窗口（同时在内存中）的文件数
+STREAMING_WINDOW = 32
+
+# 这些对象在输出中必须各自独立（页面树、注释、大纲项、表单域等），不参与去重
+_UNSHAREABLE_TYPES = ('/Page', '/Pages', '/Catalog', '/Annot', '/Outlines')
+_UNSHAREABLE_KEYS = ('/Parent', '/P', '/Rect')
+
+
+class _ObjectDeduplicator:
+    """
+    合并时的跨文件对象去重
+    
+    每次 append 之后对新加入的对象计算内容哈希：流对象按字典和原始（已压缩）数据，
+    字典和数组按内容；引用其他对象的地方用被引用对象的哈希代替，因此引用相同字体
+    文件的字体字典也会被识别为重复。重复对象的引用改为指向第一次出现的副本，
+    重复对象本身从输出中删除。
+    
+    Args:
+        writer: PdfWriter
+        scope: 不参与去重的对象在哈希中以 "scope:对象号" 表示；流式合并时每个窗口使用
+               不同的 writer，需要用不同的 scope 区分各窗口的对象号
+    """
+    
+    def __init__(self, writer, scope=''):
+        self.writer = writer
+        self.scope = scope
+        self.duplicate_objects = 0
+        self.bytes_saved = 0
+        self._digests = {}     # idnum -> 内容哈希，None表示不参与去重
+        self._canonical = {}   # 内容哈希 -> 第一次出现的对象 idnum
+        self._in_progress = set()
+    
+    def process(self, start):
+        """
+        对 idnum 大于 start 的新对象去重
+        
+        Args:
+            start: append 之前 writer 中的对象数
+        """
+        objects = self.writer._objects
+        new_ids = range(start + 1, len(objects) + 1)
+        replaced = {}
+        for idnum in new_ids:
+            digest = self.digest(idnum)
+            if digest is None:
+                continue
+            canonical = self._canonical.setdefault(digest, idnum)
+            if canonical != idnum:
+                replaced[idnum] = IndirectObject(canonical, 0, self.writer)
+        if not replaced:
+            return
+        
+        for idnum in new_ids:
+            if idnum not in replaced:
+                self._replace_references(objects[idnum - 1], replaced)
+        for idnum in replaced:
+            buffer = io.BytesIO()
+            objects[idnum - 1].write_to_stream(buffer)
+            self.bytes_saved += buffer.tell()
+            objects[idnum - 1] = None
+        self.duplicate_objects += len(replaced)
+    
+    def digest(self, idnum):
+        """对象的内容哈希，None表示该对象不参与去重"""
+        if idnum in self._digests:
+            return self._digests[idnum]
+        obj = self.writer._objects[idnum - 1]
+        if obj is None or not self._shareable(obj):
+            self._digests[idnum] = None
+            return None
+        self._in_progress.add(idnum)
+        try:
+            h = hashlib.sha1(type(obj).__name__.encode())
+            h.update(self._serialize(obj))
+            if isinstance(obj, StreamObject):
+                h.update(b'stream')
+                h.update(obj._data)
+            digest = h.digest()
+        finally:
+            self._in_progress.discard(idnum)
+        self._digests[idnum] = digest
+        return digest
+    
+    @staticmethod
+    def _shareable(obj):
+        if isinstance(obj, DictionaryObject):
+            if obj.get('/Type') in _UNSHAREABLE_TYPES:
+                return False
+            return not any(key in obj for key in _UNSHAREABLE_KEYS)
+        return isinstance(obj, ArrayObject)
+    
+    def _serialize(self, obj):
+        """序列化对象内容，引用替换为被引用对象的哈希（无法去重或成环的引用保留对象号）"""
+        if isinstance(obj, IndirectObject):
+            digest = None if obj.idnum in self._in_progress else self.digest(obj.idnum)
+            return b'#' + digest.hex().encode() if digest else f'{self.scope}:{obj.idnum} R'.encode()
+        if isinstance(obj, DictionaryObject):
+            items = sorted(obj.items())
+            return b'<<' + b' '.join(key.encode() + b' ' + self._serialize(value) for key, value in items) + b'>>'
+        if isinstance(obj, ArrayObject):
+            return b'[' + b' '.join(self._serialize(value) for value in obj) + b']'
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer)
+        return buffer.getvalue()
+    
+    @classmethod
+    def _replace_references(cls, obj, replaced):
+        if isinstance(obj, DictionaryObject):
+            items = list(obj.items())
+        elif isinstance(obj, ArrayObject):
+            items = list(enumerate(obj))
+        else:
+            return
+        for key, value in items:
+            if isinstance(value, IndirectObject):
+                if value.idnum in replaced:
+                    obj[key] = replaced[value.idnum]
+            else:
+                cls._replace_references(value, replaced)
+
+
+class _StreamingMerge:
+    """
+    流式合并：输入按窗口分批追加到临时 PdfWriter，每个窗口结束后把其中的页面和页面
+    引用的对象直接写入输出文件，然后丢弃该 PdfWriter。内存中只保留每个对象的文件
+    偏移量、页面对象号和顶层书签，不保留对象内容。
+    
+    各窗口的顶层书签要互相链接 (/Prev, /Next)，因此先序列化保存，最后和目录、
+    页面树一起写入。命名目标 (/Dests) 合并为一个名称树，同名时保留先出现的。
+    """
+    
+    def __init__(self, out, catalog_id, pages_id, deduplicate=False):
+        self.out = out
+        self.catalog_id = catalog_id
+        self.pages_id = pages_id
+        self.outlines_id = None
+        self.page_ids = []
+        self.outline_items = []  # (对象号, 去掉 /Parent /Prev /Next 的序列化字典, 可见项数)
+        self.named_dests = {}    # 名称字节串 -> (序列化名称, 序列化目标)
+        self.deduplicate = deduplicate
+        self.duplicate_objects = 0
+        self.bytes_saved = 0
+        self._canonical = {}     # 内容哈希 -> 输出文件中的对象号
+        self._windows = 0
+    
+    def _outlines(self):
+        if self.outlines_id is None:
+            self.outlines_id = self.out.allocate()
+        return self.outlines_id
+    
+    def flush(self, writer):
+        """把一个窗口的 PdfWriter 中的页面、书签和命名目标写入输出文件"""
+        writer._resolve_links()
+        catalog = writer._root_object
+        outline_root = catalog.get('/Outlines')
+        special = {catalog.indirect_reference.idnum: lambda: self.catalog_id,
+                   catalog.raw_get('/Pages').idnum: lambda: self.pages_id,
+                   writer._info.indirect_reference.idnum: lambda: None}
+        top_items = []
+        if outline_root is not None:
+            special[catalog.raw_get('/Outlines').idnum] = self._outlines
+            item = outline_root.get('/First')
+            while item is not None:
+                top_items.append(item.indirect_reference.idnum)
+                item = item.get('/Next')
+        
+        deduplicator = _ObjectDeduplicator(writer, scope=self._windows) if self.deduplicate else None
+        self._windows += 1
+        remap = {}
+        queue = deque()
+        
+        def resolve(ref):
+            idnum = ref.idnum
+            if idnum in special:
+                return special[idnum]()
+            new_id = remap.get(idnum)
+            if new_id is not None:
+                return new_id
+            digest = deduplicator.digest(idnum) if deduplicator is not None else None
+            if digest is not None and digest in self._canonical:
+                new_id = remap[idnum] = self._canonical[digest]
+                # 先序列化再累加：序列化时子对象的节省量也会累加到 bytes_saved
+                size = len(serialize_object(writer._objects[idnum - 1], resolve))
+                self.duplicate_objects += 1
+                self.bytes_saved += size
+                return new_id
+            new_id = remap[idnum] = self.out.allocate()
+            if digest is not None:
+                self._canonical[digest] = new_id
+            queue.append(idnum)
+            return new_id
+        
+        for page in writer.pages:
+            self.page_ids.append(resolve(page.indirect_reference))
+        for idnum in top_items:
+            resolve(IndirectObject(idnum, 0, writer))
+        names = catalog.get('/Names')
+        if names is not None and '/Dests' in names:
+            for name, dest in _iter_name_tree(names['/Dests']):
+                key = name if isinstance(name, bytes) else name.original_bytes
+                if key not in self.named_dests:
+                    self.named_dests[key] = (serialize(name, resolve), serialize(dest, resolve))
+        
+        deferred = {}
+        while queue:
+            idnum = queue.popleft()
+            obj = writer._objects[idnum - 1]
+            if idnum in top_items:
+                body = DictionaryObject({key: value for key, value in obj.items()
+                                         if key not in ('/Parent', '/Prev', '/Next')})
+                deferred[idnum] = (remap[idnum], serialize(body, resolve), 1 + max(int(obj.get('/Count', 0)), 0))
+            else:
+                self.out.write_object(remap[idnum], obj, resolve)
+        self.outline_items.extend(deferred[idnum] for idnum in top_items)
+    
+    def _write_outline_items(self, prev_id=None):
+        """写入保存的顶层书签，prev_id 为第一个书签之前的书签（增量追加时为原有的最后一个书签）"""
+        outlines_id = self._outlines()
+        for i, (idnum, body, _) in enumerate(self.outline_items):
+            links = b' /Parent %d 0 R' % outlines_id
+            previous = self.outline_items[i - 1][0] if i > 0 else prev_id
+            if previous:
+                links += b' /Prev %d 0 R' % previous
+            if i + 1 < len(self.outline_items):
+                links += b' /Next %d 0 R' % self.outline_items[i + 1][0]
+            self.out.write_raw(idnum, body[:-2] + links + b'>>')
+    
+    @staticmethod
+    def _dests_tree(named_dests):
+        """命名目标写为只有一个叶节点的名称树（名称按字节序排列）"""
+        pairs = b' '.join(name + b' ' + dest for name, dest in (named_dests[key] for key in sorted(named_dests)))
+        return b'<</Names [%s]>>' % pairs
+    
+    def close(self):
+        """写入页面树、书签根、目录和文件尾"""
+        kids = b' '.join(b'%d 0 R' % idnum for idnum in self.page_ids)
+        self.out.write_raw(self.pages_id, b'<</Type /Pages /Kids [%s] /Count %d>>' % (kids, len(self.page_ids)))
+        
+        catalog = b'/Type /Catalog /Pages %d 0 R' % self.pages_id
+        if self.outline_items or self.outlines_id is not None:
+            self._write_outline_items()
+            root = b'/Type /Outlines /Count %d' % sum(count for _, _, count in self.outline_items)
+            if self.outline_items:
+                root += b' /First %d 0 R /Last %d 0 R' % (self.outline_items[0][0], self.outline_items[-1][0])
+            self.out.write_raw(self.outlines_id, b'<<' + root + b'>>')
+            catalog += b' /Outlines %d 0 R' % self.outlines_id
+        if self.named_dests:
+            catalog += b' /Names <</Dests %s>>' % self._dests_tree(self.named_dests)
+        self.out.write_raw(self.catalog_id, b'<<' + catalog + b'>>')
+        # 与普通合并 (PdfWriter) 写入相同的文档信息
+        info_id = self.out.allocate()
+        self.out.write_raw(info_id, b'<</Producer (pypdf)>>')
+        self.out.close(self.catalog_id, info_id)
+
+
+class _IncrementalAppend(_StreamingMerge):
+    """
+    增量追加：新输入的页面、书签和命名目标以PDF增量更新的形式写在已有文件末尾。
+    
+    原文件中只重写页面树根（追加 /Kids）、书签根、原来的最后一个顶层书签（追加 /Next），
+    以及需要时的目录，其他对象保持不动，写入量只与新增内容有关。
+    
+    Args:
+        fileobj: 以追加方式打开的原文件
+        reader: 读取原文件的 PdfReader（使用另一个文件句柄）
+    """
+    
+    def __init__(self, fileobj, reader, deduplicate=False):
+        trailer = reader.trailer
+        catalog = trailer['/Root']
+        reader.stream.seek(reader._startxref)
+        out = StreamingPdfWriter(fileobj, first_id=int(trailer['/Size']), prev_xref=reader._startxref,
+                                 xref_stream=reader.stream.read(4) != b'xref')
+        super().__init__(out, trailer.raw_get('/Root').idnum, catalog.raw_get('/Pages').idnum, deduplicate)
+        self.reader = reader
+        if '/Outlines' in catalog:
+            self.outlines_id = catalog.raw_get('/Outlines').idnum
+    
+    def close(self):
+        """重写页面树根、书签和目录，写入增量交叉引用表"""
+        def keep(ref):
+            return ref.idnum
+        
+        trailer = self.reader.trailer
+        catalog = trailer['/Root']
+        pages = catalog['/Pages']
+        kids = b' '.join([serialize(kid, keep) for kid in pages['/Kids']] +
+                         [b'%d 0 R' % idnum for idnum in self.page_ids])
+        body = serialize(DictionaryObject({key: value for key, value in pages.items()
+                                           if key not in ('/Kids', '/Count')}), keep)
+        self.out.write_raw(self.pages_id, body[:-2] + b' /Kids [%s] /Count %d>>' % (
+            kids, int(pages['/Count']) + len(self.page_ids)))
+        
+        catalog_updates = {}
+        if self.outline_items:
+            old_root = catalog.get('/Outlines')
+            old_last = old_root.raw_get('/Last') if old_root is not None and '/Last' in old_root else None
+            if old_root is None:
+                catalog_updates['/Outlines'] = b'%d 0 R' % self._outlines()
+            self._write_outline_items(old_last.idnum if old_last is not None else None)
+            if old_last is not None:
+                item = old_last.get_object()
+                body = serialize(DictionaryObject({key: value for key, value in item.items() if key != '/Next'}), keep)
+                self.out.write_raw(old_last.idnum, body[:-2] + b' /Next %d 0 R>>' % self.outline_items[0][0])
+            root = DictionaryObject({key: value for key, value in (old_root or {}).items()
+                                     if key not in ('/First', '/Last', '/Count')})
+            first = (serialize(old_root.raw_get('/First'), keep) if old_last is not None
+                     else b'%d 0 R' % self.outline_items[0][0])
+            count = abs(int(old_root.get('/Count', 0))) if old_root is not None else 0
+            count += sum(count for _, _, count in self.outline_items)
+            self.out.write_raw(self.outlines_id, serialize(root, keep)[:-2] + b' /First %s /Last %d 0 R /Count %d>>' % (
+                first, self.outline_items[-1][0], count))
+        
+        if self.named_dests:
+            names = catalog.get('/Names')
+            named_dests = {}
+            if names is not None and '/Dests' in names:
+                for name, dest in _iter_name_tree(names['/Dests']):
+                    key = name if isinstance(name, bytes) else name.original_bytes
+                    named_dests.setdefault(key, (serialize(name, keep), serialize(dest, keep)))
+            for key, value in self.named_dests.items():
+                named_dests.setdefault(key, value)
+            other = serialize(DictionaryObject({key: value for key, value in (names or {}).items()
+                                                if key != '/Dests'}), keep)
+            catalog_updates['/Names'] = other[:-2] + b' /Dests ' + self._dests_tree(named_dests) + b'>>'
+        
+        if catalog_updates:
+            body = serialize(DictionaryObject({key: value for key, value in catalog.items()
+                                               if key not in catalog_updates}), keep)
+            updates = b''.join(b' ' + key.encode() + b' ' + value for key, value in catalog_updates.items())
+            self.out.write_raw(self.catalog_id, body[:-2] + updates + b'>>')
+        
+        # 文件标识：第一个元素保持不变，第二个元素在每次更新时重新生成
+        file_id = trailer.get('/ID')
+        if file_id is not None:
+            old = file_id[1] if isinstance(file_id[1], bytes) else file_id[1].original_bytes
+            digest = hashlib.md5(old + b'%d %f' % (self.out.bytes_written, time.time())).digest()
+            file_id = ArrayObject([file_id[0], ByteStringObject(digest)])
+        info = trailer.raw_get('/Info') if '/Info' in trailer else None
+        self.out.close(self.catalog_id, info.idnum if info is not None else None, file_id)
+
+
+def _iter_name_tree(node):
+    """按顺序生成名称树中的 (名称, 值)"""
+    node = node.get_object()
+    names = node.get('/Names', [])
+    for i in range(0, len(names) - 1, 2):
+        yield names[i], names[i + 1]
+    for kid in node.get('/Kids', []):
+        yield from _iter_name_tree(kid)
+
+
+def _split_item(item):
+    """pdf_items 中的一项拆分为 (路径, 书签标题)"""
+    if isinstance(item, tuple):
+        return item
+    return item, None
+
+
+def _raise_failures(failed_files):
+    if failed_files:
+        error_msg = "以下文件处理失败:\n"
+        for filename, error in failed_files:
+            error_msg += f"- {filename}: {error}\n"
+        raise Exception(error_msg.strip())
+
+
+def _outline_titles(outline, level=1):
+    """把 PdfReader.outline 展开为 [(层级, 标题), ...]"""
+    titles = []
+    for entry in outline:
+        if isinstance(entry, list):
+            titles.extend(_outline_titles(entry, level + 1))
+        else:
+            titles.append((level, entry.title))
+    return titles
+
+
+def _scan_input(item):
+    """读取一个输入文件的页数、加密状态、书签标题和是否有表单（不复制页面）"""
+    path, title = _split_item(item)
+    entry = {'path': path, 'title': title, 'pages': 0, 'encrypted': False, 'outline': [], 'form': False,
+             'error': None}
+    if not os.path.exists(path):
+        entry['error'] = "文件不存在"
+        return entry
+    try:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            entry['encrypted'] = True
+            if reader.decrypt('') == 0:
+                entry['error'] = "文件受密码保护"
+                return entry
+        entry['pages'] = len(reader.pages)
+        entry['outline'] = _outline_titles(reader.outline)
+        acro_form = reader.root_object.get('/AcroForm')
+        entry['form'] = bool(acro_form is not None and acro_form.get_object().get('/Fields'))
+    except Exception as e:
+        entry['error'] = str(e)
+    return entry
+
+
+def _open_input(entry):
+    reader = PdfReader(entry['path'])
+    if entry['encrypted']:
+        reader.decrypt('')
+    return reader
+
+
+def _scan_and_validate(pdf_items, scan_workers, progress_callback):
+    """预扫描所有输入（占进度的前10%），有无法合并的文件时直接报错"""
+    plan = PdfMerger.scan(pdf_items, scan_workers,
+                          lambda value: progress_callback(value // 10) if progress_callback else None)
+    _raise_failures([(entry['path'] if entry['error'] == "文件不存在" else os.path.basename(entry['path']),
+                      entry['error']) for entry in plan if entry['error']])
+    return plan
+
 
 class PdfMerger:
     @staticmethod
-    def merge(pdf_items, output_path, progress_callback=None):
+    def scan(pdf_items, max_workers=None, progress_callback=None):
+        """
+        并行读取所有输入文件的元数据，计算每个文件在合并结果中的起始页
+        
+        Args:
+            pdf_items: 同 merge
+            max_workers: 线程数，None表示 min(32, CPU核数 + 4)
+            progress_callback: 进度回调函数
+        
+        Returns:
+            list: 每个输入一个字典，顺序与 pdf_items 相同：
+                  path, title, pages (页数), encrypted (是否加密，空密码可打开),
+                  outline ([(层级, 标题), ...]), start_page (合并后的起始页，从0开始),
+                  error (无法合并的原因，None表示正常)
+        """
+        total_items = len(pdf_items)
+        plan = []
+        start_page = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for entry in executor.map(_scan_input, pdf_items):
+                entry['start_page'] = start_page
+                start_page += entry['pages']
+                plan.append(entry)
+                if progress_callback and total_items > 0:
+                    progress_callback(int(len(plan) / total_items * 100))
+        return plan
+    
+    @staticmethod
+    def merge(pdf_items, output_path, progress_callback=None, deduplicate=False, stats=None, streaming=False,
+              window_size=STREAMING_WINDOW, scan_workers=None):
         """
         Merge multiple PDFs into one.
         pdf_items: list of tuples (path, title) or just list of paths.
                    If title is provided, a bookmark will be created at the start of that file.
+        deduplicate: 合并各文件中内容相同的对象（同一模板生成的字体、图片、ICC配置等只保留一份）
+        stats: 可选字典，去重时写入 duplicate_objects（删除的对象数）和 bytes_saved（节省的字节数）
+        streaming: 流式合并，每 window_size 个文件写入一次输出文件，内存占用与文件数无关
+                   （适合成千上万个输入文件）；流式合并不能合并表单 (AcroForm)，
+                   有输入文件包含表单时记录警告并改用普通合并
+        window_size: 流式合并时每个窗口的文件数
+        scan_workers: 预扫描的线程数（见 scan）
+        
+        写入前先用 scan 并行检查所有输入，有文件不存在、损坏或需要密码时直接报错，
+        不生成输出文件。
         """
+        plan = _scan_and_validate(pdf_items, scan_workers, progress_callback)
+        
+        if streaming and any(entry['form'] for entry in plan):
+            logger.warning("输入文件包含表单 (AcroForm)，流式合并不能保留表单，改用普通合并")
+            streaming = False
+        if streaming:
+            return PdfMerger._merge_streaming(plan, output_path, progress_callback, deduplicate, stats,
+                                              window_size)
+        
         merger = PdfWriter()
+        deduplicator = _ObjectDeduplicator(merger) if deduplicate else None
         
-        current_page = 0
-        total_items = len(pdf_items)
+        total_items = len(plan)
         failed_files = []
+        # 写入时失败的文件少了的页数，之后的书签页码要相应前移
+        skipped_pages = 0
 
-        for i, item in enumerate(pdf_items):
-            if isinstance(item, tuple):
-                path, title = item
-            else:
-                path = item
-                title = None
-
-            if not os.path.exists(path):
-                logger.warning(f"文件不存在，已跳过: {path}")
-                failed_files.append((path, "文件不存在"))
-                continue
-            
+        for i, entry in enumerate(plan):
+            path = entry['path']
+            pages_before = len(merger.pages)
             try:
-                reader = PdfReader(path)
-                num_pages = len(reader.pages)
+                reader = _open_input(entry)
+                start = len(merger._objects)
                 merger.append(reader)
+                if deduplicator is not None:
+                    deduplicator.process(start)
                 
-                if title:
-                    merger.add_outline_item(title, current_page)
-                
-                current_page += num_pages
-                
-                if progress_callback and total_items > 0:
-                    progress = int(((i + 1) / total_items) * 90)
-                    progress_callback(progress)
+                if entry['title']:
+                    merger.add_outline_item(entry['title'], entry['start_page'] - skipped_pages)
                 
             except Exception as e:
                 logger.error(f"添加文件失败 {path}: {e}")
                 failed_files.append((os.path.basename(path), str(e)))
-                continue
+                skipped_pages += entry['pages'] - (len(merger.pages) - pages_before)
+            
+            if progress_callback and total_items > 0:
+                progress = 10 + int(((i + 1) / total_items) * 80)
+                progress_callback(progress)
 
         with open(output_path, "wb") as f:
             merger.write(f)
@@ -58,11 +525,124 @@ class PdfMerger:
         
         merger.close()
         
+        if deduplicator is not None:
+            logger.info(f"合并去重: 删除{deduplicator.duplicate_objects}个重复对象，"
+                        f"节省{deduplicator.bytes_saved}字节")
+            if stats is not None:
+                stats['duplicate_objects'] = deduplicator.duplicate_objects
+                stats['bytes_saved'] = deduplicator.bytes_saved
+        
         # 如果有失败的文件，抛出异常告知用户
-        if failed_files:
-            error_msg = "以下文件处理失败:\n"
-            for filename, error in failed_files:
-                error_msg += f"- {filename}: {error}\n"
-            raise Exception(error_msg.strip())
+        _raise_failures(failed_files)
         
         return True
+
+    @staticmethod
+    def append_to(output_path, pdf_items, progress_callback=None, deduplicate=False, stats=None,
+                  window_size=STREAMING_WINDOW, scan_workers=None):
+        """
+        把新的PDF追加到已有的合并文件末尾（PDF增量更新）
+        
+        原文件内容不重写，新页面、书签和命名目标连同少量需要修改的对象（页面树根、
+        书签根等）写在文件末尾，耗时只与新增内容的大小有关。参数同 merge；
+        deduplicate 只在新增的文件之间去重。写入失败时文件恢复为原来的大小。
+        """
+        if not os.path.exists(output_path):
+            raise FileNotFoundError(f"PDF文件不存在: {output_path}")
+        plan = _scan_and_validate(pdf_items, scan_workers, progress_callback)
+        forms = [os.path.basename(entry['path']) for entry in plan if entry['form']]
+        if forms:
+            logger.warning(f"增量追加不能保留表单 (AcroForm)，以下文件的表单不会追加: {', '.join(forms)}")
+        
+        original_size = os.path.getsize(output_path)
+        try:
+            with open(output_path, "rb") as source, open(output_path, "ab") as f:
+                reader = PdfReader(source)
+                if reader.is_encrypted:
+                    raise ValueError("不支持向加密的PDF追加内容")
+                existing_pages = len(reader.pages)
+                appender = _IncrementalAppend(f, reader, deduplicate)
+                failed_files = PdfMerger._stream_inputs(appender, plan, progress_callback, stats, window_size)
+        except Exception:
+            os.truncate(output_path, original_size)
+            raise
+        
+        logger.info(f"增量追加完成: 原有{existing_pages}页，新增{len(appender.page_ids)}页，"
+                    f"写入{os.path.getsize(output_path) - original_size}字节")
+        _raise_failures(failed_files)
+        
+        return True
+    
+    @staticmethod
+    def _merge_streaming(plan, output_path, progress_callback, deduplicate, stats, window_size):
+        """流式合并，plan 为 scan 的结果，其他参数同 merge"""
+        # 先写入同目录临时文件，成功后再替换目标文件（失败时不留下不完整的文件，也不覆盖已有文件）
+        fd, temp_output = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                out = StreamingPdfWriter(f)
+                streaming_merge = _StreamingMerge(out, out.allocate(), out.allocate(), deduplicate)
+                failed_files = PdfMerger._stream_inputs(streaming_merge, plan, progress_callback, stats,
+                                                        window_size)
+            os.replace(temp_output, output_path)
+        except BaseException:
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+            raise
+        
+        logger.info(f"流式合并完成: {len(streaming_merge.page_ids)}页")
+        _raise_failures(failed_files)
+        
+        return True
+    
+    @staticmethod
+    def _stream_inputs(streaming_merge, plan, progress_callback, stats, window_size):
+        """按窗口把 plan 中的文件写入 streaming_merge 并结束写入，返回写入失败的文件"""
+        total_items = len(plan)
+        failed_files = []
+        skipped_pages = 0
+        window = PdfWriter()
+        window_files = 0
+        
+        for i, entry in enumerate(plan):
+            path = entry['path']
+            pages_before = len(window.pages)
+            try:
+                reader = _open_input(entry)
+                window.append(reader)
+                if entry['title']:
+                    # 窗口内的页码 = 合并后的页码 - 之前窗口已写入的页数
+                    window.add_outline_item(entry['title'], entry['start_page'] - skipped_pages -
+                                            len(streaming_merge.page_ids))
+                window_files += 1
+            except Exception as e:
+                logger.error(f"添加文件失败 {path}: {e}")
+                failed_files.append((os.path.basename(path), str(e)))
+                skipped_pages += entry['pages'] - (len(window.pages) - pages_before)
+            
+            if window_files >= window_size:
+                streaming_merge.flush(window)
+                window.close()
+                window = PdfWriter()
+                window_files = 0
+                
+            if progress_callback and total_items > 0:
+                progress_callback(10 + int(((i + 1) / total_items) * 80))
+                
+        if window_files:
+            streaming_merge.flush(window)
+        window.close()
+        streaming_merge.close()
+        
+        if progress_callback:
+            progress_callback(100)
+        
+        if streaming_merge.deduplicate:
+            logger.info(f"合并去重: 删除{streaming_merge.duplicate_objects}个重复对象，"
+                        f"节省{streaming_merge.bytes_saved}字节")
+            if stats is not None:
+                stats['duplicate_objects'] = streaming_merge.duplicate_objects
+                stats['bytes_saved'] = streaming_merge.bytes_saved
+        
+        return failed_files
+        
\ No newline at end of file
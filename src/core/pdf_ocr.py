@@ -5,12 +5,15 @@ import os
 import logging
 import fitz  # PyMuPDF
 import easyocr
-from PIL import Image
-import io
 import numpy as np
 
+from src.core.raster_cache import get_raster_cache
+
 logger = logging.getLogger(__name__)
 
+# OCR渲染分辨率（150 DPI足够OCR使用）
+OCR_DPI = 150
+
 
 class PdfOCR:
     """PDF OCR识别器 - 提取扫描版PDF文字"""
@@ -103,17 +106,11 @@ class PdfOCR:
         Returns:
             str: 识别的文字
         """
-        # 将页面渲染为图片（150 DPI足够OCR使用）
-        zoom = 150 / 72  # 150 DPI
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        
-        # 转换为PIL Image
-        img_data = pix.tobytes("ppm")
-        img = Image.open(io.BytesIO(img_data))
+        # 将页面渲染为图片（通过共用的光栅缓存，重复识别同一文件时不再重新渲染）
+        raster = get_raster_cache().render(page, OCR_DPI)
         
-        # 转换为numpy数组
-        img_array = np.array(img)
+        # 直接在像素数据上创建numpy数组，不经过PPM编码
+        img_array = np.frombuffer(raster.samples, dtype=np.uint8).reshape(raster.height, raster.width, raster.n)
         
         # 使用EasyOCR识别
         results = reader.readtext(img_array)
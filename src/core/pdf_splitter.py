@@ -1,68 +1,117 @@
 import os
 import logging
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pypdf import PdfReader, PdfWriter
 from typing import List, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+
+class _OutlineIndex:
+    """
+    大纲区间索引：大纲树只解析一次，按页码排序，用二分查找取出页码区间内的大纲项，
+    每个输出文件只处理自己范围内的大纲项
+    
+    Args:
+        entries: _get_outline_entries 的结果（文档顺序，parent为父项下标）
+    """
+    
+    def __init__(self, entries):
+        # 按页码、层级排序（稳定排序，同页同级保持文档顺序），父项下标换算为排序后的位置
+        order = sorted(range(len(entries)), key=lambda k: (entries[k][1], entries[k][2]))
+        position = {k: i for i, k in enumerate(order)}
+        self.entries = []
+        for k in order:
+            title, page_num, level, parent = entries[k]
+            self.entries.append((title, page_num, level, position[parent] if parent is not None else None))
+        self._pages = [entry[1] for entry in self.entries]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def query(self, start_page, end_page):
+        """返回页码在 [start_page, end_page) 内的大纲项下标（按页码排序）"""
+        return range(bisect_left(self._pages, start_page), bisect_left(self._pages, end_page))
+
+
+# 并行拆分时每个任务最多处理的页数
+SPLIT_CHUNK_PAGES = 32
+
+# 每个拆分进程中打开的PDF和大纲索引（由进程池初始化函数设置）
+_worker_reader = None
+_worker_outline_index = None
+
+
+def _init_split_worker(input_path, outline_index):
+    """进程池初始化：每个工作进程只打开一次源PDF（按需读取，不把整个文件读入内存）"""
+    global _worker_reader, _worker_outline_index
+    _worker_reader = PdfReader(open(input_path, "rb"))
+    _worker_outline_index = outline_index
+
+
+def _write_single_pages(page_indexes, output_dir, base_name, reader=None, outline_index=None):
+    """
+    "single" 模式：把指定页面各自写为一个文件
+    
+    Args:
+        page_indexes: 页面索引列表（从0开始）
+        reader: 源PDF，None表示使用工作进程中打开的PDF
+        outline_index: 大纲索引 (_OutlineIndex)
+    
+    Returns:
+        int: 写入的文件数
+    """
+    if reader is None:
+        reader, outline_index = _worker_reader, _worker_outline_index
+    for i in page_indexes:
+        writer = PdfWriter()
+        writer.add_page(reader.pages[i])
+        
+        # 添加大纲
+        PdfSplitter._add_outlines(writer, outline_index, i, i+1)
+        
+        # 保存文件
+        output_filename = f"[{i+1}]{base_name}.pdf"
+        output_path = os.path.join(output_dir, output_filename)
+        with open(output_path, "wb") as f:
+            writer.write(f)
+    return len(page_indexes)
+
+
 class PdfSplitter:
     @staticmethod
-    def _process_outline_item(item, outlines, parent_level=0):
+    def _get_outline_entries(reader) -> List[Tuple[str, int, int, Optional[int]]]:
         """
-        递归处理大纲项，支持嵌套结构和合并生成的大纲
-        返回格式: [(title, page_number, level), ...] (page_number为0-based)
+        按文档顺序遍历大纲树（只遍历一次）
+        返回格式: [(title, page_number, level, parent), ...]
+        (page_number为0-based, level为大纲层级, parent为父大纲项在列表中的下标，顶级为None)
+        没有目标页的大纲项被跳过，其子项挂到它的父项下
         """
-        if isinstance(item, tuple):
-            if len(item) == 2:
-                # 标准大纲项格式: (title, destination)
-                title, destination = item
-                page_num = None
-                
-                # 处理不同类型的目的地
-                if hasattr(destination, 'page_number'):
-                    # 直接是页面目标
-                    page_num = destination.page_number  # 0-based
-                elif isinstance(destination, list) and destination:
-                    # 目的地是列表，尝试获取第一个元素的页码
-                    first_dest = destination[0]
-                    if hasattr(first_dest, 'page_number'):
-                        page_num = first_dest.page_number
-                elif isinstance(destination, int):
-                    # 直接是页码（某些特殊情况）
-                    page_num = destination
+        entries = []
+                
+        def walk(items, level, parent):
+            last = parent
+            for item in items:
+                if isinstance(item, list):
+                    # 列表是前一个大纲项的子项
+                    walk(item, level + 1, last)
+                    continue
+                try:
+                    page_num = reader.get_destination_page_number(item)
+                except Exception:
+                    page_num = None
+                if page_num is None or page_num < 0:
+                    last = parent
+                    continue
+                entries.append((str(item.title or ''), page_num, level, parent))
+                last = len(entries) - 1
                 
-                if page_num is not None:
-                    outlines.append((title, page_num, parent_level))
-            elif len(item) == 3:
-                # 嵌套大纲项格式: (title, [(destination_type, ..., page_num), ...], ...)
-                title, destination_list, _ = item
-                if destination_list and isinstance(destination_list, list):
-                    # 提取页码信息
-                    for dest in destination_list:
-                        if isinstance(dest, (list, tuple)) and len(dest) > 0:
-                            # 查找页码元素
-                            for elem in dest:
-                                if isinstance(elem, int):
-                                    page_num = elem
-                                    outlines.append((title, page_num, parent_level))
-                                    break
-                                elif hasattr(elem, 'page_number'):
-                                    page_num = elem.page_number
-                                    outlines.append((title, page_num, parent_level))
-                                    break
-                            if page_num is not None:
-                                break
-        elif isinstance(item, list):
-            # 嵌套大纲列表，递归处理每个子项
-            for subitem in item:
-                PdfSplitter._process_outline_item(subitem, outlines, parent_level)
-        elif hasattr(item, '__iter__') and not isinstance(item, (str, bytes)):
-            # 其他可迭代对象，尝试递归处理
-            for subitem in item:
-                PdfSplitter._process_outline_item(subitem, outlines, parent_level)
-        elif hasattr(item, 'title') and hasattr(item, 'page_number'):
-            # 直接是大纲项对象
-            outlines.append((item.title, item.page_number, parent_level))
+        try:
+            walk(reader.outline, 0, None)
+        except Exception as e:
+            logger.error(f"获取大纲时出错: {e}")
+        return entries
     
     @staticmethod
     def _get_outlines(reader) -> List[Tuple[str, int, int]]:
@@ -71,90 +120,26 @@ class PdfSplitter:
         适配PdfMerger.merge方法添加的书签
         返回格式: [(title, page_number, level), ...] (page_number为0-based, level为大纲层级)
         """
-        outlines = []
-        
-        # 尝试使用不同的方法获取大纲
-        try:
-            # 方法1：直接访问reader.outline
-            if hasattr(reader, 'outline') and reader.outline:
-                # 遍历所有顶级大纲项，递归处理
-                for item in reader.outline:
-                    PdfSplitter._process_outline_item(item, outlines)
-        except Exception as e:
-            logger.error(f"获取大纲时出错: {e}")
-        
-        # 如果方法1失败，尝试方法2：直接访问reader._get_outlines()
-        if not outlines:
-            try:
-                if hasattr(reader, '_get_outlines'):
-                    raw_outlines = reader._get_outlines()
-                    for outline in raw_outlines:
-                        PdfSplitter._process_outline_item(outline, outlines)
-            except Exception as e:
-                logger.error(f"使用_get_outlines获取大纲时出错: {e}")
-        
-        # 如果方法2失败，尝试方法3：直接访问reader._outlines
-        if not outlines:
-            try:
-                if hasattr(reader, '_outlines') and reader._outlines:
-                    for outline in reader._outlines:
-                        PdfSplitter._process_outline_item(outline, outlines)
-            except Exception as e:
-                logger.error(f"访问_outlines获取大纲时出错: {e}")
-        
-        return outlines
+        return [(title, page_num, level) for title, page_num, level, _ in PdfSplitter._get_outline_entries(reader)]
     
     @staticmethod
-    def _add_outlines(writer, outlines, start_page, end_page):
+    def _add_outlines(writer, outline_index, start_page, end_page):
         """
         向PDF写入器添加大纲，支持嵌套结构
-        只添加指定页码范围内的大纲项
-        兼容合并生成的大纲格式
+        只添加指定页码范围内的大纲项（通过 _OutlineIndex 的区间查询，不扫描其他大纲项）
+        父大纲项不在范围内时，挂到范围内最近的祖先下，没有则作为顶级大纲项
         """
-        if not outlines:
-            return
-        
-        # 按页码和层级排序大纲项
-        sorted_outlines = sorted(outlines, key=lambda x: (x[1], x[2]))
-        
-        # 创建大纲字典，用于记录不同层级的父大纲
-        outline_parents = {0: None}  # 初始层级为0，父大纲为None
-        
-        # 跟踪上一个大纲项的层级，用于处理嵌套关系
-        last_level = 0
-        
-        for title, page_num, level in sorted_outlines:
-            if start_page <= page_num < end_page:
-                # 计算相对页码
-                relative_page = page_num - start_page
-                
-                # 确保层级的连续性，处理可能的层级跳跃
-                if level > last_level + 1:
-                    # 如果当前层级比上一个层级大2或更多，调整为上一个层级+1
-                    level = last_level + 1
-                
-                # 确保父大纲存在，如果不存在则使用更高级别的父大纲
-                while level - 1 not in outline_parents and level > 0:
-                    level -= 1
-                
-                parent = outline_parents[level - 1] if level > 0 else None
-                
-                # 添加大纲项
-                outline_item = writer.add_outline_item(title, relative_page, parent=parent)
-                
-                # 更新当前层级的父大纲
-                outline_parents[level] = outline_item
-                
-                # 清除更高层级的父大纲引用（因为可能是新的分支）
-                for l in list(outline_parents.keys()):
-                    if l > level:
-                        del outline_parents[l]
-                
-                # 更新上一个大纲项的层级
-                last_level = level
+        added = {}  # 大纲项下标 -> 写入器中的大纲项
+        for index in outline_index.query(start_page, end_page):
+            title, page_num, _, parent = outline_index.entries[index]
+            while parent is not None and parent not in added:
+                parent = outline_index.entries[parent][3]
+            added[index] = writer.add_outline_item(title, page_num - start_page,
+                                                   parent=added[parent] if parent is not None else None)
     
     @staticmethod
-    def split(input_path, output_dir, split_mode="single", page_ranges=None, average_parts=None, progress_callback=None):
+    def split(input_path, output_dir, split_mode="single", page_ranges=None, average_parts=None, progress_callback=None,
+              max_workers=None):
         """
         Split PDF file.
         split_mode: 
@@ -164,6 +149,7 @@ class PdfSplitter:
             - "outline" (split by outline items, each outline item as a separate file)
         page_ranges: string like "1-5, 8, 10-12" (1-based index)
         average_parts: number of parts to split into (for "average" mode)
+        max_workers: "single" 模式的进程数，None表示CPU核数，1表示在当前进程中拆分
         """
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Input file not found: {input_path}")
@@ -174,26 +160,25 @@ class PdfSplitter:
         total_pages = len(reader.pages)
 
         # 提取原始PDF的大纲信息，适配PdfMerger.merge方法添加的书签
-        original_outlines = PdfSplitter._get_outlines(reader)
+        # 大纲树只解析一次，各输出文件通过区间索引取自己范围内的大纲项
+        outline_entries = PdfSplitter._get_outline_entries(reader)
+        original_outlines = [(title, page_num, level) for title, page_num, level, _ in outline_entries]
+        outline_index = _OutlineIndex(outline_entries)
 
         if split_mode == "single":
-            for i in range(total_pages):
-                writer = PdfWriter()
-                writer.add_page(reader.pages[i])
-                
-                # 添加大纲
-                PdfSplitter._add_outlines(writer, original_outlines, i, i+1)
-                
-                # 保存文件
-                output_filename = f"[{i+1}]{base_name}.pdf"
-                output_path = os.path.join(output_dir, output_filename)
-                with open(output_path, "wb") as f:
-                    writer.write(f)
-                
-                # 更新进度
-                if progress_callback:
-                    progress = int(((i + 1) / total_pages) * 100)
-                    progress_callback(progress)
+            if max_workers is None:
+                max_workers = os.cpu_count() or 1
+            if max_workers > 1 and total_pages > SPLIT_CHUNK_PAGES:
+                PdfSplitter._split_single_parallel(input_path, output_dir, base_name, total_pages,
+                                                   outline_index, max_workers, progress_callback)
+            else:
+                for i in range(total_pages):
+                    _write_single_pages([i], output_dir, base_name, reader, outline_index)
+                
+                    # 更新进度
+                    if progress_callback:
+                        progress = int(((i + 1) / total_pages) * 100)
+                        progress_callback(progress)
                     
         elif split_mode == "range" and page_ranges:
             # 解析页码范围
@@ -237,7 +222,7 @@ class PdfSplitter:
                         writer.add_page(reader.pages[i])
                 
                 # 添加大纲
-                PdfSplitter._add_outlines(writer, original_outlines, start_idx, end_idx)
+                PdfSplitter._add_outlines(writer, outline_index, start_idx, end_idx)
                 
                 # 保存文件
                 output_filename = f"[{part}]{base_name}.pdf"
@@ -279,7 +264,7 @@ class PdfSplitter:
                     writer.add_page(reader.pages[i])
                 
                 # 添加大纲
-                PdfSplitter._add_outlines(writer, original_outlines, start_page, end_page)
+                PdfSplitter._add_outlines(writer, outline_index, start_page, end_page)
                 
                 # 生成文件名
                 range_str = f"{start_page+1}-{end_page}"
@@ -303,15 +288,20 @@ class PdfSplitter:
             if not original_outlines:
                 raise ValueError("No outlines found in the PDF file")
             
-            # 按页码排序大纲项
-            sorted_outlines = sorted(original_outlines, key=lambda x: x[1])
-            total_outlines = len(sorted_outlines)
+            # 只按顶级大纲项拆分（子项随所在章节输出），同一页上的多个顶级大纲项只取第一个，
+            # 保证每个输出文件至少有一页
+            top_level = min(level for _, _, level in original_outlines)
+            chapters = []
+            for title, page_num, level in sorted(original_outlines, key=lambda x: x[1]):
+                if level == top_level and (not chapters or chapters[-1][1] != page_num):
+                    chapters.append((title, page_num))
+            total_outlines = len(chapters)
             
-            for i, (title, start_page, _) in enumerate(sorted_outlines):
+            for i, (title, start_page) in enumerate(chapters):
                 # 确定当前大纲项的结束页码
                 if i < total_outlines - 1:
-                    # 下一个大纲项的起始页码作为当前大纲项的结束页码
-                    end_page = sorted_outlines[i + 1][1]
+                    # 下一个顶级大纲项的起始页码作为当前大纲项的结束页码
+                    end_page = chapters[i + 1][1]
                 else:
                     # 最后一个大纲项，结束页码为总页数
                     end_page = total_pages
@@ -323,7 +313,7 @@ class PdfSplitter:
                     writer.add_page(reader.pages[j])
                 
                 # 添加大纲
-                PdfSplitter._add_outlines(writer, original_outlines, start_page, end_page)
+                PdfSplitter._add_outlines(writer, outline_index, start_page, end_page)
                 
                 # 生成文件名
                 # 清理文件名，移除无效字符
@@ -344,3 +334,27 @@ class PdfSplitter:
                     progress_callback(progress)
                     
         return True
+    
+    @staticmethod
+    def _split_single_parallel(input_path, output_dir, base_name, total_pages, outline_index, max_workers,
+                               progress_callback=None):
+        """
+        "single" 模式的并行实现：页面按连续段分给进程池，每个工作进程自己打开源PDF，
+        写入互不重叠的页面；输出文件名和大纲与串行拆分相同
+        """
+        chunk_size = max(1, min(SPLIT_CHUNK_PAGES, -(-total_pages // (max_workers * 4))))
+        chunks = [range(start, min(start + chunk_size, total_pages)) for start in range(0, total_pages, chunk_size)]
+        
+        done = 0
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)), initializer=_init_split_worker,
+                                 initargs=(input_path, outline_index)) as executor:
+            futures = [executor.submit(_write_single_pages, chunk, output_dir, base_name) for chunk in chunks]
+            try:
+                for future in as_completed(futures):
+                    done += future.result()
+                    if progress_callback:
+                        progress_callback(int(done / total_pages * 100))
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
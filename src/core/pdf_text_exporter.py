@@ -0,0 +1,244 @@
+"""
+PDF文字导出模块 - 把PDF文字并行导出为纯文本、Markdown或JSON
+
+PdfEditor.extract_text 在单个进程中逐页提取，并把整个文档的文字放在一个字典里返回。
+PdfTextExporter 把页面按连续段分给进程池，每个工作进程打开自己的文档，把一段页面
+格式化为输出文本；主进程按页码顺序逐段写入输出文件。同时在途的段数有上限，
+内存占用与页数无关。
+
+输出格式：
+- txt:  每页 page.get_text() 的结果，页与页之间用换页符 (\\f) 分隔（与 pdftotext 相同）
+- md:   按字号识别标题，粗体转为 **粗体**，每页以 <!-- page N --> 注释开头
+- json: {"source", "page_count", "pages": [{"page", "width", "height", "blocks": [...]}]}，
+        每个块包含 bbox ([x0, y0, x1, y1]，单位为点)、type (text/image) 和 text
+"""
+import os
+import json
+import logging
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from src.core.pdf_converter import parse_page_selection
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('txt', 'md', 'json')
+
+# 每个任务处理的页数（单页提取很快，按段提交以减少进程间通信）
+CHUNK_PAGES = 32
+
+# 页面之间的分隔符
+_SEPARATORS = {'txt': '\f', 'md': '\n\n', 'json': ',\n'}
+
+# Markdown 提取时不需要图片数据
+_MARKDOWN_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+_MARKDOWN_ESCAPES = str.maketrans({c: '\\' + c for c in '\\`*_'})
+
+# 每个导出进程中打开的PDF文档（由进程池初始化函数设置）
+_worker_doc = None
+
+
+def _init_export_worker(input_path):
+    """进程池初始化：每个工作进程只打开一次PDF文档"""
+    global _worker_doc
+    _worker_doc = fitz.open(input_path)
+
+
+def _is_cjk(char):
+    # CJK部首/汉字、兼容汉字、全角符号
+    return '\u2e80' <= char <= '\u9fff' or '\uf900' <= char <= '\ufaff' or '\uff00' <= char <= '\uffef'
+
+
+def _join_lines(lines):
+    """把块内的多行合并为一段：英文行间加空格，连字符断词和中文行间直接相连"""
+    text = ''
+    for line in lines:
+        if not text:
+            text = line
+        elif text.endswith('-'):
+            text = text[:-1] + line
+        elif _is_cjk(text[-1]) or _is_cjk(line[0]):
+            text += line
+        else:
+            text += ' ' + line
+    return text
+
+
+def _span_markdown(span):
+    text = span['text'].translate(_MARKDOWN_ESCAPES)
+    stripped = text.strip()
+    if stripped and span['flags'] & fitz.TEXT_FONT_BOLD:
+        # 空白留在粗体标记外面，否则 Markdown 不识别
+        start = text.index(stripped[0])
+        return f"{text[:start]}**{stripped}**{text[start + len(stripped):]}"
+    return text
+
+
+def _page_markdown(page):
+    """把一页转为Markdown：字号明显大于正文的块作为标题"""
+    blocks = [block for block in page.get_text('dict', flags=_MARKDOWN_FLAGS)['blocks'] if block['type'] == 0]
+
+    # 正文字号：按字符数计的最常见字号
+    sizes = Counter()
+    for block in blocks:
+        for line in block['lines']:
+            for span in line['spans']:
+                sizes[round(span['size'], 1)] += len(span['text'].strip())
+    body_size = sizes.most_common(1)[0][0] if sizes else 0
+
+    parts = [f"<!-- page {page.number + 1} -->"]
+    for block in blocks:
+        lines = []
+        for line in block['lines']:
+            text = ''.join(_span_markdown(span) for span in line['spans']).strip()
+            if text:
+                lines.append(text)
+        if not lines:
+            continue
+        size = max(span['size'] for line in block['lines'] for span in line['spans'])
+        text = _join_lines(lines)
+        if body_size and size >= body_size * 1.5:
+            parts.append(f"# {text.replace('**', '')}")
+        elif body_size and size >= body_size * 1.2:
+            parts.append(f"## {text.replace('**', '')}")
+        else:
+            parts.append(text)
+    return '\n\n'.join(parts)
+
+
+def _page_json(page):
+    """把一页转为JSON对象（块的边界框和文字）"""
+    blocks = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text('blocks'):
+        block = {'bbox': [round(x0, 2), round(y0, 2), round(x1, 2), round(y1, 2)],
+                 'type': 'image' if block_type == 1 else 'text'}
+        if block_type == 0:
+            block['text'] = text.rstrip('\n')
+        blocks.append(block)
+    return json.dumps({'page': page.number + 1, 'width': round(page.rect.width, 2),
+                       'height': round(page.rect.height, 2), 'blocks': blocks}, ensure_ascii=False)
+
+
+_FORMATTERS = {'txt': lambda page: page.get_text(), 'md': _page_markdown, 'json': _page_json}
+
+
+def _export_pages(page_numbers, export_format, doc=None):
+    """
+    格式化指定页面
+
+    Args:
+        page_numbers: 页码列表（从1开始）
+        doc: 已打开的PDF文档，None表示使用工作进程中打开的文档
+
+    Returns:
+        list: 每页的输出文本
+    """
+    if doc is None:
+        doc = _worker_doc
+    formatter = _FORMATTERS[export_format]
+    return [formatter(doc[page_no - 1]) for page_no in page_numbers]
+
+
+def _iter_page_outputs(input_path, page_numbers, export_format, max_workers):
+    """按页码顺序生成每页的输出文本，多进程时最多同时提交 2 倍进程数的段"""
+    chunks = [page_numbers[i:i + CHUNK_PAGES] for i in range(0, len(page_numbers), CHUNK_PAGES)]
+    if max_workers <= 1 or len(chunks) <= 1:
+        with fitz.open(input_path) as doc:
+            for chunk in chunks:
+                yield from _export_pages(chunk, export_format, doc)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)), initializer=_init_export_worker,
+                                   initargs=(input_path,))
+    pending = deque()
+    next_chunk = 0
+    try:
+        while pending or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(pending) < max_workers * 2:
+                pending.append(executor.submit(_export_pages, chunks[next_chunk], export_format))
+                next_chunk += 1
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PdfTextExporter:
+    """PDF文字导出器 - 并行提取，按页码顺序流式写入"""
+
+    @staticmethod
+    def export(input_path, output_path, export_format=None, pages=None, max_workers=None, progress_callback=None,
+               cancel_event=None):
+        """
+        导出PDF文字
+
+        Args:
+            input_path: PDF文件路径
+            output_path: 输出文件路径
+            export_format: 输出格式 (txt, md, json)，None表示按输出文件扩展名判断
+            pages: 页面选择，None表示全部；页码列表（从1开始）或字符串如 "1-5, 8, 10-12"
+            max_workers: 进程数，None表示CPU核数，1表示在当前进程中提取
+            progress_callback: 进度回调函数
+            cancel_event: 可选的 threading.Event，被设置后停止导出（不生成输出文件）
+
+        Returns:
+            bool: 是否完成导出（被取消时为False）
+        """
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"PDF文件不存在: {input_path}")
+        if export_format is None:
+            export_format = os.path.splitext(output_path)[1].lstrip('.').lower()
+        export_format = {'markdown': 'md', 'text': 'txt'}.get(export_format, export_format)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        with fitz.open(input_path) as doc:
+            page_numbers = parse_page_selection(pages, len(doc))
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        try:
+            logger.info(f"开始导出PDF文字: {input_path} -> {output_path}")
+
+            separator = _SEPARATORS[export_format]
+            total = len(page_numbers)
+            cancelled = False
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+                if export_format == 'json':
+                    source = json.dumps(os.path.basename(input_path), ensure_ascii=False)
+                    f.write(f'{{"source": {source}, "page_count": {total}, "pages": [\n')
+                for done, text in enumerate(_iter_page_outputs(input_path, page_numbers, export_format,
+                                                               max_workers), start=1):
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+                    if done > 1:
+                        f.write(separator)
+                    f.write(text)
+                    if progress_callback:
+                        progress_callback(int(done / total * 100))
+                else:
+                    if export_format == 'json':
+                        f.write('\n]}\n')
+                    elif export_format == 'md':
+                        f.write('\n')
+
+            if cancelled:
+                os.remove(temp_path)
+                logger.info("PDF文字导出已取消")
+                return False
+            os.replace(temp_path, output_path)
+            logger.info(f"PDF文字导出成功，共{total}页")
+            return True
+
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            logger.error(f"PDF文字导出失败: {e}")
+            raise Exception(f"导出失败: {str(e)}")
@@ -0,0 +1,113 @@
+"""
+流式PNG写入模块 - 逐行写入PNG，内存占用与图片高度无关
+
+PIL 保存PNG时需要完整的图片在内存中。PngStreamWriter 先写入文件头（高度需预先
+知道），之后每收到一批像素行就用PNG的 Up 过滤器（NumPy向量化计算与上一行的差值）
+处理并送入 zlib 压缩流，压缩输出积累到一定大小后写为一个IDAT块。文档页面中大量
+相同的行经 Up 过滤后全为0，压缩率很高。
+"""
+import struct
+import zlib
+
+import numpy as np
+
+# 各模式对应的PNG颜色类型和每像素字节数
+COLOR_TYPES = {'L': (0, 1), 'RGB': (2, 3), 'RGBA': (6, 4)}
+
+# PNG规范允许的最大宽高
+MAX_DIMENSION = 2 ** 31 - 1
+
+# 压缩数据积累到该大小后写为一个IDAT块
+IDAT_CHUNK_SIZE = 256 * 1024
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_FILTER_UP = 2
+
+
+def _chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+class PngStreamWriter:
+    """
+    流式PNG写入器
+
+    Args:
+        fileobj: 二进制文件对象
+        width: 图片宽度（像素）
+        height: 图片高度（像素），写入的总行数必须与之相等
+        mode: 像素模式 (L, RGB, RGBA)
+        dpi: 分辨率，None表示不写入
+        compress_level: zlib压缩级别
+    """
+
+    def __init__(self, fileobj, width, height, mode='RGB', dpi=None, compress_level=6):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"不支持的像素模式: {mode}")
+        if not (0 < width <= MAX_DIMENSION and 0 < height <= MAX_DIMENSION):
+            raise ValueError(f"PNG图片尺寸超出范围: {width}x{height}")
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.mode = mode
+        color_type, self.bytes_per_pixel = COLOR_TYPES[mode]
+        self.stride = width * self.bytes_per_pixel
+
+        self._rows_written = 0
+        self._previous_row = np.zeros(self.stride, dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_bytes = 0
+
+        fileobj.write(_PNG_SIGNATURE)
+        fileobj.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)))
+        if dpi:
+            pixels_per_meter = int(round(dpi / 0.0254))
+            fileobj.write(_chunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1)))
+
+    @property
+    def rows_remaining(self):
+        return self.height - self._rows_written
+
+    def write_rows(self, data):
+        """
+        写入若干行像素
+
+        Args:
+            data: 像素数据，每行 width * 每像素字节数 个字节，无行间填充
+        """
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, self.stride)
+        if len(rows) > self.rows_remaining:
+            raise ValueError(f"写入的行数超过图片高度 {self.height}")
+        if not len(rows):
+            return
+
+        # Up 过滤器：每行减去上一行（按字节取模256），每行前加过滤器类型字节
+        filtered = np.empty((len(rows), self.stride + 1), dtype=np.uint8)
+        filtered[:, 0] = _FILTER_UP
+        filtered[0, 1:] = rows[0] - self._previous_row
+        filtered[1:, 1:] = rows[1:] - rows[:-1]
+        self._previous_row = rows[-1].copy()
+        self._rows_written += len(rows)
+        self._queue(self._compressor.compress(filtered.tobytes()))
+
+    def close(self):
+        """写入剩余的压缩数据和文件尾（不关闭文件对象）"""
+        if self.rows_remaining:
+            raise ValueError(f"图片高度为 {self.height}，还有 {self.rows_remaining} 行未写入")
+        self._queue(self._compressor.flush())
+        self._flush_idat()
+        self.fileobj.write(_chunk(b'IEND', b''))
+
+    def _queue(self, compressed):
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_bytes += len(compressed)
+            if self._pending_bytes >= IDAT_CHUNK_SIZE:
+                self._flush_idat()
+
+    def _flush_idat(self):
+        if self._pending:
+            self.fileobj.write(_chunk(b'IDAT', b''.join(self._pending)))
+            self._pending = []
+            self._pending_bytes = 0
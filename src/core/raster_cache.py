@@ -0,0 +1,370 @@
+"""
+页面光栅缓存模块 - 在查看器、OCR和PDF转图片之间共用页面渲染结果
+
+同一页面经常被反复渲染：查看器每次翻页/缩放、OCR按150 DPI渲染、转图片按用户DPI渲染。
+本模块按 (文档指纹, 页面, DPI, 色彩空间, 透明通道) 缓存渲染后的像素：
+
+1. 内存层：按字节数限制大小的LRU
+2. 磁盘层（可选）：每个页面一个zlib压缩文件，按字节预算淘汰最久未使用的文件，
+   可在多个进程和多次运行之间共用
+
+文档指纹由文件路径、修改时间和大小计算，文件被修改后旧缓存自然失效。
+"""
+import os
+import hashlib
+import logging
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from src.core.atomic_io import user_data_dir
+
+logger = logging.getLogger(__name__)
+
+# 内存层默认大小
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+
+# 磁盘层默认预算（启用磁盘层但未指定预算时使用）
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+
+COLORSPACES = {'rgb': fitz.csRGB, 'gray': fitz.csGRAY, 'cmyk': fitz.csCMYK}
+
+# 磁盘文件头：魔数、版本、宽、高、分量数（含透明通道）、是否有透明通道
+_DISK_MAGIC = b'PDFR'
+_DISK_VERSION = 1
+_DISK_HEADER = struct.Struct('<4sBIIBB')
+_DISK_SUFFIX = '.raster'
+
+
+def default_disk_dir():
+    """磁盘层默认目录（~/.pdf_tool/raster_cache）"""
+    return os.path.join(user_data_dir(), 'raster_cache')
+
+
+def document_fingerprint(doc):
+    """
+    计算文档指纹
+
+    Args:
+        doc: PyMuPDF文档或PDF文件路径
+
+    Returns:
+        str: 指纹；内存中的文档或有未保存修改的文档返回None（不缓存）
+    """
+    if isinstance(doc, str):
+        path = doc
+    else:
+        if not doc.name or doc.is_dirty:
+            return None
+        path = doc.name
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class Raster:
+    """
+    渲染后的页面像素（行与行之间没有填充，stride = width * n）
+
+    pixmap 不为None时，samples 是该渲染结果像素缓冲区的内存视图（未复制）
+    """
+
+    __slots__ = ('width', 'height', 'colorspace', 'alpha', 'samples', 'pixmap')
+
+    def __init__(self, width, height, colorspace, alpha, samples, pixmap=None):
+        self.width = width
+        self.height = height
+        self.colorspace = colorspace
+        self.alpha = alpha
+        self.samples = samples
+        self.pixmap = pixmap
+
+    @property
+    def n(self):
+        """每个像素的分量数（含透明通道）"""
+        return COLORSPACES[self.colorspace].n + (1 if self.alpha else 0)
+
+    @property
+    def stride(self):
+        return self.width * self.n
+
+    @property
+    def nbytes(self):
+        return len(self.samples)
+
+    @classmethod
+    def from_pixmap(cls, pix, colorspace, copy=True):
+        """
+        由渲染结果创建
+
+        Args:
+            copy: 是否复制像素数据；False时引用 pix 的像素缓冲区（用于不进入内存层的一次性渲染）
+        """
+        if copy:
+            return cls(pix.width, pix.height, colorspace, bool(pix.alpha), pix.samples)
+        return cls(pix.width, pix.height, colorspace, bool(pix.alpha), pix.samples_mv, pix)
+
+    def to_pixmap(self):
+        """转换为PyMuPDF Pixmap（引用原渲染结果时不复制，否则复制像素数据）"""
+        if self.pixmap is not None:
+            return self.pixmap
+        return fitz.Pixmap(COLORSPACES[self.colorspace], self.width, self.height, self.samples, int(self.alpha))
+
+    def to_pil(self):
+        """
+        在像素数据上创建PIL图片（不复制）
+
+        PyMuPDF 的透明通道像素是预乘的，带透明通道时转为非预乘的 RGBA/LA（会复制像素数据）
+        """
+        mode = {'rgb': 'RGB', 'gray': 'L', 'cmyk': 'CMYK'}[self.colorspace]
+        if self.alpha:
+            if mode == 'CMYK':
+                raise ValueError("CMYK色彩空间不支持透明通道")
+            if mode == 'L':
+                return Image.frombuffer('La', (self.width, self.height), self.samples, 'raw', 'La', self.stride,
+                                        1).convert('LA')
+            return Image.frombuffer('RGBA', (self.width, self.height), self.samples, 'raw', 'RGBa', self.stride, 1)
+        return Image.frombuffer(mode, (self.width, self.height), self.samples, 'raw', mode, self.stride, 1)
+
+
+class RasterCache:
+    """
+    两级页面光栅缓存（线程安全）
+
+    Args:
+        max_memory_bytes: 内存层大小（字节），0表示不使用内存层
+        disk_dir: 磁盘层目录，None表示不使用磁盘层
+        max_disk_bytes: 磁盘层预算（字节）
+    """
+
+    def __init__(self, max_memory_bytes=DEFAULT_MEMORY_BYTES, disk_dir=None, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def config(self):
+        """构造参数，用于在其他进程中创建使用同一磁盘层的缓存"""
+        return {'max_memory_bytes': self.max_memory_bytes, 'disk_dir': self.disk_dir,
+                'max_disk_bytes': self.max_disk_bytes}
+
+    @staticmethod
+    def make_key(fingerprint, page_index, dpi, colorspace='rgb', alpha=False):
+        return fingerprint, page_index, round(float(dpi), 3), colorspace, bool(alpha)
+
+    def render(self, page, dpi, colorspace='rgb', alpha=False, fingerprint=None, memory=True):
+        """
+        获取页面光栅，未缓存时渲染并写入缓存
+
+        Args:
+            page: PyMuPDF页面
+            dpi: 分辨率
+            colorspace: 色彩空间 (rgb, gray, cmyk)
+            alpha: 是否包含透明通道
+            fingerprint: 文档指纹，None表示由页面所属文档计算
+            memory: 是否写入内存层；False用于只用一次的渲染（如导出图片），不挤占查看器的页面，
+                    未命中时直接返回引用渲染结果的光栅（不复制像素数据）
+
+        Returns:
+            Raster: 页面像素
+        """
+        if colorspace not in COLORSPACES:
+            raise ValueError(f"不支持的色彩空间: {colorspace}")
+        if fingerprint is None:
+            fingerprint = document_fingerprint(page.parent)
+        key = self.make_key(fingerprint, page.number, dpi, colorspace, alpha) if fingerprint else None
+
+        if key is not None:
+            raster = self.get(key, memory)
+            if raster is not None:
+                return raster
+
+        zoom = dpi / 72
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=COLORSPACES[colorspace], alpha=alpha)
+        raster = Raster.from_pixmap(pix, colorspace, copy=memory)
+        with self._lock:
+            self.stats['misses'] += 1
+        if key is not None:
+            if memory:
+                self._memory_put(key, raster)
+            self._disk_put(key, raster)
+        return raster
+
+    def get(self, key, memory=True):
+        """按键查找，依次查内存层和磁盘层；都未命中返回None（memory为False时磁盘层命中不写入内存层）"""
+        with self._lock:
+            raster = self._memory.get(key)
+            if raster is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return raster
+
+        raster = self._disk_get(key)
+        if raster is not None:
+            with self._lock:
+                self.stats['disk_hits'] += 1
+            if memory:
+                self._memory_put(key, raster)
+        return raster
+
+    def put(self, key, raster):
+        """写入两级缓存"""
+        self._memory_put(key, raster)
+        self._disk_put(key, raster)
+
+    def clear(self):
+        """清空内存层（磁盘层不受影响）"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _memory_put(self, key, raster):
+        if raster.nbytes > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old.nbytes
+            self._memory[key] = raster
+            self._memory_bytes += raster.nbytes
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, name + _DISK_SUFFIX)
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, version, width, height, n, alpha = _DISK_HEADER.unpack_from(data)
+            if magic != _DISK_MAGIC or version != _DISK_VERSION:
+                return None
+            samples = zlib.decompress(data[_DISK_HEADER.size:])
+            # 更新访问时间，淘汰时按最近使用顺序
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, struct.error, zlib.error) as e:
+            logger.warning(f"光栅缓存文件损坏，已忽略 {path}: {e}")
+            return None
+        raster = Raster(width, height, key[3], bool(alpha), samples)
+        if raster.n != n or len(samples) != width * height * n:
+            return None
+        return raster
+
+    def _disk_put(self, key, raster):
+        if not self.disk_dir or self.max_disk_bytes <= 0:
+            return
+        data = _DISK_HEADER.pack(_DISK_MAGIC, _DISK_VERSION, raster.width, raster.height, raster.n,
+                                 int(raster.alpha)) + zlib.compress(raster.samples, 1)
+        if len(data) > self.max_disk_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # 缓存文件丢失无害，只需保证不会读到写了一半的文件，不做fsync
+            fd, temp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.warning(f"无法写入光栅缓存 {path}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        """磁盘层文件列表 [(路径, 大小, 访问时间), ...]"""
+        entries = []
+        try:
+            names = os.listdir(self.disk_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(_DISK_SUFFIX):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime_ns))
+        return entries
+
+    def _evict_disk(self):
+        """删除最久未使用的文件，直到磁盘层回到预算内（其他进程也可能在写，因此重新统计）"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_raster_cache():
+    """获取进程内共用的光栅缓存（默认只有内存层）"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = RasterCache()
+        return _shared_cache
+
+
+def configure_raster_cache(max_memory_bytes=DEFAULT_MEMORY_BYTES, disk_dir=None, max_disk_bytes=0):
+    """
+    重新配置进程内共用的光栅缓存
+
+    Args:
+        max_memory_bytes: 内存层大小（字节）
+        disk_dir: 磁盘层目录；max_disk_bytes 大于0且未指定目录时使用 default_disk_dir()
+        max_disk_bytes: 磁盘层预算（字节），0表示不使用磁盘层
+
+    Returns:
+        RasterCache: 新的共用缓存
+    """
+    global _shared_cache
+    if max_disk_bytes > 0 and not disk_dir:
+        disk_dir = default_disk_dir()
+    with _shared_lock:
+        _shared_cache = RasterCache(max_memory_bytes, disk_dir if max_disk_bytes > 0 else None, max_disk_bytes)
+        return _shared_cache
@@ -0,0 +1,156 @@
+"""
+流式PDF写入模块 - 对象逐个写入文件，内存占用与对象总数无关
+
+pypdf 的 PdfWriter 把所有对象保存在内存中，直到 write() 时才一次写出。
+StreamingPdfWriter 在分配对象号后立即把对象写入文件，只保留每个对象的文件偏移量，
+最后写入交叉引用表和文件尾。对象可以按任意顺序写入（例如目录和页面树在最后写入）。
+
+也可以向已有文件追加增量更新：新对象和替换的原有对象写在文件末尾，
+后面是只包含这些对象的交叉引用信息，通过 /Prev 链接到原文件的交叉引用表。
+
+pypdf 对象中的间接引用在写入时通过 resolve 函数映射为输出文件中的对象号。
+"""
+import io
+import zlib
+
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject
+
+
+def serialize(obj, resolve):
+    """
+    把 pypdf 对象序列化为PDF语法
+
+    Args:
+        obj: pypdf 对象（直接对象，不能是流）
+        resolve: 函数，参数为 IndirectObject，返回输出文件中的对象号，None表示写为 null
+
+    Returns:
+        bytes: 序列化结果
+    """
+    if isinstance(obj, IndirectObject):
+        idnum = resolve(obj)
+        return f'{idnum} 0 R'.encode() if idnum else b'null'
+    if isinstance(obj, DictionaryObject):
+        # pypdf 的内部标记（如 /%is_open%）不写入文件
+        parts = [key.renumber() + b' ' + serialize(value, resolve) for key, value in obj.items()
+                 if not (len(key) > 2 and key[1] == '%' and key[-1] == '%')]
+        return b'<<' + b' '.join(parts) + b'>>'
+    if isinstance(obj, ArrayObject):
+        return b'[' + b' '.join(serialize(value, resolve) for value in obj) + b']'
+    buffer = io.BytesIO()
+    obj.write_to_stream(buffer)
+    return buffer.getvalue()
+
+
+def serialize_object(obj, resolve):
+    """序列化一个间接对象的内容（流对象包括字典和数据）"""
+    if isinstance(obj, StreamObject):
+        dictionary = DictionaryObject({key: value for key, value in obj.items() if key != '/Length'})
+        dictionary[NameObject('/Length')] = NumberObject(len(obj._data))
+        return serialize(dictionary, resolve) + b'\nstream\n' + obj._data + b'\nendstream'
+    return serialize(obj, resolve)
+
+
+class StreamingPdfWriter:
+    """
+    流式PDF写入器
+
+    Args:
+        fileobj: 二进制文件对象
+        version: PDF版本号
+        first_id: 第一个新对象的对象号（增量更新时为原文件 trailer 的 /Size）
+        prev_xref: 增量更新时原文件最后一个交叉引用表的偏移量，None表示写一个新文件
+        xref_stream: 交叉引用信息写为交叉引用流（原文件使用交叉引用流时，增量更新也应使用）
+    """
+
+    def __init__(self, fileobj, version='1.7', first_id=1, prev_xref=None, xref_stream=False):
+        self.fileobj = fileobj
+        self.first_id = first_id
+        self.prev_xref = prev_xref
+        self.xref_stream = xref_stream
+        self._offsets = []    # 新对象的文件偏移量（下标为 对象号 - first_id），None表示尚未写入
+        self._rewritten = {}  # 增量更新时重写的原有对象：对象号 -> 文件偏移量
+        if prev_xref is None:
+            fileobj.write(f'%PDF-{version}\n%\xe2\xe3\xcf\xd3\n'.encode('latin-1'))
+        else:
+            fileobj.seek(0, io.SEEK_END)
+            fileobj.write(b'\n')
+
+    @property
+    def bytes_written(self):
+        return self.fileobj.tell()
+
+    def allocate(self):
+        """分配一个新的对象号（对象可以稍后写入）"""
+        self._offsets.append(None)
+        return self.first_id + len(self._offsets) - 1
+
+    def write_raw(self, idnum, data):
+        """写入已经序列化好的对象内容；增量更新时 idnum 也可以是原文件中的对象（替换原对象）"""
+        offset = self.fileobj.tell()
+        if idnum < self.first_id:
+            if idnum in self._rewritten:
+                raise ValueError(f"对象 {idnum} 已经写入")
+            self._rewritten[idnum] = offset
+        else:
+            if self._offsets[idnum - self.first_id] is not None:
+                raise ValueError(f"对象 {idnum} 已经写入")
+            self._offsets[idnum - self.first_id] = offset
+        self.fileobj.write(b'%d 0 obj\n' % idnum + data + b'\nendobj\n')
+
+    def write_object(self, idnum, obj, resolve):
+        """序列化并写入一个 pypdf 对象"""
+        self.write_raw(idnum, serialize_object(obj, resolve))
+
+    def close(self, root_id, info_id=None, file_id=None):
+        """
+        写入交叉引用信息和文件尾（不关闭文件对象），只包含写入过的对象
+
+        Args:
+            root_id: 文档目录对象号
+            info_id: 文档信息字典对象号
+            file_id: 文件标识 (/ID)，pypdf 数组对象
+        """
+        xref_id = self.allocate() if self.xref_stream else None
+        xref_offset = self.fileobj.tell()
+        if xref_id is not None:
+            self._offsets[-1] = xref_offset
+        # 增量更新也写入0号对象的空闲条目，否则部分阅读器认为交叉引用表不是从0开始编号，
+        # 打开文件时逐个扫描对象头进行修正
+        entries = [(0, None)] + sorted(self._rewritten.items())
+        entries.extend((self.first_id + i, offset) for i, offset in enumerate(self._offsets) if offset is not None)
+
+        # 连续的对象号合并为一个小节
+        sections = []
+        for idnum, offset in entries:
+            if sections and sections[-1][0] + len(sections[-1][1]) == idnum:
+                sections[-1][1].append(offset)
+            else:
+                sections.append((idnum, [offset]))
+
+        trailer = b'/Size %d /Root %d 0 R' % (self.first_id + len(self._offsets), root_id)
+        if info_id:
+            trailer += b' /Info %d 0 R' % info_id
+        if file_id is not None:
+            trailer += b' /ID ' + serialize(file_id, lambda ref: ref.idnum)
+        if self.prev_xref is not None:
+            trailer += b' /Prev %d' % self.prev_xref
+
+        if xref_id is None:
+            lines = [b'xref\n']
+            for start, offsets in sections:
+                lines.append(b'%d %d\n' % (start, len(offsets)))
+                lines.extend(b'%010d 00000 n \n' % offset if offset is not None else b'0000000000 65535 f \n'
+                             for offset in offsets)
+            self.fileobj.write(b''.join(lines) + b'trailer\n<<' + trailer + b'>>\n')
+        else:
+            width = max(4, (xref_offset.bit_length() + 7) // 8)
+            rows = b''.join((1).to_bytes(1, 'big') + offset.to_bytes(width, 'big') + b'\0\0' if offset is not None
+                            else b'\0' + bytes(width) + b'\xff\xff'
+                            for _, offsets in sections for offset in offsets)
+            data = zlib.compress(rows)
+            index = b' '.join(b'%d %d' % (start, len(offsets)) for start, offsets in sections)
+            self.fileobj.write(b'%d 0 obj\n<</Type /XRef %s /Index [%s] /W [1 %d 2] /Filter /FlateDecode '
+                               b'/Length %d>>\nstream\n' % (xref_id, trailer, index, width, len(data)) + data +
+                               b'\nendstream\nendobj\n')
+        self.fileobj.write(b'startxref\n%d\n%%%%EOF\n' % xref_offset)
@@ -0,0 +1,163 @@
+"""
+分块TIFF写入模块 - 逐块写入超大图片，内存占用与图片大小无关
+
+PIL 保存TIFF时需要完整的图片在内存中，A0图纸按300 DPI以上渲染时单张图片就有
+数GB。TiledTiffWriter 按 TIFF 6.0 的分块（tile）格式写文件：每块渲染完成后立即
+Deflate 压缩并写入输出文件，内存中只保留各块的偏移量和长度，最后写入IFD。
+未压缩数据可能超过4GB时自动使用BigTIFF格式。
+"""
+import struct
+import zlib
+
+# TIFF 字段类型：(类型编号, 单个值的字节数, struct格式)
+_SHORT = (3, 2, 'H')
+_LONG = (4, 4, 'I')
+_RATIONAL = (5, 8, 'II')
+_LONG8 = (16, 8, 'Q')
+
+# 各色彩空间对应的 PhotometricInterpretation 和每像素分量数（不含透明通道）；
+# bilevel 为1位黑白（与PIL的 '1' 模式相同，1表示白色）
+PHOTOMETRIC = {'bilevel': (1, 1), 'gray': (1, 1), 'rgb': (2, 3), 'cmyk': (5, 4)}
+
+# 未压缩数据超过该大小时使用BigTIFF（留出压缩后反而变大和IFD的余量）
+BIGTIFF_THRESHOLD = 3 * 1024 ** 3
+
+
+class TiledTiffWriter:
+    """
+    分块TIFF写入器
+
+    块按从左到右、从上到下的顺序通过 write_tile 写入，每块都是 tile_size x tile_size
+    的完整像素数据（右边和下边超出图片的部分用任意值填充），最后调用 close()。
+    1位黑白图片每行按字节对齐，即每行 tile_size / 8 个字节。
+
+    Args:
+        fileobj: 可seek的二进制文件对象
+        width: 图片宽度（像素）
+        height: 图片高度（像素）
+        colorspace: 色彩空间 (rgb, gray, cmyk, bilevel)
+        alpha: 是否带透明通道（作为非预乘的附加通道）
+        tile_size: 块的边长，必须是16的倍数
+        dpi: 分辨率，None表示不写入
+        compress_level: zlib压缩级别
+        bigtiff: 是否使用BigTIFF，None表示按数据大小自动选择
+    """
+
+    def __init__(self, fileobj, width, height, colorspace='rgb', alpha=False, tile_size=512, dpi=None,
+                 compress_level=6, bigtiff=None):
+        if colorspace not in PHOTOMETRIC:
+            raise ValueError(f"不支持的色彩空间: {colorspace}")
+        if tile_size <= 0 or tile_size % 16:
+            raise ValueError(f"块大小必须是16的正整数倍: {tile_size}")
+        if colorspace == 'bilevel' and alpha:
+            raise ValueError("1位黑白图片不支持透明通道")
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.colorspace = colorspace
+        self.alpha = alpha
+        self.tile_size = tile_size
+        self.dpi = dpi
+        self.compress_level = compress_level
+
+        self.samples_per_pixel = PHOTOMETRIC[colorspace][1] + (1 if alpha else 0)
+        self.bits_per_sample = 1 if colorspace == 'bilevel' else 8
+        self.tiles_across = -(-width // tile_size)
+        self.tiles_down = -(-height // tile_size)
+        self.tile_bytes = tile_size * tile_size * self.samples_per_pixel * self.bits_per_sample // 8
+        if bigtiff is None:
+            bigtiff = self.tile_bytes * self.tiles_across * self.tiles_down > BIGTIFF_THRESHOLD
+        self.bigtiff = bigtiff
+
+        self._offsets = []
+        self._byte_counts = []
+        self._start = fileobj.tell()
+        if bigtiff:
+            fileobj.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+        else:
+            fileobj.write(b'II' + struct.pack('<HI', 42, 0))
+
+    @property
+    def tile_count(self):
+        return self.tiles_across * self.tiles_down
+
+    def write_tile(self, data):
+        """
+        写入下一块
+
+        Args:
+            data: 该块的像素数据（按行排列，每像素 samples_per_pixel 个分量）
+        """
+        if len(self._offsets) >= self.tile_count:
+            raise ValueError("写入的块数超过图片的块数")
+        if len(data) != self.tile_bytes:
+            raise ValueError(f"块数据大小应为 {self.tile_bytes} 字节，实际为 {len(data)} 字节")
+        compressed = zlib.compress(data, self.compress_level)
+        self._offsets.append(self.fileobj.tell() - self._start)
+        self._byte_counts.append(len(compressed))
+        self.fileobj.write(compressed)
+
+    def close(self):
+        """写入IFD，完成文件（不关闭文件对象）"""
+        if len(self._offsets) != self.tile_count:
+            raise ValueError(f"图片共 {self.tile_count} 块，只写入了 {len(self._offsets)} 块")
+        if not self.bigtiff and self.fileobj.tell() - self._start > 0xFFFFFFFF - 65536:
+            raise ValueError("TIFF文件超过4GB，请使用BigTIFF")
+
+        photometric = PHOTOMETRIC[self.colorspace][0]
+        offset_type = _LONG8 if self.bigtiff else _LONG
+        entries = [
+            (256, _LONG, [self.width]),
+            (257, _LONG, [self.height]),
+            (258, _SHORT, [self.bits_per_sample] * self.samples_per_pixel),
+            (259, _SHORT, [8]),  # Adobe Deflate
+            (262, _SHORT, [photometric]),
+            (277, _SHORT, [self.samples_per_pixel]),
+            (284, _SHORT, [1]),  # 像素分量交错存储
+            (322, _LONG, [self.tile_size]),
+            (323, _LONG, [self.tile_size]),
+            (324, offset_type, self._offsets),
+            (325, offset_type, self._byte_counts),
+        ]
+        if self.dpi:
+            resolution = (int(round(self.dpi * 100)), 100)
+            entries += [(282, _RATIONAL, [resolution]), (283, _RATIONAL, [resolution]), (296, _SHORT, [2])]
+        if self.alpha:
+            entries.append((338, _SHORT, [2]))  # 非预乘透明通道
+        entries.sort(key=lambda entry: entry[0])
+
+        f = self.fileobj
+        if (f.tell() - self._start) % 2:
+            f.write(b'\0')
+
+        # 放不进IFD条目的值先写在IFD前面
+        value_size = 8 if self.bigtiff else 4
+        encoded = []
+        for tag, (type_id, size, fmt), values in entries:
+            flat = [v for value in values for v in (value if isinstance(value, tuple) else (value,))]
+            data = struct.pack('<' + fmt * len(values), *flat)
+            if len(data) > value_size:
+                field = struct.pack('<Q' if self.bigtiff else '<I', f.tell() - self._start)
+                f.write(data)
+                if len(data) % 2:
+                    f.write(b'\0')
+            else:
+                field = data.ljust(value_size, b'\0')
+            encoded.append((tag, type_id, len(values), field))
+
+        ifd_offset = f.tell() - self._start
+        if self.bigtiff:
+            f.write(struct.pack('<Q', len(encoded)))
+            for tag, type_id, count, field in encoded:
+                f.write(struct.pack('<HHQ', tag, type_id, count) + field)
+            f.write(struct.pack('<Q', 0))
+        else:
+            f.write(struct.pack('<H', len(encoded)))
+            for tag, type_id, count, field in encoded:
+                f.write(struct.pack('<HHI', tag, type_id, count) + field)
+            f.write(struct.pack('<I', 0))
+
+        end = f.tell()
+        f.seek(self._start + (8 if self.bigtiff else 4))
+        f.write(struct.pack('<Q' if self.bigtiff else '<I', ifd_offset))
+        f.seek(end)
@@ -14,6 +14,9 @@ from src.core.pdf_converter import PdfConverter
 from src.gui.utils import Worker
 from src.gui.styles import BUTTON_PRIMARY, GROUP_BOX
 
+# 分块渲染时每块的边长（像素）
+TILE_SIZE = 1024
+
 
 class ConvertTab(QWidget):
     """PDF转换标签页"""
@@ -65,7 +68,7 @@ class ConvertTab(QWidget):
         format_layout = QHBoxLayout()
         format_layout.addWidget(QLabel("图片格式:"))
         self.combo_format = QComboBox()
-        self.combo_format.addItems(["PNG", "JPG", "JPEG"])
+        self.combo_format.addItems(["PNG", "JPG", "JPEG", "WEBP", "TIFF"])
         format_layout.addWidget(self.combo_format)
         format_layout.addStretch()
         image_options_layout.addLayout(format_layout)
@@ -81,6 +84,14 @@ class ConvertTab(QWidget):
         dpi_layout.addStretch()
         image_options_layout.addLayout(dpi_layout)
         
+        # 分块渲染（A0图纸等超大页面按高DPI输出时避免占用数GB内存）
+        self.tile_check = QCheckBox("分块渲染超大页面（TIFF输出为分块TIFF，其他格式每块一个文件）")
+        image_options_layout.addWidget(self.tile_check)
+        
+        # 拼接为长图（适合在手机上浏览）
+        self.long_image_check = QCheckBox("拼接为一张长图（仅PNG/JPG，过高时自动分段）")
+        image_options_layout.addWidget(self.long_image_check)
+        
         self.image_options_group.setLayout(image_options_layout)
         self.image_options_group.setVisible(False)
         layout.addWidget(self.image_options_group)
@@ -174,6 +185,12 @@ class ConvertTab(QWidget):
             # 转换为图片
             image_format = self.combo_format.currentText().lower()
             dpi = self.spin_dpi.value()
+            tile_size = TILE_SIZE if self.tile_check.isChecked() else None
+            long_image = self.long_image_check.isChecked()
+            
+            if long_image and image_format not in ('png', 'jpg', 'jpeg'):
+                QMessageBox.warning(self, "错误", "长图只支持PNG和JPG格式。")
+                return
             
             self.btn_convert.setEnabled(False)
             self.progress_bar.setVisible(True)
@@ -181,13 +198,19 @@ class ConvertTab(QWidget):
             
             open_folder = self.open_folder_check.isChecked()
             
-            self.worker = Worker(
-                PdfConverter.to_images, 
-                input_file, 
-                output_dir, 
-                image_format, 
-                dpi
-            )
+            if long_image:
+                base_name = os.path.splitext(os.path.basename(input_file))[0]
+                output_file = os.path.join(output_dir, f"{base_name}_long.{image_format}")
+                self.worker = Worker(PdfConverter.to_long_image, input_file, output_file, dpi=dpi)
+            else:
+                self.worker = Worker(
+                    PdfConverter.to_images, 
+                    input_file, 
+                    output_dir, 
+                    image_format, 
+                    dpi,
+                    tile_size=tile_size
+                )
             self.worker.finished.connect(lambda s, m: self.on_convert_finished(s, m, output_dir, open_folder))
             self.worker.progress.connect(self.progress_bar.setValue)
             self.worker.start()
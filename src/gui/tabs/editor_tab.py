@@ -10,6 +10,7 @@ from PyQt6.QtCore import Qt
 import os
 import webbrowser
 from src.core.pdf_editor import PdfEditor
+from src.core.pdf_text_exporter import PdfTextExporter
 from src.gui.utils import Worker
 from src.gui.styles import BUTTON_PRIMARY, GROUP_BOX
 
@@ -67,11 +68,19 @@ class EditorTab(QWidget):
         layout.addLayout(page_layout)
         
         # 提取按钮
+        button_layout = QHBoxLayout()
         self.btn_extract = QPushButton("提取文字")
         self.btn_extract.clicked.connect(self.start_extract)
         self.btn_extract.setMinimumHeight(40)
         self.btn_extract.setStyleSheet(BUTTON_PRIMARY)
-        layout.addWidget(self.btn_extract)
+        button_layout.addWidget(self.btn_extract)
+        
+        # 导出按钮（多进程提取，直接写入文件，适合页数很多的文档）
+        self.btn_export = QPushButton("导出到文件...")
+        self.btn_export.clicked.connect(self.start_export)
+        self.btn_export.setMinimumHeight(40)
+        button_layout.addWidget(self.btn_export)
+        layout.addLayout(button_layout)
         
         # 进度条
         self.extract_progress = QProgressBar()
@@ -218,6 +227,42 @@ class EditorTab(QWidget):
         self.worker.progress.connect(self.extract_progress.setValue)
         self.worker.start()
     
+    def start_export(self):
+        input_file = self.extract_input.text()
+        
+        if not input_file or not os.path.exists(input_file):
+            QMessageBox.warning(self, "错误", "请选择有效的PDF文件。")
+            return
+        
+        default_path = os.path.splitext(input_file)[0] + ".txt"
+        output_file, _ = QFileDialog.getSaveFileName(
+            self, "导出文字", default_path, "文本文件 (*.txt);;Markdown (*.md);;JSON (*.json)"
+        )
+        if not output_file:
+            return
+        
+        self.btn_extract.setEnabled(False)
+        self.btn_export.setEnabled(False)
+        self.extract_progress.setVisible(True)
+        self.extract_progress.setValue(0)
+        
+        pages = [self.extract_page.value()] if self.extract_page.value() > 0 else None
+        
+        self.worker = Worker(PdfTextExporter.export, input_file, output_file, pages=pages)
+        self.worker.finished.connect(lambda s, m: self.on_export_finished(s, m, output_file))
+        self.worker.progress.connect(self.extract_progress.setValue)
+        self.worker.start()
+    
+    def on_export_finished(self, success, message, output_file):
+        self.btn_extract.setEnabled(True)
+        self.btn_export.setEnabled(True)
+        self.extract_progress.setVisible(False)
+        
+        if success:
+            QMessageBox.information(self, "成功", f"文字已导出到:\n{output_file}")
+        else:
+            QMessageBox.critical(self, "错误", f"导出失败: {message}")
+    
     def on_extract_finished(self, success, result):
         self.btn_extract.setEnabled(True)
         self.extract_progress.setVisible(False)
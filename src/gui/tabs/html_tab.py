@@ -106,6 +106,11 @@ class HtmlToPdfTab(QWidget):
         self.ebook_name.setText("merged_ebook")  # Default name
         settings_layout.addWidget(self.ebook_name, 4, 1, 1, 2)  # Span two columns
         
+        # Append to an existing ebook as an incremental update
+        self.append_ebook_check = QCheckBox("电子书已存在时追加新章节（增量更新，不重写原文件）")
+        self.append_ebook_check.setChecked(False)
+        settings_layout.addWidget(self.append_ebook_check, 5, 0, 1, 3)  # Span three columns
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
 
@@ -213,13 +218,14 @@ class HtmlToPdfTab(QWidget):
         
         # 直接获取电子书名称，不再在这里生成日期范围
         ebook_name = self.ebook_name.text() if merge_pdfs else None
+        append_ebook = merge_pdfs and self.append_ebook_check.isChecked()
 
         self.btn_convert.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
         # Convert files in a thread
-        self.worker = Worker(self.convert_files, files, output_dir, font_size, merge_pdfs, ebook_name)
+        self.worker = Worker(self.convert_files, files, output_dir, font_size, merge_pdfs, ebook_name, append_ebook)
         self.worker.finished.connect(lambda success, message: self.on_conversion_finished(success, message, output_dir, open_folder))
         self.worker.progress.connect(self.update_progress)
         self.worker.start()
@@ -283,8 +289,8 @@ class HtmlToPdfTab(QWidget):
         自动更新电子书默认名称
         当用户勾选合并选项或文件列表变化时调用
         """
-        # 只有当勾选了合并选项时才更新
-        if not self.merge_pdfs_check.isChecked():
+        # 只有当勾选了合并选项时才更新；追加到已有电子书时名称要保持不变
+        if not self.merge_pdfs_check.isChecked() or self.append_ebook_check.isChecked():
             return
         
         # 获取所有文件
@@ -298,7 +304,8 @@ class HtmlToPdfTab(QWidget):
             # 每次都更新电子书名称，无论用户是否修改过
             self.ebook_name.setText(date_range)
 
-    def convert_files(self, files, output_dir, font_size, merge_pdfs=False, ebook_name="merged_ebook", progress_callback=None):
+    def convert_files(self, files, output_dir, font_size, merge_pdfs=False, ebook_name="merged_ebook",
+                      append_ebook=False, progress_callback=None):
         """
         Convert multiple HTML files to PDF with progress updates.
         """
@@ -335,8 +342,11 @@ class HtmlToPdfTab(QWidget):
                 if progress_callback:
                     progress_callback(75)  # 75% when starting merge
                 
-                # Merge the PDFs with bookmarks
-                PdfMerger.merge(converted_files, merged_output, progress_callback)
+                # Merge the PDFs with bookmarks, or append them to the existing ebook
+                if append_ebook and os.path.exists(merged_output):
+                    PdfMerger.append_to(merged_output, converted_files, progress_callback)
+                else:
+                    PdfMerger.merge(converted_files, merged_output, progress_callback)
                 
             except Exception as e:
                 raise Exception(f"Failed to merge PDFs: {str(e)}")
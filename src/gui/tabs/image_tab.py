@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
     QFileDialog, QMessageBox, QComboBox, QLabel, QProgressBar, QCheckBox,
-    QRadioButton, QButtonGroup
+    QRadioButton, QButtonGroup, QSpinBox
 )
 from PyQt6.QtCore import Qt
 from src.gui.widgets.file_list import FileListWidget
@@ -38,7 +38,7 @@ class ImageToPdfTab(QWidget):
         layout.addLayout(toolbar_layout)
 
         # File List
-        self.file_list = FileListWidget(allowed_extensions=['.jpg', '.jpeg', '.png', '.bmp'])
+        self.file_list = FileListWidget(allowed_extensions=['.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.gif'])
         layout.addWidget(self.file_list)
 
         # Settings
@@ -48,15 +48,32 @@ class ImageToPdfTab(QWidget):
         page_layout = QHBoxLayout()
         page_layout.addWidget(QLabel("页面大小:"))
         self.combo_size = QComboBox()
-        self.combo_size.addItems(["适应图片"]) # Currently only supporting Fit to Image via img2pdf
+        for label, value in [("适应图片", None), ("A4", "A4"), ("A3", "A3"), ("A5", "A5"), ("Letter", "Letter")]:
+            self.combo_size.addItem(label, value)
         page_layout.addWidget(self.combo_size)
         
         page_layout.addWidget(QLabel("页面方向:"))
         self.combo_orientation = QComboBox()
-        self.combo_orientation.addItems(["自动"]) # img2pdf handles this
+        for label, value in [("自动", "auto"), ("纵向", "portrait"), ("横向", "landscape")]:
+            self.combo_orientation.addItem(label, value)
         page_layout.addWidget(self.combo_orientation)
+        
+        page_layout.addWidget(QLabel("边距(mm):"))
+        self.spin_margin = QSpinBox()
+        self.spin_margin.setRange(0, 50)
+        self.spin_margin.setValue(0)
+        page_layout.addWidget(self.spin_margin)
         page_layout.addStretch()
         
+        # Resampling
+        dpi_layout = QHBoxLayout()
+        dpi_layout.addWidget(QLabel("图片分辨率:"))
+        self.combo_dpi = QComboBox()
+        for label, value in [("保持原图", None), ("300 DPI", 300), ("200 DPI", 200), ("150 DPI（推荐）", 150), ("96 DPI", 96)]:
+            self.combo_dpi.addItem(label, value)
+        dpi_layout.addWidget(self.combo_dpi)
+        dpi_layout.addStretch()
+        
         # Conversion Mode
         mode_layout = QHBoxLayout()
         mode_layout.addWidget(QLabel("转换模式:"))
@@ -68,6 +85,12 @@ class ImageToPdfTab(QWidget):
         
         mode_layout.addWidget(self.radio_merge)
         mode_layout.addWidget(self.radio_single)
+        
+        # Only convert new or changed images (single mode)
+        self.only_changed_check = QCheckBox("仅转换新增或修改的图片")
+        self.only_changed_check.setEnabled(False)
+        self.radio_single.toggled.connect(self.only_changed_check.setEnabled)
+        mode_layout.addWidget(self.only_changed_check)
         mode_layout.addStretch()
         
         # Open Folder Option
@@ -75,6 +98,7 @@ class ImageToPdfTab(QWidget):
         self.open_folder_check.setChecked(True)  # Default to checked
         
         settings_layout.addLayout(page_layout)
+        settings_layout.addLayout(dpi_layout)
         settings_layout.addLayout(mode_layout)
         settings_layout.addWidget(self.open_folder_check)
         
@@ -96,7 +120,7 @@ class ImageToPdfTab(QWidget):
 
     def add_images(self):
         files, _ = QFileDialog.getOpenFileNames(
-            self, "选择图片", "", "图片文件 (*.jpg *.jpeg *.png *.bmp)"
+            self, "选择图片", "", "图片文件 (*.jpg *.jpeg *.png *.bmp *.tif *.tiff *.gif)"
         )
         if files:
             self.file_list.add_files(files)
@@ -134,9 +158,19 @@ class ImageToPdfTab(QWidget):
             
             # Get open folder option
             open_folder = self.open_folder_check.isChecked()
+            stats = {}
             
-            self.worker = Worker(ImageConverter.convert, files, output_path, convert_mode=convert_mode)
-            self.worker.finished.connect(lambda success, message: self.on_conversion_finished(success, message, output_path, open_folder))
+            self.worker = Worker(
+                ImageConverter.convert, files, output_path,
+                page_size=self.combo_size.currentData(),
+                orientation=self.combo_orientation.currentData(),
+                convert_mode=convert_mode,
+                margin=self.spin_margin.value(),
+                target_dpi=self.combo_dpi.currentData(),
+                only_changed=convert_mode == "single" and self.only_changed_check.isChecked(),
+                stats=stats
+            )
+            self.worker.finished.connect(lambda success, message: self.on_conversion_finished(success, message, output_path, open_folder, stats))
             self.worker.progress.connect(self.update_progress)
             self.worker.start()
     
@@ -144,7 +178,7 @@ class ImageToPdfTab(QWidget):
         """Update progress bar value"""
         self.progress_bar.setValue(value)
 
-    def on_conversion_finished(self, success, message, output_file, open_folder):
+    def on_conversion_finished(self, success, message, output_file, open_folder, stats=None):
         self.btn_convert.setEnabled(True)
         self.progress_bar.setVisible(False)
         if success:
@@ -157,6 +191,8 @@ class ImageToPdfTab(QWidget):
                 open_folder_path = os.path.dirname(output_file)
                 msg_text = "图片已成功合并为单个PDF文件！"
                 msg_detail = f"输出文件: {output_file}"
+                if stats and stats.get('deduplicated_bytes'):
+                    msg_detail += f"\n重复图片已共用，节省 {stats['deduplicated_bytes'] / 1024:.1f} KB"
             
             msg = QMessageBox(self)
             msg.setIcon(QMessageBox.Icon.Information)
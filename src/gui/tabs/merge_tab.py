@@ -9,6 +9,9 @@ from src.gui.utils import Worker
 import os
 import webbrowser
 
+# 文件数超过该值时使用流式合并，内存占用不随文件数增长
+STREAMING_MIN_FILES = 200
+
 
 class MergePdfTab(QWidget):
     """PDF合并标签页"""
@@ -72,6 +75,10 @@ class MergePdfTab(QWidget):
         self.open_folder_check.setChecked(True)
         options_layout.addWidget(self.open_folder_check)
         
+        self.dedup_check = QCheckBox("合并重复资源（同一模板的字体、图片只保留一份）")
+        self.dedup_check.setChecked(True)
+        options_layout.addWidget(self.dedup_check)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -162,7 +169,9 @@ class MergePdfTab(QWidget):
             # Get open folder option
             open_folder = self.open_folder_check.isChecked()
             
-            self.worker = Worker(PdfMerger.merge, files_with_titles, output_file)
+            self.worker = Worker(PdfMerger.merge, files_with_titles, output_file,
+                                 deduplicate=self.dedup_check.isChecked(),
+                                 streaming=len(files_with_titles) > STREAMING_MIN_FILES)
             self.worker.finished.connect(lambda success, message: self.on_merge_finished(success, message, output_file, open_folder))
             self.worker.progress.connect(self.update_progress)
             self.worker.start()
@@ -14,6 +14,8 @@ from PyQt6.QtGui import (
 import fitz  # PyMuPDF
 import logging
 
+from src.core.raster_cache import get_raster_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,12 +50,11 @@ class PDFPageWidget(QWidget):
         if not self.page:
             return
         
-        # 使用PyMuPDF渲染页面
-        mat = fitz.Matrix(self.scale, self.scale)
-        pix = self.page.get_pixmap(matrix=mat)
+        # 使用PyMuPDF渲染页面（通过共用的光栅缓存，回到看过的页面或缩放比例时不再重新渲染）
+        raster = get_raster_cache().render(self.page, self.scale * 72)
         
         # 转换为QPixmap
-        img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
+        img = QImage(raster.samples, raster.width, raster.height, raster.stride, QImage.Format.Format_RGB888)
         self.pixmap = QPixmap.fromImage(img)
         
         # 调整窗口大小
@@ -13,6 +13,7 @@ from unittest.mock import patch, MagicMock
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import executable_detector
 from executable_detector import (
     ExecutableDetector,
     detect_executable,
@@ -205,6 +206,51 @@ class TestExecutableDetector(unittest.TestCase):
                     # 检查是否返回了新检测到的路径
                     self.assertEqual(path, expected_path)
     
+    def test_save_merges_concurrent_entries(self):
+        """
+        测试保存时合并其他进程已写入的条目，而不是整体覆盖
+        """
+        other = ExecutableDetector(config_file=self.temp_config)
+        
+        with patch('os.path.exists', return_value=True):
+            self.detector.set_path('exec1', '/usr/bin/exec1')
+            other.set_path('exec2', '/usr/bin/exec2')
+        
+        with open(self.temp_config, 'r') as f:
+            config = json.load(f)
+        
+        self.assertEqual(config, {
+            'exec1': '/usr/bin/exec1',
+            'exec2': '/usr/bin/exec2'
+        })
+        
+        # 删除操作同样只影响自己的条目
+        other.clear_path('exec2')
+        self.assertEqual(ExecutableDetector(config_file=self.temp_config).get_all_paths(), {
+            'exec1': '/usr/bin/exec1'
+        })
+    
+    def test_save_is_atomic(self):
+        """
+        测试写入失败时保留原配置文件且不留下临时文件
+        """
+        with patch('os.path.exists', return_value=True):
+            self.detector.set_path('exec1', '/usr/bin/exec1')
+        
+        with patch('os.replace', side_effect=OSError('disk full')):
+            with patch('os.path.exists', return_value=True):
+                self.detector.set_path('exec2', '/usr/bin/exec2')
+        
+        with open(self.temp_config, 'r') as f:
+            self.assertEqual(json.load(f), {'exec1': '/usr/bin/exec1'})
+        
+        directory = os.path.dirname(self.temp_config)
+        leftovers = [
+            name for name in os.listdir(directory)
+            if name.startswith('.' + os.path.basename(self.temp_config)) and name.endswith('.tmp')
+        ]
+        self.assertEqual(leftovers, [])
+    
     def test_check_executable_version(self):
         """
         测试检查可执行文件版本
@@ -238,30 +284,33 @@ class TestGlobalFunctions(unittest.TestCase):
     
     def setUp(self):
         """
-        测试前设置，保存原始配置文件路径
+        测试前设置，将用户数据目录指向临时目录并重置全局检测器
         """
-        self.original_config = os.path.join(os.path.dirname(__file__), 'executable_paths.json')
-        self.temp_config = tempfile.mktemp(suffix='.json')
-        
-        # 如果原始配置文件存在，备份它
-        if os.path.exists(self.original_config):
-            import shutil
-            shutil.copy2(self.original_config, self.temp_config)
-            os.remove(self.original_config)
+        self.temp_home = tempfile.mkdtemp()
+        self.env_patch = patch.dict(os.environ, {'PDF_TOOL_HOME': self.temp_home})
+        self.env_patch.start()
+        executable_detector._global_detector = None
     
     def tearDown(self):
         """
-        测试后清理，恢复原始配置文件
+        测试后清理，恢复环境变量并删除临时目录
         """
-        # 删除测试生成的配置文件
-        if os.path.exists(self.original_config):
-            os.remove(self.original_config)
-        
-        # 恢复原始配置文件
-        if os.path.exists(self.temp_config):
-            import shutil
-            shutil.copy2(self.temp_config, self.original_config)
-            os.remove(self.temp_config)
+        executable_detector._global_detector = None
+        self.env_patch.stop()
+        import shutil
+        shutil.rmtree(self.temp_home, ignore_errors=True)
+    
+    def test_global_detector_is_lazy(self):
+        """
+        测试全局检测器在首次使用时才创建，并使用用户级配置目录
+        """
+        self.assertIsNone(executable_detector._global_detector)
+        detector = executable_detector.global_detector
+        self.assertIs(detector, executable_detector.get_global_detector())
+        self.assertEqual(
+            detector.config_file,
+            os.path.join(self.temp_home, 'executable_paths.json')
+        )
     
     def test_global_detect_executable(self):
         """
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import tempfile
+import subprocess
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import capability_probe
+
+
+def _slow_ok():
+    time.sleep(0.2)
+    return {'version': '1.0'}
+
+
+def _broken():
+    raise ImportError("No module named 'engine'")
+
+
+def test_probes_run_concurrently_and_report_errors():
+    probes = {'a': _slow_ok, 'b': _slow_ok, 'c': _slow_ok, 'broken': _broken}
+    with patch.dict(capability_probe.PROBES, probes, clear=True):
+        start = time.perf_counter()
+        report = capability_probe.probe_capabilities()
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert report['engines']['a'] == {'available': True, 'error': None, 'version': '1.0',
+                                      'latency': report['engines']['a']['latency']}
+    assert report['engines']['a']['latency'] >= 0.2
+    assert report['engines']['broken']['available'] is False
+    assert 'ImportError' in report['engines']['broken']['error']
+
+
+def test_report_is_cached():
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_file = os.path.join(temp_dir, 'capabilities.json')
+        with patch.dict(capability_probe.PROBES, {'engine': probe}, clear=True):
+            first = capability_probe.get_capability_report(report_file=report_file)
+            second = capability_probe.get_capability_report(report_file=report_file)
+            assert first == second
+            assert len(calls) == 1
+
+            capability_probe.get_capability_report(report_file=report_file, max_age=-1)
+            assert len(calls) == 2
+
+            capability_probe.get_capability_report(report_file=report_file, force=True)
+            assert len(calls) == 3
+
+
+def test_timed_out_probe_does_not_block_exit():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    script = (
+        "import sys, time; sys.path.insert(0, %r)\n"
+        "import capability_probe\n"
+        "capability_probe.PROBES = {'stuck': lambda: time.sleep(60)}\n"
+        "report = capability_probe.probe_capabilities(timeout=0.2)\n"
+        "print(report['engines']['stuck']['available'])\n" % root
+    )
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+    assert time.perf_counter() - start < 20
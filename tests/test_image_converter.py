@@ -0,0 +1,233 @@
+import sys
+import os
+import time
+
+import pytest
+from PIL import Image
+from pypdf import PdfReader
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import image_converter
+from src.core.image_converter import ImageConverter
+
+
+@pytest.fixture(autouse=True)
+def _isolated_data_dir(tmp_path, monkeypatch):
+    # 元数据索引写入临时目录，而不是用户目录
+    monkeypatch.setenv('PDF_TOOL_HOME', str(tmp_path / 'pdf_tool_home'))
+
+
+def _make_images(directory):
+    paths = []
+    for i, (mode, color) in enumerate([('RGB', (255, 0, 0)), ('RGBA', (0, 255, 0, 128)),
+                                       ('L', 128), ('RGBA', (0, 0, 255, 0))]):
+        ext = 'jpg' if mode in ('RGB', 'L') else 'png'
+        path = os.path.join(directory, f"img{i}.{ext}")
+        Image.new(mode, (40 + i * 10, 30), color).save(path)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_merge_keeps_input_order(tmp_path, max_workers):
+    paths = _make_images(str(tmp_path))
+    output = str(tmp_path / "out.pdf")
+    progress = []
+
+    ImageConverter.convert(paths, output, progress_callback=progress.append, max_workers=max_workers)
+
+    widths = [round(float(page.mediabox.width)) for page in PdfReader(output).pages]
+    expected = [round((40 + i * 10) * 72 / 96) for i in range(len(paths))]
+    assert widths == expected
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+def test_missing_and_broken_images_are_skipped(tmp_path):
+    paths = _make_images(str(tmp_path))
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    output = str(tmp_path / "out.pdf")
+
+    ImageConverter.convert([paths[0], str(tmp_path / "missing.jpg"), str(broken), paths[1]], output,
+                           max_workers=2, max_inflight_mb=0)
+
+    assert len(PdfReader(output).pages) == 2
+
+
+def test_no_valid_images_raises(tmp_path):
+    with pytest.raises(ValueError):
+        ImageConverter.convert([str(tmp_path / "missing.jpg")], str(tmp_path / "out.pdf"))
+
+
+def test_transparent_images_are_flattened_losslessly(tmp_path):
+    source = Image.new('RGBA', (64, 48), (0, 0, 0, 0))
+    for x in range(64):
+        for y in range(48):
+            source.putpixel((x, y), (x * 4, y * 5, 200, (x * y) % 256))
+    path = str(tmp_path / "alpha.png")
+    source.save(path)
+    output = str(tmp_path / "out.pdf")
+
+    ImageConverter.convert([path], output, max_workers=1)
+
+    expected = Image.new('RGB', source.size, (255, 255, 255))
+    expected.paste(source, mask=source.split()[3])
+    page = PdfReader(output).pages[0]
+    xobject = next(iter(page['/Resources']['/XObject'].values())).get_object()
+    assert xobject['/Filter'] == '/FlateDecode'
+    assert page.images[0].image.convert('RGB').tobytes() == expected.tobytes()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.jpg')]
+
+
+def test_jpeg_alpha_encoding_is_opt_in(tmp_path):
+    path = str(tmp_path / "alpha.png")
+    Image.new('RGBA', (32, 32), (10, 20, 30, 100)).save(path)
+    output = str(tmp_path / "out.pdf")
+
+    ImageConverter.convert([path], output, max_workers=1, alpha_encoding="jpeg")
+
+    xobject = next(iter(PdfReader(output).pages[0]['/Resources']['/XObject'].values())).get_object()
+    assert xobject['/Filter'] == '/DCTDecode'
+
+
+def test_page_size_orientation_and_margin(tmp_path):
+    path = str(tmp_path / "photo.jpg")
+    Image.new('RGB', (400, 300), (10, 20, 30)).save(path)
+
+    output = str(tmp_path / "auto.pdf")
+    ImageConverter.convert([path], output, page_size="A4", margin=10, max_workers=1)
+    box = PdfReader(output).pages[0].mediabox
+    assert (round(float(box.width)), round(float(box.height))) == (842, 595)
+
+    output = str(tmp_path / "portrait.pdf")
+    ImageConverter.convert([path], output, page_size="A4", orientation="portrait", max_workers=1)
+    box = PdfReader(output).pages[0].mediabox
+    assert (round(float(box.width)), round(float(box.height))) == (595, 842)
+
+    with pytest.raises(ValueError):
+        ImageConverter.convert([path], output, page_size="B52")
+
+
+def test_target_dpi_downsamples_only(tmp_path):
+    large = str(tmp_path / "large.jpg")
+    Image.new('RGB', (4000, 3000), (200, 100, 50)).save(large)
+    small = str(tmp_path / "small.png")
+    Image.new('RGB', (200, 150), (1, 2, 3)).save(small)
+    output = str(tmp_path / "out.pdf")
+
+    ImageConverter.convert([large, small], output, page_size="A4", margin=10, target_dpi=150, max_workers=1)
+
+    pages = PdfReader(output).pages
+    # 277 x 190 mm printable area; a 4:3 image is limited by height -> 253.3 mm wide
+    assert abs(pages[0].images[0].image.size[0] - 1496) <= 1
+    assert pages[1].images[0].image.size == (200, 150)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_single_mode_names_do_not_collide(tmp_path, max_workers):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    first = str(tmp_path / "a" / "page.png")
+    second = str(tmp_path / "b" / "page.jpg")
+    Image.new('RGB', (40, 30), (255, 0, 0)).save(first)
+    Image.new('RGB', (80, 30), (0, 0, 255)).save(second)
+
+    ImageConverter.convert([first, second], str(out_dir), convert_mode="single", max_workers=max_workers)
+
+    assert sorted(name for name in os.listdir(out_dir) if name.endswith('.pdf')) == ["page (2).pdf", "page.pdf"]
+    assert round(float(PdfReader(str(out_dir / "page.pdf")).pages[0].mediabox.width)) == 30
+    assert round(float(PdfReader(str(out_dir / "page (2).pdf")).pages[0].mediabox.width)) == 60
+
+    # 再次运行时沿用同样的文件名，不会生成 "page (3).pdf"
+    ImageConverter.convert([second], str(out_dir), convert_mode="single", max_workers=max_workers)
+    assert sorted(name for name in os.listdir(out_dir) if name.endswith('.pdf')) == ["page (2).pdf", "page.pdf"]
+
+
+def test_single_mode_only_changed(tmp_path):
+    paths = _make_images(str(tmp_path))
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    ImageConverter.convert(paths, str(out_dir), convert_mode="single", max_workers=2)
+    mtimes = {name: os.stat(out_dir / name).st_mtime_ns for name in os.listdir(out_dir) if name.endswith('.pdf')}
+    assert len(mtimes) == len(paths)
+
+    # 修改其中一张图片并删除另一张的输出，只有这两张会被重新转换
+    Image.new('RGB', (99, 30), (0, 0, 0)).save(paths[0])
+    os.remove(out_dir / "img1.pdf")
+    ImageConverter.convert(paths, str(out_dir), convert_mode="single", only_changed=True, max_workers=2)
+
+    new_mtimes = {name: os.stat(out_dir / name).st_mtime_ns for name in mtimes}
+    assert new_mtimes["img2.pdf"] == mtimes["img2.pdf"]
+    assert new_mtimes["img3.pdf"] == mtimes["img3.pdf"]
+    assert round(float(PdfReader(str(out_dir / "img0.pdf")).pages[0].mediabox.width)) == round(99 * 72 / 96)
+    assert os.path.exists(out_dir / "img1.pdf")
+
+    # 改变转换参数后全部重新转换
+    ImageConverter.convert(paths, str(out_dir), convert_mode="single", only_changed=True, margin=5)
+    assert os.stat(out_dir / "img2.pdf").st_mtime_ns != mtimes["img2.pdf"]
+
+
+def test_multi_frame_tiff_pages_are_merged_in_order(tmp_path):
+    tiff = str(tmp_path / "fax.tif")
+    frames = [Image.new('1', (100 + i * 20, 50), 1) for i in range(3)]
+    frames[0].save(tiff, save_all=True, append_images=frames[1:], compression='group4', dpi=(72, 72))
+    jpg = str(tmp_path / "photo.jpg")
+    Image.new('RGB', (72, 72), (255, 0, 0)).save(jpg, dpi=(72, 72))
+    output = str(tmp_path / "out.pdf")
+
+    ImageConverter.convert([tiff, jpg], output, max_workers=2)
+
+    widths = [round(float(page.mediabox.width)) for page in PdfReader(output).pages]
+    assert widths == [100, 120, 140, 72]
+
+
+def test_merge_shares_identical_images(tmp_path):
+    logo = str(tmp_path / "logo.png")
+    Image.new('RGBA', (50, 40), (10, 20, 30, 128)).save(logo)
+    copy = str(tmp_path / "logo_copy.png")
+    with open(logo, 'rb') as src, open(copy, 'wb') as dst:
+        dst.write(src.read())
+    photo = str(tmp_path / "photo.jpg")
+    Image.new('RGB', (60, 40), (200, 100, 0)).save(photo)
+    output = str(tmp_path / "out.pdf")
+    stats = {}
+
+    ImageConverter.convert([logo, photo, copy, logo], output, stats=stats, max_workers=2)
+
+    reader = PdfReader(output)
+    xobjects = [page['/Resources']['/XObject']['/Im0'].indirect_reference.idnum for page in reader.pages]
+    assert len(xobjects) == 4
+    assert xobjects[0] == xobjects[2] == xobjects[3] != xobjects[1]
+    assert stats['pages'] == 4
+    assert stats['deduplicated_streams'] == 2
+    assert stats['deduplicated_bytes'] > 0
+
+
+def _slow_first(path, options):
+    if path == "0":
+        time.sleep(1)
+    return path
+
+
+def test_parallel_prepare_waits_on_first_image_without_spinning(monkeypatch):
+    waits = []
+    real_wait = image_converter.wait
+
+    def counting_wait(futures, **kwargs):
+        waits.append(len(futures))
+        return real_wait(futures, **kwargs)
+    monkeypatch.setattr(image_converter, 'wait', counting_wait)
+    paths = [str(i) for i in range(4)]
+    infos = [({'width': 10, 'height': 10}, None)] * len(paths)
+
+    results = list(image_converter._iter_prepared(paths, {}, infos, max_workers=2, task=_slow_first))
+
+    assert [result for _, result, _ in results] == paths
+    # 后面的图片先完成时也只阻塞等待第一张，而不是反复空转
+    assert len(waits) <= len(paths)
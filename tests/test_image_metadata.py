@@ -0,0 +1,81 @@
+import sys
+import os
+
+from PIL import Image, ImageFile
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import image_metadata
+from src.core.image_metadata import ImageMetadataIndex, read_image_info
+
+
+def test_read_image_info_does_not_decode(tmp_path, monkeypatch):
+    path = str(tmp_path / "photo.png")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new('RGBA', (120, 80)).save(path, dpi=(300, 300), exif=exif)
+
+    def fail_load(self):
+        raise AssertionError("pixels decoded")
+    monkeypatch.setattr(ImageFile.ImageFile, 'load', fail_load)
+
+    info = read_image_info(path)
+    assert (info['width'], info['height']) == (120, 80)
+    assert info['dpi'] == [300, 300]
+    assert info['orientation'] == 6
+    assert info['has_alpha'] is True
+
+
+def test_index_reuses_entries_until_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "a.jpg")
+    index_file = str(tmp_path / "index.json")
+    Image.new('RGB', (40, 30)).save(path)
+
+    first = ImageMetadataIndex(index_file)
+    info, error = first.lookup(path)
+    assert error is None and info['width'] == 40
+    first.save()
+
+    calls = []
+    real_read = image_metadata.read_image_info
+    monkeypatch.setattr(image_metadata, 'read_image_info', lambda p: calls.append(p) or real_read(p))
+
+    assert ImageMetadataIndex(index_file).lookup(path) == (info, None)
+    assert calls == []
+
+    Image.new('RGB', (64, 30)).save(path)
+    os.utime(path, ns=(0, 10 ** 9))
+    info, error = ImageMetadataIndex(index_file).lookup(path)
+    assert info['width'] == 64
+    assert len(calls) == 1
+
+
+def test_index_reports_missing_and_broken_files(tmp_path):
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    index = ImageMetadataIndex(str(tmp_path / "index.json"))
+
+    assert index.lookup(str(tmp_path / "missing.png")) == (None, "文件不存在")
+    info, error = index.lookup(str(broken))
+    assert info is None and error
+
+
+def test_index_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_metadata, 'MAX_INDEX_ENTRIES', 2)
+    paths = []
+    for name in ("a", "b", "c"):
+        paths.append(str(tmp_path / f"{name}.png"))
+        Image.new('RGB', (10, 10)).save(paths[-1])
+    index_file = str(tmp_path / "index.json")
+
+    index = ImageMetadataIndex(index_file)
+    index.lookup_all(paths[:2])
+    index.save()
+
+    # a 被再次使用，写入 c 时淘汰最久未使用的 b
+    index = ImageMetadataIndex(index_file)
+    index.lookup_all([paths[0], paths[2]])
+    index.save()
+
+    assert sorted(ImageMetadataIndex(index_file)._entries) == [paths[0], paths[2]]
@@ -0,0 +1,190 @@
+import sys
+import os
+import io
+
+import img2pdf
+import pytest
+from PIL import Image, ImageDraw
+from pypdf import PdfReader
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.image_pdf_writer import ImagePdfWriter, iter_image_frames
+
+
+def _gradient(mode, size=(37, 23)):
+    img = Image.new('RGB', size)
+    img.putdata([((x * 7) % 256, (y * 11) % 256, (x * y) % 256)
+                 for y in range(size[1]) for x in range(size[0])])
+    return img.convert(mode)
+
+
+def _make_images(directory):
+    paths = []
+    exif = Image.Exif()
+    exif[274] = 6  # rotated 90 degrees
+    for name, mode, kwargs in [('rgb.png', 'RGB', {}), ('gray.png', 'L', {}), ('palette.png', 'P', {}),
+                               ('bilevel.png', '1', {}), ('photo.jpg', 'RGB', {'dpi': (300, 300)}),
+                               ('rotated.jpg', 'RGB', {'exif': exif}), ('scan.tiff', 'RGB', {}),
+                               ('interlaced.png', 'RGB', {'interlace': 1})]:
+        path = os.path.join(directory, name)
+        _gradient(mode).save(path, **kwargs)
+        paths.append(path)
+    return paths
+
+
+def test_pages_match_img2pdf_layout(tmp_path):
+    paths = _make_images(str(tmp_path))
+    output = tmp_path / "out.pdf"
+    with open(output, 'wb') as f:
+        with ImagePdfWriter(f) as writer:
+            for path in paths:
+                writer.add_image(path)
+
+    expected = PdfReader(io.BytesIO(img2pdf.convert(paths, rotation=img2pdf.Rotation.ifvalid)))
+    actual = PdfReader(str(output), strict=True)
+    assert len(actual.pages) == len(paths)
+    for exp_page, page in zip(expected.pages, actual.pages):
+        assert [round(float(v), 2) for v in page.mediabox] == [round(float(v), 2) for v in exp_page.mediabox]
+        assert page.rotation == exp_page.rotation
+
+
+def test_lossless_images_round_trip(tmp_path):
+    paths = _make_images(str(tmp_path))
+    # pypdf decodes 1-bit images with a PNG predictor incorrectly, so bilevel.png is left out here
+    lossless = [path for path in paths if not path.endswith(('.jpg', 'bilevel.png'))]
+    output = tmp_path / "out.pdf"
+    with open(output, 'wb') as f:
+        with ImagePdfWriter(f) as writer:
+            for path in lossless:
+                writer.add_image(path)
+
+    for path, page in zip(lossless, PdfReader(str(output)).pages):
+        with Image.open(path) as source:
+            assert page.images[0].image.convert('RGB').tobytes() == source.convert('RGB').tobytes()
+
+
+def test_pages_are_written_before_close(tmp_path):
+    buffer = io.BytesIO()
+    writer = ImagePdfWriter(buffer)
+    header_size = len(buffer.getvalue())
+
+    writer.add_image(_make_images(str(tmp_path))[0])
+    assert len(buffer.getvalue()) > header_size
+    assert writer.page_count == 1
+
+    writer.close()
+    assert buffer.getvalue().endswith(b"%%EOF\n")
+
+
+def _fax_frames(count):
+    frames = []
+    for i in range(count):
+        img = Image.new('1', (200 + i * 8, 120), 1)
+        ImageDraw.Draw(img).rectangle([10 + i * 5, 20, 90, 60 + i * 4], fill=0)
+        frames.append(img)
+    return frames
+
+
+def test_multi_frame_tiff_reuses_ccitt_data(tmp_path):
+    path = str(tmp_path / "fax.tif")
+    frames = _fax_frames(3)
+    frames[0].save(path, save_all=True, append_images=frames[1:], compression='group4', dpi=(200, 200))
+
+    buffer = io.BytesIO()
+    with ImagePdfWriter(buffer) as writer:
+        assert writer.add_image(path) == 3
+
+    reader = PdfReader(io.BytesIO(buffer.getvalue()))
+    assert len(reader.pages) == 3
+    with Image.open(path) as source:
+        for i, page in enumerate(reader.pages):
+            xobject = page['/Resources']['/XObject']['/Im0'].get_object()
+            assert xobject['/Filter'] == '/CCITTFaxDecode'
+            source.seek(i)
+            offset, length = source.tag_v2[273][0], source.tag_v2[279][0]
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                assert xobject._data == f.read(length)
+            assert round(float(page.mediabox.width)) == round(source.size[0] * 72 / 200)
+
+
+def test_multi_frame_gif_becomes_pages(tmp_path):
+    path = str(tmp_path / "anim.gif")
+    frames = [Image.new('RGB', (30, 20), (i * 60, 0, 255 - i * 60)) for i in range(4)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+
+    buffer = io.BytesIO()
+    with ImagePdfWriter(buffer) as writer:
+        assert writer.add_image(path) == 4
+    assert len(PdfReader(io.BytesIO(buffer.getvalue())).pages) == 4
+
+
+def test_failed_image_adds_no_pages(tmp_path):
+    buffer = io.BytesIO()
+    with ImagePdfWriter(buffer) as writer:
+        png = io.BytesIO()
+        _gradient('RGB').save(png, 'PNG')
+        writer.add_image(png.getvalue())
+        try:
+            writer.add_image(b"not an image")
+        except Exception:
+            pass
+    assert len(PdfReader(io.BytesIO(buffer.getvalue())).pages) == 1
+
+
+@pytest.mark.parametrize("seekable", [True, False])
+def test_interrupted_stream_keeps_offsets_valid(tmp_path, seekable):
+    path = str(tmp_path / "photo.jpg")
+    _gradient('RGB', (400, 300)).save(path)
+    xobject = next(iter_image_frames(path))
+    assert xobject.get('source_path') == path
+    # 文件在复制途中被截断
+    truncated = dict(xobject, length=xobject['length'] + 4096)
+
+    class Unseekable(io.BytesIO):
+        def seekable(self):
+            return False
+
+    buffer = io.BytesIO() if seekable else Unseekable()
+    # 不去重：去重时先计算内容哈希，截断在写入前就会被发现
+    writer = ImagePdfWriter(buffer, dedupe=False)
+    writer.add_image(path)
+    with pytest.raises(ValueError, match="截断"):
+        writer.write_xobject(truncated)
+
+    if not seekable:
+        # 不能回退时不再继续写入，而不是生成交叉引用表错误的文件
+        with pytest.raises(IOError):
+            writer.add_image(path)
+        return
+    writer.add_image(path)
+    writer.close()
+    reader = PdfReader(io.BytesIO(buffer.getvalue()), strict=True)
+    assert len(reader.pages) == 2
+    for idnum in range(1, len(writer._offsets)):
+        reader.get_object(idnum)
+
+
+def test_multi_strip_ccitt_frame_renders_exactly(tmp_path):
+    import fitz  # PyMuPDF
+
+    path = str(tmp_path / "tall.tif")
+    img = Image.new('1', (1728, 1200), 1)
+    draw = ImageDraw.Draw(img)
+    for y in range(0, 1200, 41):
+        draw.line([0, y, 1728, y + 250], fill=0, width=3)
+    img.save(path, compression='group4', dpi=(72, 72))
+    with Image.open(path) as source:
+        assert len(source.tag_v2[273]) > 1
+        expected = source.convert('L').tobytes()
+
+    buffer = io.BytesIO()
+    with ImagePdfWriter(buffer) as writer:
+        writer.add_image(path)
+
+    doc = fitz.open('pdf', buffer.getvalue())
+    pix = doc[0].get_pixmap(colorspace=fitz.csGRAY)
+    assert (pix.width, pix.height) == (1728, 1200)
+    assert pix.samples == expected
@@ -0,0 +1,403 @@
+import sys
+import os
+import io
+import threading
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image, ImageChops
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import pdf_converter
+from src.core.pdf_converter import PdfConverter
+
+
+def _make_pdf(path, pages=7):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=200 + i * 10, height=300)
+        page.insert_text((20, 50), f"Page {i + 1}", fontsize=24)
+        page.draw_rect(fitz.Rect(20, 80, 60 + i * 15, 120), color=(1, 0, 0), fill=(0, 0, 1))
+    doc.save(path)
+    doc.close()
+
+
+@pytest.mark.parametrize("image_format", ["png", "jpg"])
+def test_to_images_parallel_matches_serial(tmp_path, image_format):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    serial_dir = str(tmp_path / "serial")
+    parallel_dir = str(tmp_path / "parallel")
+    progress = []
+
+    serial = PdfConverter.to_images(pdf, serial_dir, image_format=image_format, dpi=72, max_workers=1)
+    parallel = PdfConverter.to_images(pdf, parallel_dir, image_format=image_format, dpi=72, max_workers=2,
+                                      progress_callback=progress.append)
+
+    names = [f"doc_page_{i}.{image_format}" for i in range(1, 8)]
+    assert [os.path.basename(p) for p in serial] == names
+    assert [os.path.basename(p) for p in parallel] == names
+    for a, b in zip(serial, parallel):
+        with open(a, 'rb') as fa, open(b, 'rb') as fb:
+            assert fa.read() == fb.read()
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+@pytest.mark.parametrize("image_format, pil_format", [("webp", "WEBP"), ("tif", "TIFF"), ("tiff", "TIFF")])
+def test_to_images_other_formats(tmp_path, image_format, pil_format):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=2)
+
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format=image_format, dpi=72, max_workers=1)
+
+    assert [os.path.basename(p) for p in outputs] == [f"doc_page_1.{image_format}", f"doc_page_2.{image_format}"]
+    with Image.open(outputs[1]) as img:
+        assert img.format == pil_format
+        assert img.size == (210, 300)
+
+
+def test_to_images_encode_options(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+
+    high = PdfConverter.to_images(pdf, str(tmp_path / "high"), image_format="jpg", max_workers=1)
+    low = PdfConverter.to_images(pdf, str(tmp_path / "low"), image_format="jpg", max_workers=1,
+                                 encode_options={'quality': 30})
+
+    assert os.path.getsize(low[0]) < os.path.getsize(high[0])
+    with pytest.raises(ValueError):
+        PdfConverter.to_images(pdf, str(tmp_path / "bad"), image_format="bmp")
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_iter_images_page_selection(tmp_path, max_workers):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+
+    pages = list(PdfConverter.iter_images(pdf, pages="6-7, 2", dpi=72, max_workers=max_workers))
+
+    assert [page_no for page_no, _ in pages] == [6, 7, 2]
+    with Image.open(io.BytesIO(pages[0][1])) as img:
+        assert img.size == (250, 300)
+    with pytest.raises(ValueError):
+        PdfConverter.iter_images(pdf, pages=[8])
+
+
+def test_iter_images_stops_early(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    cancel = threading.Event()
+
+    seen = []
+    for page_no, _ in PdfConverter.iter_images(pdf, dpi=72, max_workers=2, cancel_event=cancel):
+        seen.append(page_no)
+        if page_no == 3:
+            cancel.set()
+    assert seen == [1, 2, 3]
+
+    images = PdfConverter.iter_images(pdf, dpi=72, max_workers=2)
+    assert next(images)[0] == 1
+    images.close()
+
+
+def test_image_shards_are_bounded_by_page_count():
+    pages = list(range(1, 1001))
+
+    shards = pdf_converter._page_shards(pages, 2, max_pages=pdf_converter.IMAGE_SHARD_PAGES)
+
+    assert [page for shard in shards for page in shard] == pages
+    assert max(len(shard) for shard in shards) == pdf_converter.IMAGE_SHARD_PAGES
+    assert len(pdf_converter._page_shards(pages, 2)[0]) == 125
+
+
+def test_to_images_with_page_selection(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), dpi=72, pages=[3, 5], max_workers=1)
+
+    assert [os.path.basename(p) for p in outputs] == ["doc_page_3.png", "doc_page_5.png"]
+    assert sorted(os.listdir(tmp_path / "out")) == ["doc_page_3.png", "doc_page_5.png"]
+
+
+def _docx_text(path):
+    from docx import Document
+    
+    return '\n'.join(paragraph.text for paragraph in Document(path).paragraphs)
+
+
+def test_to_word_page_range_reports_each_page(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=5)
+    output = str(tmp_path / "out.docx")
+    progress = []
+    
+    PdfConverter.to_word(pdf, output, progress_callback=progress.append, pages="2-4")
+    
+    text = _docx_text(output)
+    assert "Page 2" in text and "Page 4" in text
+    assert "Page 1" not in text and "Page 5" not in text
+    assert progress == [30, 60, 90, 100]
+
+
+@pytest.mark.parametrize("pages", ["", []])
+@pytest.mark.parametrize("multi_processing", [False, True])
+def test_to_word_rejects_empty_selection(tmp_path, pages, multi_processing):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=2)
+    output = str(tmp_path / "out.docx")
+
+    with pytest.raises(ValueError):
+        PdfConverter.to_word(pdf, output, pages=pages, multi_processing=multi_processing)
+    assert not os.path.exists(output)
+
+
+def test_to_word_chunks_are_joined_in_order(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=5)
+    output = str(tmp_path / "out.docx")
+    progress = []
+    
+    PdfConverter.to_word(pdf, output, progress_callback=progress.append, chunk_pages=2, cpu_count=2)
+    
+    text = _docx_text(output)
+    positions = [text.index(f"Page {i}") for i in range(1, 6)]
+    assert positions == sorted(positions)
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+def test_to_images_tiled_tiff_matches_full_render(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=2)
+    progress = []
+    
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "tiled"), image_format="tiff", dpi=150, tile_size=64,
+                                     progress_callback=progress.append)
+    
+    assert [os.path.basename(p) for p in outputs] == ["doc_page_1.tiff", "doc_page_2.tiff"]
+    with fitz.open(pdf) as doc:
+        pix = doc[1].get_pixmap(matrix=fitz.Matrix(150 / 72, 150 / 72))
+        full = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    with Image.open(outputs[1]) as img:
+        assert img.tag_v2[322] == img.tag_v2[323] == 64
+        assert img.size == full.size
+        # 分块边界上的抗锯齿可能有细微差别
+        diff = ImageChops.difference(img.convert("RGB"), full)
+        assert max(high for _, high in diff.getextrema()) <= 16
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+def test_to_images_tiles_as_separate_images(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+    
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "tiles"), image_format="png", dpi=72, tile_size=128)
+    
+    # 200x300 像素的页面分为 2 列 3 行
+    names = [os.path.basename(p) for p in outputs]
+    assert names == [f"doc_page_1_tile_{row}_{col}.png" for row in (1, 2, 3) for col in (1, 2)]
+    with Image.open(outputs[-1]) as img:
+        assert img.size == (200 - 128, 300 - 256)
+
+
+@pytest.mark.parametrize("image_format, tile_size, encode_options", [
+    ("png", None, None), ("png", None, {'compress_level': 9}), ("tiff", None, None), ("tiff", 64, None),
+    ("webp", None, {'lossless': True})])
+@pytest.mark.parametrize("colorspace", ["rgb", "gray"])
+def test_to_images_alpha_is_not_premultiplied(tmp_path, image_format, tile_size, encode_options, colorspace):
+    pdf = str(tmp_path / "doc.pdf")
+    doc = fitz.open()
+    page = doc.new_page(width=100, height=100)
+    page.draw_rect(page.rect, color=None, fill=(1, 0, 0), fill_opacity=0.5)
+    doc.save(pdf)
+    # 参考值：PyMuPDF 自己编码的PNG（非预乘）
+    cs = fitz.csRGB if colorspace == "rgb" else fitz.csGRAY
+    with Image.open(io.BytesIO(page.get_pixmap(colorspace=cs, alpha=True).tobytes("png"))) as img:
+        mode = img.mode
+        expected = img.getpixel((10, 10))
+    doc.close()
+    
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format=image_format, dpi=72,
+                                     encode_options=encode_options, tile_size=tile_size, colorspace=colorspace,
+                                     alpha=True, max_workers=1)
+    
+    with Image.open(outputs[0]) as img:
+        # WebP 没有灰度模式，灰度图片保存为 RGBA
+        pixel = img.convert(mode).getpixel((10, 10))
+        assert img.mode in (mode, "RGBA")
+    assert mode in ("RGBA", "LA") and expected[-1] < 200
+    assert all(abs(a - b) <= 2 for a, b in zip(pixel, expected))
+
+
+def test_to_images_rejects_invalid_tile_size(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+    
+    with pytest.raises(ValueError):
+        PdfConverter.to_images(pdf, str(tmp_path / "out"), tile_size=100)
+
+
+@pytest.mark.parametrize("image_format, colorspace, alpha, mode", [
+    ("png", "gray", False, "L"),
+    ("png", "rgb", True, "RGBA"),
+    ("jpg", "cmyk", False, "CMYK"),
+    ("png", "bilevel", False, "1"),
+])
+def test_to_images_colorspaces(tmp_path, image_format, colorspace, alpha, mode):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=2)
+
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format=image_format, dpi=72, max_workers=1,
+                                     colorspace=colorspace, alpha=alpha)
+
+    with Image.open(outputs[0]) as img:
+        assert img.mode == mode
+        assert img.size == (200, 300)
+
+
+def test_to_images_bilevel_threshold_and_g4_tiff(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format="tif", dpi=72, max_workers=1,
+                                     colorspace="bilevel", threshold=200)
+
+    with fitz.open(pdf) as doc:
+        pix = doc[0].get_pixmap(colorspace=fitz.csGRAY)
+        expected = Image.frombytes("L", (pix.width, pix.height), pix.samples).point(lambda v: 255 if v >= 200 else 0)
+    with Image.open(outputs[0]) as img:
+        assert img.info["compression"] == "group4"
+        assert img.convert("L").tobytes() == expected.tobytes()
+
+
+def test_to_images_tiled_bilevel_tiff(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+
+    outputs = PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format="tiff", dpi=72, tile_size=64,
+                                     colorspace="bilevel")
+
+    with Image.open(outputs[0]) as img:
+        assert img.mode == "1"
+        assert img.size == (200, 300)
+        assert img.tag_v2[322] == 64
+
+
+@pytest.mark.parametrize("image_format, colorspace, alpha", [("png", "cmyk", False), ("webp", "cmyk", False),
+                                                             ("tiff", "bilevel", True), ("png", "lab", False),
+                                                             ("tiff", "cmyk", True), ("jpeg", "cmyk", True)])
+def test_to_images_rejects_unsupported_colorspace(tmp_path, image_format, colorspace, alpha):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+
+    with pytest.raises(ValueError):
+        PdfConverter.to_images(pdf, str(tmp_path / "out"), image_format=image_format, colorspace=colorspace,
+                               alpha=alpha)
+
+
+def _stitch(pdf, width, spacing, mode="RGB"):
+    """参考实现：逐页缩放到相同宽度后用PIL拼接"""
+    strips = []
+    with fitz.open(pdf) as doc:
+        for page in doc:
+            zoom = width / page.rect.width
+            cs = fitz.csGRAY if mode == "L" else fitz.csRGB
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=cs)
+            img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+            canvas = Image.new(mode, (width, pix.height), "white")
+            canvas.paste(img, (0, 0))
+            strips.append(canvas)
+    height = sum(strip.height for strip in strips) + spacing * (len(strips) - 1)
+    result = Image.new(mode, (width, height), "white")
+    top = 0
+    for strip in strips:
+        result.paste(strip, (0, top))
+        top += strip.height + spacing
+    return result
+
+
+@pytest.mark.parametrize("colorspace, mode", [("rgb", "RGB"), ("gray", "L")])
+def test_to_long_image_png_matches_stitched_pages(tmp_path, colorspace, mode):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=3)
+    output = str(tmp_path / "long.png")
+    progress = []
+    
+    outputs = PdfConverter.to_long_image(pdf, output, dpi=72, spacing=10, colorspace=colorspace,
+                                         progress_callback=progress.append)
+    
+    assert outputs == [output]
+    expected = _stitch(pdf, 220, 10, mode)
+    with Image.open(output) as img:
+        assert img.mode == mode
+        assert img.size == expected.size
+        assert img.tobytes() == expected.tobytes()
+    assert progress == [33, 66, 100]
+
+
+def test_to_long_image_splits_segments_between_pages(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=3)
+    
+    outputs = PdfConverter.to_long_image(pdf, str(tmp_path / "long.jpg"), width=200, spacing=10, max_height=700)
+    
+    assert [os.path.basename(p) for p in outputs] == ["long_part_1.jpg", "long_part_2.jpg"]
+    sizes = []
+    for path in outputs:
+        with Image.open(path) as img:
+            assert img.format == "JPEG"
+            sizes.append(img.size)
+    heights = [round(300 * 200 / (200 + i * 10)) for i in range(3)]
+    assert sizes == [(200, heights[0] + 10 + heights[1]), (200, heights[2])]
+
+
+def test_to_long_image_splits_tall_page(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+    output = str(tmp_path / "long.png")
+    
+    outputs = PdfConverter.to_long_image(pdf, output, dpi=72, max_height=128)
+    
+    assert len(outputs) == 3
+    parts = []
+    for path in outputs:
+        with Image.open(path) as img:
+            parts.append(img.convert("RGB"))
+    assert [part.height for part in parts] == [128, 128, 44]
+    expected = _stitch(pdf, 200, 0)
+    assert b"".join(part.tobytes() for part in parts) == expected.tobytes()
+
+
+@pytest.mark.parametrize("colorspace, heights", [("rgb", [64, 64, 64, 64, 44]), ("gray", [192, 108])])
+def test_to_long_image_jpeg_segments_within_byte_budget(tmp_path, monkeypatch, colorspace, heights):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+    monkeypatch.setattr(pdf_converter, "LONG_IMAGE_JPEG_SEGMENT_BYTES", 200 * 3 * 64)
+    
+    outputs = PdfConverter.to_long_image(pdf, str(tmp_path / "long.jpg"), dpi=72, colorspace=colorspace)
+    
+    sizes = []
+    for path in outputs:
+        with Image.open(path) as img:
+            sizes.append(img.size)
+    assert sizes == [(200, height) for height in heights]
+
+
+def test_to_long_image_cancel_removes_output(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=3)
+    cancel = threading.Event()
+    
+    def progress(value):
+        cancel.set()
+    
+    outputs = PdfConverter.to_long_image(pdf, str(tmp_path / "long.png"), dpi=72, progress_callback=progress,
+                                         cancel_event=cancel)
+    
+    assert outputs == []
+    assert not os.path.exists(tmp_path / "long.png")
@@ -0,0 +1,329 @@
+import sys
+import os
+import io
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pdf_merger import PdfMerger
+
+
+def _logo():
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, (60, 90, 3), dtype=np.uint8)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def _make_template_pdfs(directory, count, pages=2):
+    """同一模板生成的PDF：相同的嵌入字体和图片，不同的文字"""
+    logo = _logo()
+    font = fitz.Font('tiro').buffer
+    paths = []
+    for i in range(count):
+        doc = fitz.open()
+        for p in range(pages):
+            page = doc.new_page(width=300, height=400)
+            page.insert_font(fontname='F0', fontbuffer=font)
+            page.insert_image(fitz.Rect(20, 20, 110, 80), stream=logo)
+            page.insert_text((20, 200), f"Invoice {i} page {p + 1}", fontname='F0', fontsize=12)
+        path = str(directory / f"invoice_{i}.pdf")
+        doc.save(path, deflate=True)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def test_merge_adds_bookmarks(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 3)
+    output = str(tmp_path / "merged.pdf")
+    progress = []
+
+    assert PdfMerger.merge([(path, f"File {i}") for i, path in enumerate(paths)], output, progress.append)
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 6
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [
+        ("File 0", 0), ("File 1", 2), ("File 2", 4)]
+    assert progress[-1] == 100
+
+
+def test_deduplicate_shares_template_objects(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 5)
+    plain = str(tmp_path / "plain.pdf")
+    deduplicated = str(tmp_path / "dedup.pdf")
+    stats = {}
+
+    PdfMerger.merge(paths, plain)
+    PdfMerger.merge(paths, deduplicated, deduplicate=True, stats=stats)
+
+    # 字体文件、图片等在后4个文件中都是重复的
+    assert stats['duplicate_objects'] >= 4 * 3
+    saved = os.path.getsize(plain) - os.path.getsize(deduplicated)
+    assert saved > 0
+    assert abs(saved - stats['bytes_saved']) < stats['bytes_saved'] * 0.1
+
+    with fitz.open(plain) as a, fitz.open(deduplicated) as b:
+        assert len(a) == len(b) == 10
+        for page_a, page_b in zip(a, b):
+            assert page_a.get_text() == page_b.get_text()
+            assert page_a.get_pixmap(dpi=36).samples == page_b.get_pixmap(dpi=36).samples
+        xrefs = {b[i].get_images()[0][0] for i in range(len(b))}
+        assert len(xrefs) == 1
+
+
+def test_deduplicate_keeps_pages_distinct(tmp_path):
+    # 内容完全相同的页面仍然是不同的页面对象
+    doc = fitz.open()
+    for _ in range(3):
+        doc.new_page()
+    path = str(tmp_path / "blank.pdf")
+    doc.save(path)
+    doc.close()
+    output = str(tmp_path / "merged.pdf")
+
+    PdfMerger.merge([path, path], output, deduplicate=True)
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 6
+    assert len({page.indirect_reference.idnum for page in reader.pages}) == 6
+
+
+def test_streaming_merge_matches_in_memory_merge(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 5)
+    toc_doc = fitz.open()
+    for i in range(3):
+        toc_doc.new_page(width=300, height=400).insert_text((20, 40), f"Chapter {i + 1}")
+    toc_doc.set_toc([[1, "Part", 1], [2, "Chapter 2", 2], [1, "Appendix", 3]])
+    toc_path = str(tmp_path / "toc.pdf")
+    toc_doc.save(toc_path)
+    toc_doc.close()
+    items = [(path, f"File {i}") for i, path in enumerate(paths)] + [(toc_path, "Book")]
+    plain = str(tmp_path / "plain.pdf")
+    streamed = str(tmp_path / "streamed.pdf")
+    progress = []
+
+    PdfMerger.merge(items, plain)
+    PdfMerger.merge(items, streamed, progress.append, streaming=True, window_size=2)
+
+    with fitz.open(plain) as a, fitz.open(streamed) as b:
+        assert not b.is_repaired
+        assert len(a) == len(b) == 13
+        assert a.get_toc() == b.get_toc()
+        for page_a, page_b in zip(a, b):
+            assert page_a.get_text() == page_b.get_text()
+            assert page_a.get_pixmap(dpi=36).samples == page_b.get_pixmap(dpi=36).samples
+    assert PdfReader(streamed).metadata == PdfReader(plain).metadata
+    assert progress[-1] == 100
+
+
+def test_streaming_merge_falls_back_for_forms(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 2)
+    doc = fitz.open()
+    widget = fitz.Widget()
+    widget.field_name = "name"
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = fitz.Rect(20, 20, 200, 40)
+    doc.new_page().add_widget(widget)
+    form = str(tmp_path / "form.pdf")
+    doc.save(form)
+    doc.close()
+    output = str(tmp_path / "merged.pdf")
+
+    assert PdfMerger.scan([form, paths[0]], max_workers=1)[0]['form']
+    PdfMerger.merge([paths[0], form, paths[1]], output, streaming=True)
+
+    assert list(PdfReader(output).get_fields()) == ["name"]
+
+
+def test_streaming_merge_deduplicates_across_windows(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 6)
+    plain = str(tmp_path / "plain.pdf")
+    streamed = str(tmp_path / "streamed.pdf")
+    stats = {}
+
+    PdfMerger.merge(paths, plain, streaming=True, window_size=2)
+    PdfMerger.merge(paths, streamed, streaming=True, window_size=2, deduplicate=True, stats=stats)
+
+    saved = os.path.getsize(plain) - os.path.getsize(streamed)
+    assert stats['duplicate_objects'] >= 5 * 3
+    assert abs(saved - stats['bytes_saved']) < stats['bytes_saved'] * 0.1
+    with fitz.open(streamed) as doc:
+        assert len({page.get_images()[0][0] for page in doc}) == 1
+
+
+def test_streaming_merge_failure_keeps_existing_output(tmp_path, monkeypatch):
+    from src.core import pdf_merger
+
+    paths = _make_template_pdfs(tmp_path, 4)
+    output = tmp_path / "merged.pdf"
+    output.write_bytes(b"previous")
+    flushed = []
+
+    def failing_flush(self, window):
+        if flushed:
+            raise IOError("disk full")
+        flushed.append(window)
+        original_flush(self, window)
+
+    original_flush = pdf_merger._StreamingMerge.flush
+    monkeypatch.setattr(pdf_merger._StreamingMerge, "flush", failing_flush)
+
+    with pytest.raises(IOError, match="disk full"):
+        PdfMerger.merge(paths, str(output), streaming=True, window_size=1)
+
+    assert flushed
+    assert output.read_bytes() == b"previous"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_streaming_merge_keeps_named_destinations(tmp_path):
+    writer = PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(200, 200)
+    writer.add_named_destination("chapter-2", 1)
+    path = str(tmp_path / "named.pdf")
+    writer.write(path)
+    output = str(tmp_path / "merged.pdf")
+
+    PdfMerger.merge([path, path], output, streaming=True, window_size=1)
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 6
+    assert {name: reader.get_destination_page_number(dest)
+            for name, dest in reader.named_destinations.items()} == {"chapter-2": 1}
+
+
+def _encrypt(source, path, user_password):
+    writer = PdfWriter(clone_from=source)
+    writer.encrypt(user_password, owner_password="owner")
+    writer.write(path)
+    return path
+
+
+def test_scan_reports_metadata_and_offsets(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 2, pages=3)
+    toc_doc = fitz.open()
+    for _ in range(2):
+        toc_doc.new_page()
+    toc_doc.set_toc([[1, "Part", 1], [2, "Chapter", 2]])
+    toc_path = str(tmp_path / "toc.pdf")
+    toc_doc.save(toc_path)
+    toc_doc.close()
+    encrypted = _encrypt(paths[0], str(tmp_path / "encrypted.pdf"), "")
+    locked = _encrypt(paths[0], str(tmp_path / "locked.pdf"), "secret")
+
+    plan = PdfMerger.scan([(paths[0], "A"), toc_path, encrypted, locked, str(tmp_path / "missing.pdf"), paths[1]],
+                          max_workers=3)
+
+    assert [entry['pages'] for entry in plan] == [3, 2, 3, 0, 0, 3]
+    assert [entry['start_page'] for entry in plan] == [0, 3, 5, 8, 8, 8]
+    assert [entry['error'] for entry in plan] == [None, None, None, "文件受密码保护", "文件不存在", None]
+    assert plan[0]['title'] == "A" and plan[1]['title'] is None
+    assert plan[1]['outline'] == [(1, "Part"), (2, "Chapter")]
+    assert plan[2]['encrypted'] and not plan[0]['encrypted']
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_merge_rejects_bad_inputs_before_writing(tmp_path, streaming):
+    paths = _make_template_pdfs(tmp_path, 2)
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    output = str(tmp_path / "merged.pdf")
+
+    with pytest.raises(Exception, match="broken.pdf"):
+        PdfMerger.merge([paths[0], str(broken), paths[1]], output, streaming=streaming, window_size=1)
+
+    assert not os.path.exists(output)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_merge_opens_inputs_with_empty_user_password(tmp_path, streaming):
+    paths = _make_template_pdfs(tmp_path, 2)
+    encrypted = _encrypt(paths[1], str(tmp_path / "encrypted.pdf"), "")
+    output = str(tmp_path / "merged.pdf")
+
+    PdfMerger.merge([(paths[0], "First"), (encrypted, "Second")], output, streaming=streaming)
+
+    reader = PdfReader(output)
+    assert len(reader.pages) == 4
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [
+        ("First", 0), ("Second", 2)]
+
+
+@pytest.mark.parametrize("xref_stream", [False, True])
+def test_append_to_writes_incremental_update(tmp_path, xref_stream, caplog):
+    paths = _make_template_pdfs(tmp_path, 6)
+    items = [(path, f"Day {i + 1}") for i, path in enumerate(paths)]
+    book = str(tmp_path / "book.pdf")
+    full = str(tmp_path / "full.pdf")
+    PdfMerger.merge(items, full)
+    PdfMerger.merge(items[:4], book)
+    # 重新保存以带上文件标识 (/ID)，xref_stream 时使用交叉引用流
+    with fitz.open(book) as doc:
+        doc.save(str(tmp_path / "resaved.pdf"), use_objstms=xref_stream)
+    os.replace(str(tmp_path / "resaved.pdf"), book)
+    with open(book, 'rb') as f:
+        original = f.read()
+    original_id = PdfReader(book).trailer['/ID']
+
+    assert PdfMerger.append_to(book, items[4:])
+
+    with open(book, 'rb') as f:
+        updated = f.read()
+    assert updated.startswith(original)
+    appended_inputs = sum(os.path.getsize(path) for path in paths[4:])
+    assert len(updated) - len(original) < appended_inputs * 1.2
+    with fitz.open(full) as a, fitz.open(book) as b:
+        assert not b.is_repaired
+        assert len(b) == 12
+        assert a.get_toc() == b.get_toc()
+        assert [page.get_text() for page in a] == [page.get_text() for page in b]
+    caplog.clear()
+    reader = PdfReader(book, strict=True)
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline][-2:] == [
+        ("Day 5", 8), ("Day 6", 10)]
+    assert not [record for record in caplog.records if record.name.startswith("pypdf")]
+    # 增量更新保留文件标识的第一个元素，更新第二个元素
+    assert reader.trailer['/ID'][0] == original_id[0]
+    assert reader.trailer['/ID'][1] != original_id[1]
+
+
+def test_append_to_adds_outline_and_named_destinations(tmp_path):
+    book = str(tmp_path / "book.pdf")
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(book)
+    doc.close()
+    writer = PdfWriter()
+    for _ in range(2):
+        writer.add_blank_page(200, 200)
+    writer.add_named_destination("appendix", 1)
+    chapter = str(tmp_path / "chapter.pdf")
+    writer.write(chapter)
+
+    PdfMerger.append_to(book, [(chapter, "Chapter")])
+
+    reader = PdfReader(book)
+    assert len(reader.pages) == 3
+    assert [(item.title, reader.get_destination_page_number(item)) for item in reader.outline] == [("Chapter", 1)]
+    assert {name: reader.get_destination_page_number(dest)
+            for name, dest in reader.named_destinations.items()} == {"appendix": 2}
+
+
+def test_append_to_rejects_bad_inputs_without_touching_file(tmp_path):
+    paths = _make_template_pdfs(tmp_path, 1)
+    book = str(tmp_path / "book.pdf")
+    PdfMerger.merge(paths, book)
+    size = os.path.getsize(book)
+
+    with pytest.raises(Exception, match="missing.pdf"):
+        PdfMerger.append_to(book, [paths[0], str(tmp_path / "missing.pdf")])
+
+    assert os.path.getsize(book) == size
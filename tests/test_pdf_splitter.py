@@ -0,0 +1,143 @@
+import sys
+import os
+
+import fitz  # PyMuPDF
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import pdf_splitter
+from src.core.pdf_merger import PdfMerger
+from src.core.pdf_splitter import PdfSplitter
+
+
+def _make_pdf(path, pages=10):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=200, height=200)
+        page.insert_text((20, 40), f"Page {i + 1}")
+    toc = []
+    for i in range(0, pages, 3):
+        toc.append([1, f"Chapter {i + 1}", i + 1])
+        if i + 1 < pages:
+            toc.append([2, f"Section {i + 2}", i + 2])
+    doc.set_toc(toc)
+    doc.save(path)
+    doc.close()
+
+
+def _read_outputs(output_dir):
+    outputs = {}
+    for name in os.listdir(output_dir):
+        with fitz.open(os.path.join(output_dir, name)) as doc:
+            outputs[name] = ([page.get_text() for page in doc], doc.get_toc())
+    return outputs
+
+
+def test_single_split_writes_page_files_with_outlines(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=4)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    progress = []
+
+    assert PdfSplitter.split(pdf, str(output_dir), "single", progress_callback=progress.append, max_workers=1)
+
+    outputs = _read_outputs(str(output_dir))
+    assert sorted(outputs) == [f"[{i}]doc.pdf" for i in range(1, 5)]
+    assert [outputs[f"[{i}]doc.pdf"][0] for i in range(1, 5)] == [[f"Page {i}\n"] for i in range(1, 5)]
+    # 父大纲项不在输出范围内时，子项作为顶级大纲项
+    assert outputs["[2]doc.pdf"][1] == [[1, "Section 2", 1]]
+    assert outputs["[4]doc.pdf"][1] == [[1, "Chapter 4", 1]]
+    assert progress == [25, 50, 75, 100]
+
+
+def test_range_split_keeps_nested_outlines(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=7)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    PdfSplitter.split(pdf, str(output_dir), "range", page_ranges="1-2, 4-7")
+
+    outputs = _read_outputs(str(output_dir))
+    assert outputs["[1-2]doc.pdf"][1] == [[1, "Chapter 1", 1], [2, "Section 2", 2]]
+    assert outputs["[4-7]doc.pdf"][1] == [[1, "Chapter 4", 1], [2, "Section 5", 2], [1, "Chapter 7", 4]]
+
+
+def test_outline_index_range_query():
+    entries = [("A", 5, 0, None), ("A.1", 2, 1, 0), ("B", 2, 0, None), ("B.1", 9, 1, 2)]
+    index = pdf_splitter._OutlineIndex(entries)
+
+    assert [entry[0] for entry in index.entries] == ["B", "A.1", "A", "B.1"]
+    # 父项下标换算为排序后的位置
+    assert [entry[3] for entry in index.entries] == [None, 2, None, 0]
+    assert [index.entries[i][0] for i in index.query(2, 6)] == ["B", "A.1", "A"]
+    assert list(index.query(6, 9)) == []
+    assert [index.entries[i][0] for i in index.query(9, 10)] == ["B.1"]
+
+
+def test_parallel_single_split_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_splitter, 'SPLIT_CHUNK_PAGES', 3)
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=11)
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    serial_dir.mkdir()
+    parallel_dir.mkdir()
+    progress = []
+
+    PdfSplitter.split(pdf, str(serial_dir), "single", max_workers=1)
+    PdfSplitter.split(pdf, str(parallel_dir), "single", progress_callback=progress.append, max_workers=2)
+
+    assert _read_outputs(str(parallel_dir)) == _read_outputs(str(serial_dir))
+    assert len(os.listdir(parallel_dir)) == 11
+    assert progress == sorted(progress) and progress[-1] == 100
+
+
+def test_outline_split_by_top_level_entries(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    doc = fitz.open()
+    for i in range(6):
+        doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+    # 章和第一节在同一页；Ch2 和 Ch2b 也在同一页
+    doc.set_toc([[1, "Ch1", 1], [2, "Sec1.1", 1], [2, "Sec1.2", 2],
+                 [1, "Ch2", 4], [1, "Ch2b", 4], [2, "Sec2.1", 4], [1, "Ch3", 6]])
+    doc.save(pdf)
+    doc.close()
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    PdfSplitter.split(pdf, str(output_dir), "outline")
+
+    outputs = _read_outputs(str(output_dir))
+    assert sorted(outputs) == ["[1]Ch1.pdf", "[2]Ch2.pdf", "[3]Ch3.pdf"]
+    assert outputs["[1]Ch1.pdf"] == (["Page 1\n", "Page 2\n", "Page 3\n"],
+                                     [[1, "Ch1", 1], [2, "Sec1.1", 1], [2, "Sec1.2", 2]])
+    assert outputs["[2]Ch2.pdf"][0] == ["Page 4\n", "Page 5\n"]
+    assert outputs["[3]Ch3.pdf"] == (["Page 6\n"], [[1, "Ch3", 1]])
+
+
+def test_outline_split_of_merged_flat_outline(tmp_path):
+    # PdfMerger 为每个文件添加一个顶级书签，按大纲拆分应还原为原来的各个文件
+    items = []
+    for i, (title, pages) in enumerate([("Intro", 2), ("Part: A", 1), ("Part/B", 3)]):
+        doc = fitz.open()
+        for j in range(pages):
+            doc.new_page(width=200, height=200).insert_text((20, 40), f"File {i + 1} page {j + 1}")
+        path = str(tmp_path / f"in{i}.pdf")
+        doc.save(path)
+        doc.close()
+        items.append((path, title))
+    merged = str(tmp_path / "merged.pdf")
+    PdfMerger.merge(items, merged)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    PdfSplitter.split(merged, str(output_dir), "outline")
+
+    outputs = _read_outputs(str(output_dir))
+    assert sorted(outputs) == ["[1]Intro.pdf", "[2]Part_ A.pdf", "[3]Part_B.pdf"]
+    assert outputs["[1]Intro.pdf"] == (["File 1 page 1\n", "File 1 page 2\n"], [[1, "Intro", 1]])
+    assert outputs["[2]Part_ A.pdf"] == (["File 2 page 1\n"], [[1, "Part: A", 1]])
+    assert outputs["[3]Part_B.pdf"] == ([f"File 3 page {j}\n" for j in range(1, 4)], [[1, "Part/B", 1]])
@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import threading
+
+import fitz  # PyMuPDF
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import pdf_text_exporter
+from src.core.pdf_text_exporter import PdfTextExporter
+
+
+def _make_pdf(path, pages=5):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=300, height=400)
+        page.insert_text((20, 40), f"Chapter {i + 1}", fontsize=24)
+        page.insert_text((20, 80), f"Body text of page {i + 1}", fontsize=10)
+        page.insert_text((20, 95), "second line", fontsize=10)
+        page.insert_text((20, 130), "Important", fontsize=10, fontname="helvetica-bold")
+    doc.save(path)
+    doc.close()
+
+
+def test_txt_export_matches_get_text(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    output = str(tmp_path / "out.txt")
+    progress = []
+
+    assert PdfTextExporter.export(pdf, output, max_workers=1, progress_callback=progress.append)
+
+    with fitz.open(pdf) as doc:
+        expected = '\f'.join(page.get_text() for page in doc)
+    with open(output, encoding='utf-8', newline='') as f:
+        assert f.read() == expected
+    assert progress == [20, 40, 60, 80, 100]
+
+
+def test_markdown_export_headings_and_bold(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=2)
+    output = str(tmp_path / "out.md")
+
+    PdfTextExporter.export(pdf, output, pages="2", max_workers=1)
+
+    with open(output, encoding='utf-8') as f:
+        text = f.read()
+    assert text.startswith("<!-- page 2 -->\n\n# Chapter 2\n\n")
+    assert "Body text of page 2" in text
+    assert "**Important**" in text
+    assert "page 1" not in text
+
+
+def test_json_export_has_block_bboxes(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=3)
+    output = str(tmp_path / "out.json")
+
+    PdfTextExporter.export(pdf, output, pages=[3, 1], max_workers=1)
+
+    with open(output, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['source'] == "doc.pdf"
+    assert data['page_count'] == 2
+    assert [page['page'] for page in data['pages']] == [3, 1]
+    first = data['pages'][0]['blocks'][0]
+    assert first['type'] == 'text' and first['text'] == "Chapter 3"
+    x0, y0, x1, y1 = first['bbox']
+    assert 0 <= x0 < x1 <= 300 and 0 <= y0 < y1 <= 60
+
+
+@pytest.mark.parametrize("extension", ["txt", "md", "json"])
+def test_parallel_export_matches_serial(tmp_path, monkeypatch, extension):
+    monkeypatch.setattr(pdf_text_exporter, 'CHUNK_PAGES', 3)
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=11)
+    serial = str(tmp_path / f"serial.{extension}")
+    parallel = str(tmp_path / f"parallel.{extension}")
+
+    PdfTextExporter.export(pdf, serial, max_workers=1)
+    PdfTextExporter.export(pdf, parallel, max_workers=2)
+
+    with open(serial, 'rb') as a, open(parallel, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    output = str(tmp_path / "out.txt")
+    cancel = threading.Event()
+
+    def progress(value):
+        if value >= 40:
+            cancel.set()
+
+    assert PdfTextExporter.export(pdf, output, max_workers=1, progress_callback=progress, cancel_event=cancel) is False
+    assert os.listdir(tmp_path) == ["doc.pdf"]
+
+
+def test_rejects_unknown_format(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+
+    with pytest.raises(ValueError):
+        PdfTextExporter.export(pdf, str(tmp_path / "out.html"))
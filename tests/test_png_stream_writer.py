@@ -0,0 +1,40 @@
+import sys
+import os
+import io
+
+import pytest
+from PIL import Image
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.png_stream_writer import PngStreamWriter
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_rows_written_in_batches_read_back_exactly(mode):
+    source = Image.effect_noise((37, 50), 60).convert(mode)
+    data = source.tobytes()
+    stride = 37 * len(mode)
+    buffer = io.BytesIO()
+
+    writer = PngStreamWriter(buffer, 37, 50, mode, dpi=150)
+    for start, end in ((0, 1), (1, 20), (20, 20), (20, 50)):
+        writer.write_rows(data[start * stride:end * stride])
+    writer.close()
+
+    buffer.seek(0)
+    with Image.open(buffer) as img:
+        assert img.mode == mode
+        assert round(img.info['dpi'][0]) == 150
+        assert img.tobytes() == data
+
+
+def test_row_count_must_match_height():
+    writer = PngStreamWriter(io.BytesIO(), 4, 2, 'L')
+
+    with pytest.raises(ValueError):
+        writer.write_rows(bytes(12))
+    writer.write_rows(bytes(4))
+    with pytest.raises(ValueError):
+        writer.close()
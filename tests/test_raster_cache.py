@@ -0,0 +1,144 @@
+import sys
+import os
+import time
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import raster_cache
+from src.core.raster_cache import RasterCache, configure_raster_cache, get_raster_cache, document_fingerprint
+from src.core.pdf_converter import PdfConverter
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_cache():
+    configure_raster_cache()
+    yield
+    configure_raster_cache()
+
+
+def _make_pdf(path, pages=3):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=200, height=300)
+        page.insert_text((20, 50), f"Page {i + 1}", fontsize=24)
+    doc.save(path)
+    doc.close()
+
+
+def test_memory_tier_hits_and_matches_direct_render(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    cache = RasterCache()
+
+    with fitz.open(pdf) as doc:
+        first = cache.render(doc[1], 100)
+        second = cache.render(doc[1], 100)
+        gray = cache.render(doc[1], 100, colorspace='gray')
+        direct = doc[1].get_pixmap(matrix=fitz.Matrix(100 / 72, 100 / 72))
+
+    assert second is first
+    assert first.samples == direct.samples
+    assert (first.width, first.height, first.n) == (direct.width, direct.height, 3)
+    assert gray.n == 1
+    assert cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'misses': 2}
+
+
+def test_raster_to_pil_modes(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf, pages=1)
+    cache = RasterCache()
+
+    with fitz.open(pdf) as doc:
+        assert cache.render(doc[0], 72, alpha=True).to_pil().mode == 'RGBA'
+        assert cache.render(doc[0], 72, colorspace='cmyk').to_pil().mode == 'CMYK'
+        with pytest.raises(ValueError):
+            cache.render(doc[0], 72, colorspace='cmyk', alpha=True).to_pil()
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    page_bytes = 200 * 300 * 3
+    cache = RasterCache(max_memory_bytes=page_bytes * 2)
+
+    with fitz.open(pdf) as doc:
+        for index in (0, 1, 0, 2):
+            cache.render(doc[index], 72)
+        cache.render(doc[0], 72)
+        cache.render(doc[1], 72)
+
+    # 第2页在加入第3页时被淘汰，第1页因刚被访问而保留
+    assert cache.stats == {'memory_hits': 2, 'disk_hits': 0, 'misses': 4}
+
+
+def test_disk_tier_shared_between_instances_and_budgeted(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    disk_dir = str(tmp_path / "rasters")
+
+    with fitz.open(pdf) as doc:
+        writer = RasterCache(disk_dir=disk_dir)
+        expected = writer.render(doc[0], 72).samples
+
+        reader = RasterCache(disk_dir=disk_dir)
+        assert reader.render(doc[0], 72).samples == expected
+        assert reader.stats['disk_hits'] == 1
+
+        entry_size = os.path.getsize(os.path.join(disk_dir, os.listdir(disk_dir)[0]))
+        small = RasterCache(max_memory_bytes=0, disk_dir=disk_dir, max_disk_bytes=entry_size * 5 // 2)
+        for index in (1, 2):
+            time.sleep(0.01)
+            small.render(doc[index], 72)
+
+    files = [name for name in os.listdir(disk_dir) if name.endswith('.raster')]
+    assert len(files) == 2
+
+
+def test_modified_file_is_not_served_from_cache(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    before = document_fingerprint(pdf)
+    _make_pdf(pdf, pages=4)
+    os.utime(pdf, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+    assert document_fingerprint(pdf) != before
+    with fitz.open() as doc:
+        doc.new_page()
+        assert document_fingerprint(doc) is None
+
+
+def test_to_images_reuses_rasters_without_filling_memory_tier(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    cache = get_raster_cache()
+
+    # 查看器渲染过的页面被导出复用；导出渲染的页面不写入内存层
+    with fitz.open(pdf) as doc:
+        cache.render(doc[0], 72)
+    first = PdfConverter.to_images(pdf, str(tmp_path / "a"), dpi=72, max_workers=1)
+    second = PdfConverter.to_images(pdf, str(tmp_path / "b"), image_format='jpg', dpi=72, max_workers=1)
+
+    assert len(first) == len(second) == 3
+    assert cache.stats == {'memory_hits': 2, 'disk_hits': 0, 'misses': 5}
+    assert len(cache._memory) == 1
+    with open(first[0], 'rb') as a, open(first[1], 'rb') as b:
+        assert Image.open(a).size == Image.open(b).size
+
+
+def test_to_images_workers_fill_disk_tier(tmp_path):
+    pdf = str(tmp_path / "doc.pdf")
+    _make_pdf(pdf)
+    disk_dir = str(tmp_path / "rasters")
+    configure_raster_cache(disk_dir=disk_dir, max_disk_bytes=raster_cache.DEFAULT_DISK_BYTES)
+
+    PdfConverter.to_images(pdf, str(tmp_path / "a"), dpi=72, max_workers=2)
+    assert len(os.listdir(disk_dir)) == 3
+
+    configure_raster_cache(disk_dir=disk_dir, max_disk_bytes=raster_cache.DEFAULT_DISK_BYTES)
+    PdfConverter.to_images(pdf, str(tmp_path / "b"), dpi=72, max_workers=1)
+    assert get_raster_cache().stats == {'memory_hits': 0, 'disk_hits': 3, 'misses': 0}
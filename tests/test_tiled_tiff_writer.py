@@ -0,0 +1,54 @@
+import sys
+import os
+import io
+
+import pytest
+from PIL import Image
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.tiled_tiff_writer import TiledTiffWriter
+
+
+def _gradient(mode, size):
+    img = Image.linear_gradient('L').resize(size)
+    if mode in ('L', '1'):
+        return img.convert(mode)
+    return Image.merge(mode, [img.rotate(90 * i) for i in range(len(mode))])
+
+
+def _write_tiled(img, tile_size, **kwargs):
+    colorspace, alpha = {'RGB': ('rgb', False), 'LA': ('gray', True), 'CMYK': ('cmyk', False),
+                         '1': ('bilevel', False)}[img.mode]
+    buffer = io.BytesIO()
+    writer = TiledTiffWriter(buffer, img.width, img.height, colorspace=colorspace, alpha=alpha,
+                             tile_size=tile_size, dpi=300, **kwargs)
+    for top in range(0, img.height, tile_size):
+        for left in range(0, img.width, tile_size):
+            writer.write_tile(img.crop((left, top, left + tile_size, top + tile_size)).tobytes())
+    writer.close()
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("mode, bigtiff", [("RGB", False), ("LA", False), ("CMYK", True), ("1", False)])
+def test_tiles_read_back_exactly(mode, bigtiff):
+    source = _gradient(mode, (150, 70))
+
+    with Image.open(_write_tiled(source, 32, bigtiff=bigtiff)) as img:
+        assert img.mode == mode
+        assert img.size == source.size
+        assert img.tag_v2[322] == 32
+        assert round(float(img.info['dpi'][0])) == 300
+        assert img.tobytes() == source.tobytes()
+
+
+def test_rejects_incomplete_image():
+    writer = TiledTiffWriter(io.BytesIO(), 40, 40, tile_size=16)
+    writer.write_tile(bytes(16 * 16 * 3))
+
+    with pytest.raises(ValueError):
+        writer.write_tile(bytes(10))
+    with pytest.raises(ValueError):
+        writer.close()